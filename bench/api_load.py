@@ -0,0 +1,165 @@
+"""변환 HTTP API 부하 테스트 - 가짜 Gemini/Sheets로 동시 요청 실행
+
+sidiz.api 서버를 빈 포트에 띄우고 클라이언트 여러 개가 keep-alive 연결로
+/convert, /convert/batch, /compare, /feedback을 섞어 호출한 뒤
+경로별 지연 시간, 상태 코드, Gemini 호출 수를 출력한다.
+
+    python -m bench.api_load --clients 50 --requests 20
+    python -m bench.api_load --clients 20 --error-rate 0.1 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from bench.fakes import FakeGemini, FakeSheets
+from bench.load_test import PHRASES, percentile
+
+API_TOKEN = "bench-token"
+
+
+async def request(reader, writer, method, path, body=None, token=API_TOKEN):
+    """keep-alive 연결로 요청 하나 보내고 (상태 코드, JSON 응답) 반환 (token=None이면 인증 헤더 없음)"""
+    data = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+    authorization = "" if token is None else f"Authorization: Bearer {token}\r\n"
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n{authorization}"
+        f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(headers["content-length"]))
+    return status, json.loads(payload)
+
+
+def next_request(rng, args):
+    roll = rng.random()
+    if roll < args.batch_rate:
+        return "POST", "/convert/batch", {"mode": rng.choice(["UX", "SEO/GEO"]), "texts": rng.sample(PHRASES, 3)}
+    if roll < args.batch_rate + args.compare_rate:
+        return "POST", "/compare", {"text": rng.choice(PHRASES)}
+    if roll < args.batch_rate + args.compare_rate + args.feedback_rate:
+        return "POST", "/feedback", {
+            "mode": "UX", "original": rng.choice(PHRASES), "converted": "변환 결과",
+            "feedback": rng.choice([0, 1]), "reason": "너무 길어요"
+        }
+    return "POST", "/convert", {"mode": rng.choice(["UX", "SEO/GEO"]), "text": rng.choice(PHRASES)}
+
+
+async def run_client(client_id, port, args, timings, statuses):
+    rng = random.Random(args.seed + client_id)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for _ in range(args.requests):
+            method, path, body = next_request(rng, args)
+            started = time.perf_counter()
+            status, _ = await request(reader, writer, method, path, body)
+            timings[path].append(time.perf_counter() - started)
+            statuses[(path, status)] += 1
+    finally:
+        writer.close()
+
+
+async def run(args):
+    from sidiz.api import ConversionAPI
+    from sidiz.service import build_service
+    
+    workdir = tempfile.mkdtemp(prefix="sidiz-api-bench-")
+    service = build_service({
+        "gemini": {"api_key": "fake", "rpm": args.rpm, "tpm": 100_000_000, "stream": False},
+        "gcp_service_account": {"type": "service_account"},
+        "feedback_sheet_url": "https://docs.google.com/spreadsheets/d/fake",
+        "feedback_db_path": os.path.join(workdir, "feedback.sqlite3"),
+    })
+    api = ConversionAPI(service, API_TOKEN, max_workers=args.workers)
+    server = await api.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    
+    # 잘못된 요청은 모델 호출 없이 400으로 끝나야 한다
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    checks = {
+        "unauthorized": (await request(reader, writer, "GET", "/health", token=None))[0],
+        "bad_mode": (await request(reader, writer, "POST", "/convert", {"mode": "X", "text": "의자"}))[0],
+        "missing_text": (await request(reader, writer, "POST", "/convert", {"mode": "UX"}))[0],
+        "unknown_path": (await request(reader, writer, "GET", "/nope"))[0],
+        "health": (await request(reader, writer, "GET", "/health"))[0],
+    }
+    writer.close()
+    
+    timings = defaultdict(list)
+    statuses = Counter()
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(client_id, port, args, timings, statuses) for client_id in range(args.clients)))
+    elapsed = time.perf_counter() - started
+    server.close()
+    await server.wait_closed()
+    return timings, statuses, checks, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="변환 HTTP API 오프라인 부하 테스트")
+    parser.add_argument("--clients", type=int, default=20, help="동시 클라이언트(연결) 수")
+    parser.add_argument("--requests", type=int, default=10, help="클라이언트당 요청 수")
+    parser.add_argument("--workers", type=int, default=32, help="API 스레드 풀 크기")
+    parser.add_argument("--batch-rate", type=float, default=0.1, help="/convert/batch 비율")
+    parser.add_argument("--compare-rate", type=float, default=0.1, help="/compare 비율")
+    parser.add_argument("--feedback-rate", type=float, default=0.2, help="/feedback 비율")
+    parser.add_argument("--latency", type=float, default=0.5, help="가짜 Gemini 응답 시간 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 오류 주입 비율 (0~1)")
+    parser.add_argument("--rpm", type=int, default=100_000, help="리미터에 설정할 분당 요청 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON Lines로 출력")
+    args = parser.parse_args(argv)
+    
+    gemini = FakeGemini(latency=args.latency, error_rate=args.error_rate, seed=args.seed).install()
+    sheets = FakeSheets().install()
+    timings, statuses, checks, elapsed = asyncio.run(run(args))
+    
+    rows = [
+        {
+            "path": path,
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "statuses": {str(status): count for (status_path, status), count in sorted(statuses.items()) if status_path == path},
+        }
+        for path, values in sorted(timings.items())
+    ]
+    totals = {
+        "requests": sum(len(values) for values in timings.values()),
+        "wall_time_s": round(elapsed, 2),
+        "requests_per_s": round(sum(len(values) for values in timings.values()) / elapsed, 1),
+        "gemini_calls": dict(gemini.calls),
+        "sheets_calls": dict(sheets.calls + sheets.worksheet.calls),
+        "checks": checks,
+    }
+    
+    if args.json:
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        print(json.dumps({"totals": totals}, ensure_ascii=False))
+        return
+    
+    header = f"{'path':<18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}  statuses"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['path']:<18}{row['count']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}  {row['statuses']}")
+    print()
+    for key, value in totals.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
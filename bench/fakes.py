@@ -0,0 +1,226 @@
+"""오프라인 실행용 가짜 Gemini / Google Sheets
+
+install()을 호출하면 google.generativeai, gspread, 서비스 계정 인증을
+가짜로 바꿔서 API 키나 네트워크 없이 streamlit_app.py를 실행할 수 있다.
+"""
+import json
+import re
+import random
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from sidiz.negative_feedback import FEEDBACK_HEADER
+
+
+class FakeUsage:
+    def __init__(self, prompt, text):
+        self.prompt_token_count = len(prompt) // 2
+        self.candidates_token_count = len(text) // 2
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeResponse:
+    """generate_content() 응답 - stream=True면 조각 단위로 지연하며 순회"""
+    
+    def __init__(self, prompt, text, chunks, chunk_delay):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt, text)
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+    
+    def __iter__(self):
+        for chunk in self._chunks:
+            time.sleep(self._chunk_delay)
+            yield FakeChunk(chunk)
+
+
+class FakeGemini:
+    """가짜 Gemini 백엔드 (지연 시간, 429 주입, 스트리밍 조각 수 설정 가능)
+    
+    retry_after를 주면 429 메시지에 재시도 대기 시간을 넣는다.
+    """
+    
+    def __init__(self, latency=0.5, first_token_latency=0.2, chunk_count=5, error_rate=0.0, seed=None,
+                 retry_after=None):
+        self.latency = latency
+        self.first_token_latency = first_token_latency
+        self.chunk_count = chunk_count
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.call_times = []  # generate_content 호출 시각 (time.monotonic)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+    
+    def list_models(self):
+        self.count("list_models")
+        return [SimpleNamespace(name="models/gemini-1.5-flash", supported_generation_methods=["generateContent"])]
+    
+    def answer(self, prompt, generation_config=None):
+        """프롬프트 종류(단일/일괄/비교)에 맞는 가짜 답변"""
+        if generation_config and generation_config.get("response_mime_type") == "application/json":
+            batch = re.search(r"사용자 입력 목록 \(JSON\): (\[.*\])", prompt)
+            if batch:
+                items = json.loads(batch.group(1))
+                return json.dumps(
+                    [{"id": item["id"], "output": f"시디즈가 제안하는 {item['input']}"} for item in items],
+                    ensure_ascii=False
+                )
+            compare = re.search(r"^(\{.*\})\s*$", prompt.strip().splitlines()[-1])
+            if compare:
+                modes = json.loads(compare.group(1))
+                return json.dumps({mode: f"[{mode}] 시디즈가 제안하는 문구" for mode in modes}, ensure_ascii=False)
+        
+        user_input = re.search(r'사용자 입력: "(.*)"', prompt)
+        phrase = user_input.group(1) if user_input else "문구"
+        return f"하루 종일 편안한 {phrase}, 시디즈가 세심하게 설계했습니다.\n출처: kr.sidiz.com"
+    
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        self.count("generate_content")
+        with self._lock:
+            self.call_times.append(time.monotonic())
+        if self.error_rate and self._random.random() < self.error_rate:
+            from google.api_core.exceptions import ResourceExhausted
+            
+            self.count("429")
+            hint = "" if self.retry_after is None else f" Please retry in {self.retry_after}s."
+            raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota)." + hint)
+        
+        text = self.answer(prompt, generation_config)
+        if not stream:
+            time.sleep(self.latency)
+            return FakeResponse(prompt, text, [text], 0)
+        
+        time.sleep(self.first_token_latency)
+        size = max(1, len(text) // self.chunk_count)
+        chunks = [text[start:start + size] for start in range(0, len(text), size)]
+        delay = max(self.latency - self.first_token_latency, 0) / len(chunks)
+        return FakeResponse(prompt, text, chunks, delay)
+    
+    def model_factory(self):
+        backend = self
+        
+        class FakeGenerativeModel:
+            def __init__(self, model_name, **kwargs):
+                self.model_name = model_name
+            
+            def generate_content(self, prompt, **kwargs):
+                return backend.generate_content(prompt, **kwargs)
+            
+            def count_tokens(self, prompt):
+                backend.count("count_tokens")
+                return SimpleNamespace(total_tokens=len(prompt) // 2)
+        
+        return FakeGenerativeModel
+    
+    def install(self, patch=setattr):
+        """google.generativeai를 이 가짜로 바꿈 (테스트에서는 monkeypatch.setattr을 넘겨 끝나면 되돌림)"""
+        import google.generativeai as genai
+        
+        patch(genai, "configure", lambda **kwargs: None)
+        patch(genai, "list_models", self.list_models)
+        patch(genai, "GenerativeModel", self.model_factory())
+        return self
+
+
+class FakeCell:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeWorksheet:
+    """메모리에 행을 보관하는 gspread Worksheet 대용"""
+    
+    def __init__(self, latency=0.0, header=True):
+        self.latency = latency
+        self.rows = [list(FEEDBACK_HEADER)] if header else []
+        self.calls = Counter()
+        self._lock = threading.Lock()
+    
+    def _call(self, name):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls[name] += 1
+    
+    @property
+    def row_count(self):
+        return len(self.rows)
+    
+    def cell(self, row, col):
+        self._call("cell")
+        with self._lock:
+            value = self.rows[row - 1][col - 1] if len(self.rows) >= row and len(self.rows[row - 1]) >= col else None
+        return FakeCell(value)
+    
+    def row_values(self, row):
+        self._call("row_values")
+        with self._lock:
+            return list(self.rows[row - 1]) if len(self.rows) >= row else []
+    
+    def get_values(self, range_name="A1:H"):
+        self._call("get_values")
+        start = int(re.match(r"[A-Z]+(\d+)", range_name).group(1))
+        with self._lock:
+            return [list(row) for row in self.rows[start - 1:]]
+    
+    def get_all_records(self):
+        self._call("get_all_records")
+        with self._lock:
+            return [dict(zip(self.rows[0], row)) for row in self.rows[1:]]
+    
+    def insert_row(self, values, index=1, **kwargs):
+        self._call("insert_row")
+        with self._lock:
+            self.rows.insert(index - 1, [str(value) for value in values])
+    
+    def append_row(self, values, **kwargs):
+        self._call("append_row")
+        with self._lock:
+            self.rows.append([str(value) for value in values])
+    
+    def append_rows(self, values, **kwargs):
+        self._call("append_rows")
+        with self._lock:
+            self.rows.extend([str(value) for value in row] for row in values)
+
+
+class FakeSheets:
+    """가짜 gspread 클라이언트 - 모든 시트 URL이 같은 워크시트를 연다"""
+    
+    def __init__(self, latency=0.0, header=True):
+        self.worksheet = FakeWorksheet(latency=latency, header=header)
+        self.calls = Counter()
+    
+    def authorize(self, credentials, **kwargs):
+        self.calls["authorize"] += 1
+        return self
+    
+    def open_by_url(self, url):
+        self.calls["open_by_url"] += 1
+        return SimpleNamespace(sheet1=self.worksheet)
+    
+    def total_calls(self):
+        return sum(self.calls.values()) + sum(self.worksheet.calls.values())
+    
+    def install(self, patch=setattr):
+        """gspread 인증을 이 가짜로 바꿈 (테스트에서는 monkeypatch.setattr을 넘겨 끝나면 되돌림)"""
+        import gspread
+        from google.oauth2 import service_account
+        
+        patch(gspread, "authorize", self.authorize)
+        patch(
+            service_account.Credentials, "from_service_account_info",
+            classmethod(lambda cls, info, **kwargs: SimpleNamespace(info=info))
+        )
+        return self
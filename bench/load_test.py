@@ -0,0 +1,225 @@
+"""오프라인 부하 테스트 - 가짜 Gemini/Sheets로 여러 세션을 동시에 실행
+
+streamlit.testing.v1.AppTest로 세션마다 앱을 띄우고 모드 선택, 변환,
+피드백 클릭을 반복한 뒤 동작별 지연 시간과 API 호출 수를 출력한다.
+
+    python -m bench.load_test --sessions 10 --conversions 3
+    python -m bench.load_test --sessions 20 --error-rate 0.1 --json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fakes import FakeGemini, FakeSheets
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+PHRASES = ["편안한 의자", "허리가 아파요", "T50 의자", "가성비 좋은 의자", "오래 앉아도 편한 의자", "학생용 의자"]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """동작별 소요 시간과 그동안 늘어난 Gemini/Sheets 호출 수 기록
+    
+    호출 수는 프로세스 전체 카운터의 차이라서, 세션이 동시에 돌면 근사값이다.
+    """
+    
+    def __init__(self, gemini, sheets):
+        self.gemini = gemini
+        self.sheets = sheets
+        self.samples = defaultdict(list)  # 동작 -> [(초, gemini 호출, sheets 호출)]
+        self._lock = threading.Lock()
+    
+    def timed(self, action, run):
+        gemini_before = self.gemini.calls["generate_content"]
+        sheets_before = self.sheets.total_calls()
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        sample = (
+            elapsed,
+            self.gemini.calls["generate_content"] - gemini_before,
+            self.sheets.total_calls() - sheets_before
+        )
+        with self._lock:
+            self.samples[action].append(sample)
+        return result
+    
+    def report(self):
+        rows = []
+        for action, samples in self.samples.items():
+            durations = [sample[0] * 1000 for sample in samples]
+            rows.append({
+                "action": action,
+                "count": len(samples),
+                "p50_ms": round(percentile(durations, 50), 1),
+                "p95_ms": round(percentile(durations, 95), 1),
+                "mean_ms": round(statistics.fmean(durations), 1),
+                "gemini_calls_per_action": round(sum(sample[1] for sample in samples) / len(samples), 2),
+                "sheets_calls_per_action": round(sum(sample[2] for sample in samples) / len(samples), 2),
+            })
+        return rows
+
+
+def prepare_concurrent_apptest(secrets):
+    """AppTest를 여러 스레드에서 동시에 돌릴 수 있도록 전역 상태 고정
+    
+    AppTest는 실행마다 st.secrets와 Runtime 인스턴스를 바꿨다가 끝나면 되돌리므로,
+    동시에 도는 다른 세션이 그 사이에 깨진다. secrets는 전역으로 한 번만 넣고
+    (세션별 at.secrets는 비워 둠), Runtime은 마지막으로 만들어진 것을 계속 쓰게 한다.
+    스크립트 컴파일(ast.parse)도 여러 스레드에서 동시에 하면 깨지므로 한 번만 한다.
+    """
+    import streamlit as st
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.secrets import Secrets
+    
+    shared_secrets = Secrets()
+    shared_secrets._secrets = secrets
+    st.secrets = shared_secrets
+    
+    last_runtime = {}
+    
+    def instance(cls):
+        if cls._instance is not None:
+            last_runtime["runtime"] = cls._instance
+            return cls._instance
+        if "runtime" in last_runtime:
+            return last_runtime["runtime"]
+        raise RuntimeError("Runtime hasn't been created!")
+    
+    def exists(cls):
+        return cls._instance is not None or "runtime" in last_runtime
+    
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+    
+    compiled = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+    
+    def get_shared_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+    
+    ScriptCache.get_bytecode = get_shared_bytecode
+
+
+def click(at, label=None, key=None):
+    button = next(b for b in at.button if (key is not None and b.key == key) or (label is not None and b.label == label))
+    return button.click().run()
+
+
+def run_session(session_id, args, recorder):
+    from streamlit.testing.v1 import AppTest
+    
+    rng = random.Random(args.seed + session_id)
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    
+    recorder.timed("open", at.run)
+    mode_label = rng.choice(["🎨 UX 모드 선택", "🔍 SEO/GEO 모드 선택"])
+    recorder.timed("select_mode", lambda: click(at, label=mode_label))
+    
+    for _ in range(args.conversions):
+        recorder.timed("convert", lambda: at.chat_input[0].set_value(rng.choice(PHRASES)).run())
+        index = at.session_state.messages[-1]["id"]
+        recorder.timed("rerun", at.run)
+        
+        if f"like_{index}" not in [b.key for b in at.button]:
+            continue
+        if rng.random() < args.dislike_rate:
+            recorder.timed("dislike", lambda: click(at, key=f"dislike_{index}"))
+            at.selectbox(key=f"reason_{index}").select("너무 길어요")
+            recorder.timed("dislike_submit", lambda: click(at, key=f"submit_{index}"))
+        else:
+            recorder.timed("like", lambda: click(at, key=f"like_{index}"))
+    
+    if at.exception:
+        raise RuntimeError(f"세션 {session_id} 오류: {at.exception}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5, help="동시 세션 수")
+    parser.add_argument("--conversions", type=int, default=3, help="세션당 변환 횟수")
+    parser.add_argument("--latency", type=float, default=0.5, help="가짜 Gemini 응답 시간 (초)")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="스트리밍 첫 조각까지의 시간 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 오류 주입 비율 (0~1)")
+    parser.add_argument("--sheet-latency", type=float, default=0.2, help="가짜 Sheets 호출당 지연 (초)")
+    parser.add_argument("--dislike-rate", type=float, default=0.3, help="싫어요를 누를 비율 (0~1)")
+    parser.add_argument("--rpm", type=int, default=1000, help="리미터에 설정할 분당 요청 수")
+    parser.add_argument("--timeout", type=float, default=120, help="rerun 하나의 제한 시간 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON Lines로 출력")
+    args = parser.parse_args(argv)
+    
+    gemini = FakeGemini(
+        latency=args.latency,
+        first_token_latency=args.first_token_latency,
+        error_rate=args.error_rate,
+        seed=args.seed
+    ).install()
+    sheets = FakeSheets(latency=args.sheet_latency).install()
+    recorder = Recorder(gemini, sheets)
+    
+    workdir = tempfile.mkdtemp(prefix="sidiz-bench-")
+    secrets = {
+        "gemini": {"api_key": "fake", "rpm": args.rpm, "tpm": 100_000_000},
+        "gcp_service_account": {"type": "service_account"},
+        "feedback_sheet_url": "https://docs.google.com/spreadsheets/d/fake",
+        "feedback_db_path": os.path.join(workdir, "feedback.sqlite3"),
+    }
+    
+    prepare_concurrent_apptest(secrets)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        futures = [pool.submit(run_session, session_id, args, recorder) for session_id in range(args.sessions)]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+    elapsed = time.perf_counter() - started
+    
+    rows = recorder.report()
+    totals = {
+        "sessions": args.sessions,
+        "wall_time_s": round(elapsed, 2),
+        "gemini_calls": dict(gemini.calls),
+        "sheets_calls": dict(sheets.calls + sheets.worksheet.calls),
+        "session_errors": [str(error) for error in errors],
+    }
+    
+    if args.json:
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        print(json.dumps({"totals": totals}, ensure_ascii=False))
+        return
+    
+    header = f"{'action':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'gemini/act':>12}{'sheets/act':>12}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['action']:<16}{row['count']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['mean_ms']:>10}"
+            f"{row['gemini_calls_per_action']:>12}{row['sheets_calls_per_action']:>12}"
+        )
+    print()
+    for key, value in totals.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""여러 앱 인스턴스(replica) 시뮬레이션 - 공유 상태 서버 사용 여부에 따른 할당량/캐시 비교
+
+한 프로세스 안에 서비스를 replica 수만큼 만들고(각자 피드백 저장소 사용), 세션 스레드들이
+같은 문구 목록을 변환한다. 공유 상태를 쓰면 로컬 공유 상태 서버를 띄워 모두 접속시킨다.
+Gemini 호출 수, 가장 바빴던 60초 구간의 호출 수(rpm 한도와 비교), 한 replica에 저장한
+부정 피드백이 다른 replica의 예시로 쓰이기까지 걸린 시간을 출력한다.
+
+    python -m bench.replicas --replicas 3 --sessions 4
+    python -m bench.replicas --replicas 3 --sessions 4 --no-shared
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fakes import FakeGemini
+from bench.load_test import PHRASES, percentile
+
+
+def busiest_window(times, seconds=60.0):
+    """times 중 어떤 seconds초 구간에 들어간 최대 호출 수"""
+    ordered = sorted(times)
+    best = start = 0
+    for end, moment in enumerate(ordered):
+        while moment - ordered[start] >= seconds:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=3, help="앱 인스턴스 수")
+    parser.add_argument("--sessions", type=int, default=4, help="인스턴스당 동시 세션 수")
+    parser.add_argument("--conversions", type=int, default=6, help="세션당 변환 횟수")
+    parser.add_argument("--rpm", type=int, default=30, help="API 키의 분당 요청 한도")
+    parser.add_argument("--latency", type=float, default=0.2, help="가짜 Gemini 응답 시간 (초)")
+    parser.add_argument("--no-shared", action="store_true", help="공유 상태 없이 인스턴스별 상태만 사용")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args(argv)
+    
+    gemini = FakeGemini(latency=args.latency, seed=args.seed).install()
+    
+    from sidiz.negative_feedback import SHARED_PULL_INTERVAL
+    from sidiz.service import build_service
+    from sidiz.shared_state import serve_shared_state
+    
+    shared_url = None
+    shared_token = "bench-token"
+    if not args.no_shared:
+        server, _ = serve_shared_state(0, shared_token)
+        shared_url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    workdir = tempfile.mkdtemp(prefix="sidiz-replicas-")
+    services = [
+        build_service({
+            "gemini": {"api_key": "fake", "rpm": args.rpm, "tpm": 100_000_000, "stream": False},
+            "feedback_db_path": os.path.join(workdir, f"feedback-{index}.sqlite3"),
+            "prefetch_examples": False,
+            "shared_state_url": shared_url,
+            "shared_state_token": shared_token,
+        })
+        for index in range(args.replicas)
+    ]
+    
+    latencies = []
+    
+    def run_session(replica, session):
+        rng = random.Random(args.seed * 1000 + replica * 100 + session)
+        for _ in range(args.conversions):
+            started = time.perf_counter()
+            services[replica].convert(rng.choice(["UX", "SEO/GEO"]), rng.choice(PHRASES))
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.replicas * args.sessions) as pool:
+        futures = [
+            pool.submit(run_session, replica, session)
+            for replica in range(args.replicas)
+            for session in range(args.sessions)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+    
+    # replica 0에 저장한 부정 피드백이 다른 replica의 예시로 쓰이는지 (공유 목록은 백그라운드에서 주기적으로 가져옴)
+    services[0].save_feedback("편안한 의자", "너무 과장된 문구", 0, "UX", "과장된 표현")
+    saved_at = time.perf_counter()
+    deadline = saved_at + (0 if args.no_shared else 3 * SHARED_PULL_INTERVAL)
+    while True:
+        negative_shared = all(
+            any(record.get("변환된 문구") == "너무 과장된 문구" for record in service.select_examples(["UX"], "편안한 의자"))
+            for service in services[1:]
+        )
+        if negative_shared or time.perf_counter() > deadline:
+            break
+        time.sleep(0.05)
+    negative_propagation = time.perf_counter() - saved_at
+    
+    result = {
+        "shared_state": not args.no_shared,
+        "replicas": args.replicas,
+        "conversions": len(latencies),
+        "distinct_inputs": len(PHRASES) * 2,
+        "gemini_calls": gemini.calls["generate_content"],
+        "busiest_60s_calls": busiest_window(gemini.call_times),
+        "rpm_limit": args.rpm,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "wall_time_s": round(elapsed, 2),
+        "negative_feedback_visible_on_other_replicas": negative_shared,
+        "negative_feedback_propagation_s": round(negative_propagation, 2) if negative_shared else None,
+    }
+    
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""시디즈 UX 라이팅 가이드 - 프로세스 전체에서 공유하는 구성 요소"""
@@ -0,0 +1,241 @@
+"""변환 HTTP API - Streamlit UI 없이 CMS 등에서 직접 호출
+
+    POST /convert        {"mode": "UX", "text": "...", "force_refresh": false}
+    POST /convert/batch  {"mode": "UX", "texts": ["...", "..."]}
+    POST /compare        {"modes": ["UX", "SEO/GEO"], "text": "..."}
+    POST /feedback       {"mode": "UX", "original": "...", "converted": "...", "feedback": 0,
+                          "reason": "...", "comment": "..."}
+    GET  /feedback/stats
+    GET  /health
+
+모든 요청에 "Authorization: Bearer <api_token>" 헤더가 필요하다 (없거나 틀리면 401).
+기본으로 127.0.0.1에서만 받는다.
+
+단독 실행: python -m sidiz.api --port 8600 (.streamlit/secrets.toml의 api_token 사용)
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from sidiz.metrics import METRICS, classify_error
+from sidiz.service import MODES
+
+MAX_BODY_BYTES = 1024 * 1024  # 요청 본문 최대 크기
+MAX_BATCH_SIZE = 100  # /convert/batch 한 번에 받을 문구 수
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _require_text(body, field):
+    value = body.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise BadRequest(f"{field}: 비어 있지 않은 문자열이 필요합니다")
+    return value
+
+
+def _require_mode(mode):
+    if mode not in MODES:
+        raise BadRequest(f"mode: {', '.join(MODES)} 중 하나여야 합니다")
+    return mode
+
+
+class ConversionAPI:
+    """ConversionService를 감싼 asyncio HTTP 서버
+    
+    요청 파싱/응답은 이벤트 루프에서, 리미터 대기와 모델 호출은 스레드 풀에서 처리한다.
+    UI와 같은 서비스 객체를 쓰므로 모델, 캐시, 리미터를 공유한다.
+    모든 경로가 token 인증을 거친다 (/feedback의 부정 피드백은 모든 세션의 프롬프트에 들어가므로).
+    """
+    
+    def __init__(self, service, token, max_workers=32):
+        if not token:
+            raise ValueError("api_token이 필요합니다 (인증 없이 API를 열지 않음)")
+        self.service = service
+        self._authorization = f"Bearer {token}".encode("utf-8")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self._routes = {
+            ("POST", "/convert"): self.convert,
+            ("POST", "/convert/batch"): self.convert_batch,
+            ("POST", "/compare"): self.compare,
+            ("POST", "/feedback"): self.feedback,
+            ("GET", "/feedback/stats"): self.feedback_stats,
+            ("GET", "/health"): self.health,
+        }
+    
+    async def _run(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+    
+    async def convert(self, body):
+        mode = _require_mode(body.get("mode"))
+        text = _require_text(body, "text")
+        output, cached = await self._run(self.service.convert, mode, text, bool(body.get("force_refresh")))
+        return {"mode": mode, "text": text, "output": output, "cached": cached}
+    
+    async def convert_batch(self, body):
+        mode = _require_mode(body.get("mode"))
+        texts = body.get("texts")
+        if not isinstance(texts, list) or not texts or not all(isinstance(text, str) and text.strip() for text in texts):
+            raise BadRequest("texts: 비어 있지 않은 문자열 목록이 필요합니다")
+        if len(texts) > MAX_BATCH_SIZE:
+            raise BadRequest(f"texts: 한 번에 최대 {MAX_BATCH_SIZE}개까지 변환할 수 있습니다")
+        
+        outputs = await self._run(self.service.convert_many, mode, texts)
+        results = []
+        for text, output in zip(texts, outputs):
+            if isinstance(output, Exception):
+                results.append({"text": text, "error": classify_error(output), "detail": str(output)})
+            else:
+                results.append({"text": text, "output": output})
+        return {"mode": mode, "results": results}
+    
+    async def compare(self, body):
+        modes = body.get("modes", list(MODES))
+        if not isinstance(modes, list) or not modes:
+            raise BadRequest("modes: 모드 목록이 필요합니다")
+        for mode in modes:
+            _require_mode(mode)
+        text = _require_text(body, "text")
+        variants, cached = await self._run(self.service.compare, modes, text, bool(body.get("force_refresh")))
+        return {"text": text, "variants": variants, "cached": cached}
+    
+    async def feedback(self, body):
+        mode = _require_mode(body.get("mode"))
+        feedback = body.get("feedback")
+        if feedback not in (0, 1) or isinstance(feedback, bool):
+            raise BadRequest("feedback: 1(좋아요) 또는 0(싫어요)이어야 합니다")
+        await self._run(
+            self.service.save_feedback,
+            _require_text(body, "original"),
+            _require_text(body, "converted"),
+            feedback,
+            mode,
+            str(body.get("reason", "")),
+            str(body.get("comment", ""))
+        )
+        return {"saved": True}
+    
+    async def feedback_stats(self, body):
+        return await self._run(self.service.feedback_analytics.snapshot)
+    
+    async def health(self, body):
+        return {"status": "ok", "pending_feedback": self.service.feedback_store.pending()}
+    
+    def _authorized(self, headers):
+        return hmac.compare_digest(headers.get("authorization", "").encode("latin-1"), self._authorization)
+    
+    async def handle(self, method, path, headers, raw_body):
+        """요청 하나 처리 - (상태 코드, JSON 응답)"""
+        if not self._authorized(headers):
+            METRICS.increment("api_unauthorized")
+            return 401, {"error": "unauthorized"}
+        route = self._routes.get((method, path))
+        if route is None:
+            known_path = any(route_path == path for _, route_path in self._routes)
+            return (405, {"error": "method not allowed"}) if known_path else (404, {"error": "not found"})
+        
+        with METRICS.span("api_request", path=path) as span:
+            try:
+                body = json.loads(raw_body or b"{}")
+                if not isinstance(body, dict):
+                    raise BadRequest("JSON 객체가 필요합니다")
+                payload = await route(body)
+            except (BadRequest, json.JSONDecodeError, UnicodeDecodeError) as e:
+                span.set(status=400)
+                return 400, {"error": "bad request", "detail": str(e)}
+            except Exception as e:
+                error_class = classify_error(e)
+                span.error = error_class
+                status = 429 if error_class == "429" else 500
+                return status, {"error": error_class, "detail": str(e)}
+        return 200, payload
+    
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, {"error": "payload too large"}
+                    keep_alive = False
+                else:
+                    raw_body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.handle(method, target.split("?", 1)[0], headers, raw_body)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            # 잘못된 요청 줄/헤더, 중간에 끊긴 연결
+            pass
+        finally:
+            writer.close()
+    
+    async def start(self, host="127.0.0.1", port=8600):
+        """리스닝 시작 - asyncio.Server 반환 (port=0이면 빈 포트 사용)"""
+        return await asyncio.start_server(self._serve_connection, host, port)
+    
+    async def serve(self, host="127.0.0.1", port=8600):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def start_api_server(service, port, token, host="127.0.0.1"):
+    """별도 스레드의 이벤트 루프에서 API 서버 시작 (Streamlit 프로세스 안에서 함께 실행할 때)"""
+    api = ConversionAPI(service, token)
+    thread = threading.Thread(
+        target=asyncio.run, args=(api.serve(host, port),), name="conversion-api", daemon=True
+    )
+    thread.start()
+    return api
+
+
+def main():
+    import streamlit as st
+    
+    from sidiz.service import build_service
+    
+    parser = argparse.ArgumentParser(description="시디즈 변환 HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="다른 호스트에서 받으려면 0.0.0.0")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args()
+    
+    # st.secrets는 Streamlit 서버 없이도 .streamlit/secrets.toml을 읽는다
+    token = st.secrets.get("api_token")
+    if not token:
+        parser.error("secrets에 api_token이 필요합니다")
+    api = ConversionAPI(build_service(st.secrets), token)
+    print(f"listening on http://{args.host}:{args.port}")
+    asyncio.run(api.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
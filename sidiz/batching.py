@@ -0,0 +1,80 @@
+import json
+
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+
+def strip_code_fence(text):
+    """```json ... ``` 으로 감싼 응답에서 본문만 추출"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.index("\n") + 1:] if "\n" in text else ""
+    return text
+
+
+def parse_batch_response(text, count):
+    """일괄 변환 응답(JSON 배열)을 {id: 변환 결과}로 검증/분리
+    
+    형식이 잘못된 항목, 범위를 벗어난 id, 빈 결과는 버린다.
+    """
+    items = json.loads(strip_code_fence(text))
+    if not isinstance(items, list):
+        raise ValueError("JSON 배열이 아닙니다")
+    
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index, output = item.get("id"), item.get("output")
+        if isinstance(index, bool) or not isinstance(index, int) or not 0 <= index < count:
+            continue
+        if not isinstance(output, str) or not output.strip() or index in results:
+            continue
+        results[index] = output.strip()
+    return results
+
+
+def convert_batch(mode, phrases, negative_feedback, build_prompt, generate_json, convert_one):
+    """여러 문구를 한 번의 요청으로 변환하고 phrases 순서대로 결과 반환
+    
+    build_prompt(mode, phrases, negative_feedback)는 일괄 변환 프롬프트(PromptBuilder.batch)를,
+    generate_json(prompt)는 모델 응답 텍스트를 반환한다. 응답 파싱에 실패하거나
+    빠진 항목만 convert_one(mode, phrase)로 개별 변환한다. 요청 자체가 실패하면
+    (할당량 초과 등) 개별 호출로 늘리지 않고 모든 항목에 같은 예외를 돌려준다.
+    실패한 항목 자리에는 예외 객체가 들어간다.
+    """
+    prompt = build_prompt(mode, phrases, negative_feedback)
+    try:
+        text = generate_json(prompt)
+    except Exception as e:
+        return [e] * len(phrases)
+    
+    try:
+        parsed = parse_batch_response(text, len(phrases))
+    except ValueError:
+        # json.JSONDecodeError 포함
+        parsed = {}
+    
+    results = []
+    for index, phrase in enumerate(phrases):
+        if index in parsed:
+            results.append(parsed[index])
+            continue
+        try:
+            results.append(convert_one(mode, phrase))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def parse_compare_response(text, modes):
+    """모드 비교 응답(JSON 객체)에서 모드별 변환 결과 추출 - 빠진 모드는 제외"""
+    data = json.loads(strip_code_fence(text))
+    if not isinstance(data, dict):
+        raise ValueError("JSON 객체가 아닙니다")
+    
+    return {
+        mode: data[mode].strip()
+        for mode in modes
+        if isinstance(data.get(mode), str) and data[mode].strip()
+    }
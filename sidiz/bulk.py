@@ -0,0 +1,134 @@
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+PHRASE_COLUMNS = ("원본 문구", "문구", "phrase", "text")
+
+
+def read_phrases(file_name, data):
+    """업로드 파일(CSV/XLSX)에서 변환할 문구 목록 읽기
+    
+    '원본 문구'/'문구' 열이 있으면 그 열을, 없으면 첫 번째 열을 사용한다.
+    """
+    if file_name.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        rows = [
+            ["" if value is None else str(value) for value in row]
+            for row in workbook.active.iter_rows(values_only=True)
+        ]
+    else:
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+    
+    rows = [row for row in rows if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    
+    header = [cell.strip() for cell in rows[0]]
+    column = next((header.index(name) for name in PHRASE_COLUMNS if name in header), None)
+    if column is None:
+        column, body = 0, rows  # 헤더 없는 파일
+    else:
+        body = rows[1:]
+    
+    return [row[column].strip() for row in body if len(row) > column and row[column].strip()]
+
+
+class BulkJob:
+    """일괄 변환 작업
+    
+    완료된 결과를 (문구 번호, 모드)별로 보관하므로, 실패한 항목이 있어도
+    run()을 다시 호출하면 남은 항목만 이어서 변환한다.
+    """
+    
+    def __init__(self, phrases, modes):
+        self.phrases = phrases
+        self.modes = modes
+        self.results = {}  # (문구 번호, 모드) -> 변환 결과
+        self.errors = {}  # (문구 번호, 모드) -> 오류 메시지
+    
+    @property
+    def total(self):
+        return len(self.phrases) * len(self.modes)
+    
+    @property
+    def done(self):
+        return len(self.results)
+    
+    def pending(self):
+        return [
+            (index, mode)
+            for index in range(len(self.phrases))
+            for mode in self.modes
+            if (index, mode) not in self.results
+        ]
+    
+    def run(self, convert, max_workers=4, on_progress=None):
+        """convert(mode, phrase)를 동시에 최대 max_workers개까지 실행
+        
+        on_progress(job)는 항목이 하나 끝날 때마다 호출한 스레드에서 실행된다.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(convert, mode, self.phrases[index]): (index, mode)
+                for index, mode in self.pending()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    self.results[key] = future.result()
+                    self.errors.pop(key, None)
+                except Exception as e:
+                    self.errors[key] = f"{type(e).__name__}: {e}"
+                if on_progress is not None:
+                    on_progress(self)
+        return self
+    
+    def run_batched(self, convert_batch, batch_size=10, max_workers=2, on_progress=None):
+        """남은 항목을 모드별로 batch_size개씩 묶어 convert_batch(mode, phrases)로 변환
+        
+        convert_batch는 phrases 순서대로 결과를 돌려주며, 실패한 항목 자리에는 예외 객체가 온다.
+        """
+        batches = []
+        for mode in self.modes:
+            indexes = [index for index, pending_mode in self.pending() if pending_mode == mode]
+            for start in range(0, len(indexes), batch_size):
+                batches.append((mode, indexes[start:start + batch_size]))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(convert_batch, mode, [self.phrases[index] for index in indexes]): (mode, indexes)
+                for mode, indexes in batches
+            }
+            for future in as_completed(futures):
+                mode, indexes = futures[future]
+                try:
+                    outputs = future.result()
+                except Exception as e:
+                    outputs = [e] * len(indexes)
+                for index, output in zip(indexes, outputs):
+                    if isinstance(output, Exception):
+                        self.errors[(index, mode)] = f"{type(output).__name__}: {output}"
+                    else:
+                        self.results[(index, mode)] = output
+                        self.errors.pop((index, mode), None)
+                if on_progress is not None:
+                    on_progress(self)
+        return self
+    
+    def iter_rows(self):
+        yield ["원본 문구"] + [f"{mode} 변환" for mode in self.modes]
+        for index, phrase in enumerate(self.phrases):
+            yield [phrase] + [self.results.get((index, mode), "") for mode in self.modes]
+    
+    def write_csv(self, fileobj):
+        writer = csv.writer(fileobj)
+        for row in self.iter_rows():
+            writer.writerow(row)
+    
+    def to_csv(self):
+        """다운로드용 CSV (엑셀에서 한글이 깨지지 않도록 BOM 포함)"""
+        buffer = io.StringIO()
+        self.write_csv(buffer)
+        return buffer.getvalue().encode("utf-8-sig")
@@ -0,0 +1,67 @@
+import threading
+from collections import Counter
+
+from sidiz.metrics import METRICS
+
+LIKE, DISLIKE = 1, 0
+
+
+class FeedbackAnalytics:
+    """모든 세션이 공유하는 피드백 통계 (모드/싫어요 사유/날짜/프롬프트 버전별 👍·👎 수)
+    
+    NegativeFeedbackCache처럼 로컬 피드백 저장소에서 마지막으로 읽은 id 이후의 행만 가져와
+    누적 집계에 더한다. 저장소가 GROUP BY로 묶어 주므로 새 행이 많아도 조합 수만큼만 읽고,
+    시트에서 가져온 행(다른 인스턴스, 직접 입력)도 저장소에 들어오는 대로 반영된다.
+    화면을 그릴 때 시트를 읽지 않는다.
+    """
+    
+    def __init__(self, store):
+        self._store = store
+        self._last_id = 0  # 지금까지 집계에 넣은 마지막 피드백 id
+        self._lock = threading.Lock()
+        self.by_mode = Counter()  # (모드, 피드백값) -> 개수
+        self.by_reason = Counter()  # 싫어요 사유 -> 개수
+        self.by_day = Counter()  # (YYYY-MM-DD, 피드백값) -> 개수
+        self.by_prompt_version = Counter()  # (프롬프트 버전, 피드백값) -> 개수
+    
+    def refresh(self):
+        """새로 저장된 피드백만 읽어 집계 갱신"""
+        with self._lock:
+            with METRICS.span("feedback_analytics_refresh") as span:
+                self._last_id, rows = self._store.rollup(after_id=self._last_id)
+                span.set(groups=len(rows))
+            for mode, feedback, reason, day, prompt_version, count in rows:
+                self.by_mode[mode, feedback] += count
+                self.by_day[day, feedback] += count
+                self.by_prompt_version[prompt_version, feedback] += count
+                if feedback == DISLIKE:
+                    self.by_reason[reason] += count
+    
+    @staticmethod
+    def _split(counter):
+        # {(키, 피드백값): 개수} -> {키: {"like": n, "dislike": n}}
+        table = {}
+        for (key, feedback), count in counter.items():
+            entry = table.setdefault(key, {"like": 0, "dislike": 0})
+            entry["like" if feedback == LIKE else "dislike"] += count
+        return table
+    
+    def snapshot(self, days=7):
+        """현재 집계 (JSON으로 보낼 수 있는 dict) - 날짜별은 최근 days일만"""
+        self.refresh()
+        with self._lock:
+            by_mode = self._split(self.by_mode)
+            by_day = self._split(self.by_day)
+            by_prompt_version = self._split(self.by_prompt_version)
+            by_reason = dict(self.by_reason.most_common())
+        likes = sum(entry["like"] for entry in by_mode.values())
+        dislikes = sum(entry["dislike"] for entry in by_mode.values())
+        return {
+            "likes": likes,
+            "dislikes": dislikes,
+            "satisfaction": likes / (likes + dislikes) if likes + dislikes else None,
+            "by_mode": by_mode,
+            "by_reason": by_reason,
+            "by_day": dict(sorted(by_day.items())[-days:]),
+            "by_prompt_version": by_prompt_version,
+        }
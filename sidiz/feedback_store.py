@@ -0,0 +1,158 @@
+import hashlib
+import json
+import sqlite3
+import threading
+
+from sidiz.negative_feedback import FEEDBACK_HEADER
+
+COLUMNS = ("created_at", "mode", "original", "converted", "label", "feedback", "reason", "comment")
+
+
+def normalize_row(row):
+    """시트/앱 행을 저장소 형식으로 정리 (빈 칸 채움, 피드백값은 정수)"""
+    row = list(row)[:len(COLUMNS)]
+    row += [""] * (len(COLUMNS) - len(row))
+    values = [str(value) for value in row]
+    try:
+        values[5] = int(str(row[5]).strip())
+    except ValueError:
+        values[5] = None
+    return values
+
+
+def fingerprint(values):
+    """시트에서 다시 읽은 행이 이 저장소에서 올린 행인지 알아보는 행 해시 (같은 내용의 행은 같은 값)"""
+    raw = json.dumps(values, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def to_record(values):
+    """저장소 행을 시트 헤더 기준 레코드로 변환"""
+    record = dict(zip(FEEDBACK_HEADER, values))
+    record["피드백값"] = "" if values[5] is None else str(values[5])
+    return record
+
+
+class FeedbackStore:
+    """피드백의 원본 저장소 (SQLite, WAL)
+    
+    모든 읽기/쓰기는 로컬 파일에서 끝난다. 시트와의 동기화는 FeedbackSync가 맡고,
+    synced 열은 시트에 기록되었는지(또는 시트에서 가져왔는지)를 나타낸다.
+    prompt_version은 저장소에만 있는 열이다 (시트에서 가져온 행은 빈 값).
+    
+    같은 내용의 피드백도 모두 따로 저장한다 (여러 세션이 같은 캐시 결과에 같은 피드백을 남길 수 있음).
+    시트에서 다시 읽은 행은 unconfirmed 행(여기서 시트에 올렸지만 아직 되읽지 않은 행)과
+    내용이 같으면 그 행 하나와 짝지어 건너뛰고, 나머지는 새 행으로 가져온다.
+    """
+    
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS feedback ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "created_at TEXT NOT NULL, mode TEXT NOT NULL, original TEXT NOT NULL, converted TEXT NOT NULL, "
+            "label TEXT NOT NULL, feedback INTEGER, reason TEXT NOT NULL, comment TEXT NOT NULL, "
+            "synced INTEGER NOT NULL DEFAULT 0, fingerprint TEXT NOT NULL, "
+            "unconfirmed INTEGER NOT NULL DEFAULT 0, prompt_version TEXT NOT NULL DEFAULT '');"
+            "CREATE INDEX IF NOT EXISTS feedback_mode ON feedback (mode);"
+            "CREATE INDEX IF NOT EXISTS feedback_value ON feedback (feedback);"
+            "CREATE INDEX IF NOT EXISTS feedback_created_at ON feedback (created_at);"
+            "CREATE INDEX IF NOT EXISTS feedback_unsynced ON feedback (synced) WHERE synced = 0;"
+            "CREATE INDEX IF NOT EXISTS feedback_unconfirmed ON feedback (fingerprint) WHERE unconfirmed = 1;"
+            "CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+        )
+        self._db.commit()
+    
+    def add(self, row, prompt_version=""):
+        """앱에서 받은 피드백 저장 - 시트 기록 전 상태(synced=0)로 들어간다 (같은 내용이어도 항상 새 행)"""
+        values = normalize_row(row)
+        with self._lock:
+            self._db.execute(
+                f"INSERT INTO feedback ({', '.join(COLUMNS)}, synced, fingerprint, prompt_version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (*values, fingerprint(values), prompt_version)
+            )
+            self._db.commit()
+    
+    def import_rows(self, rows):
+        """시트에서 읽은 행 저장 - 새로 저장한 개수 반환
+        
+        여기서 올린 행이 되돌아온 것이면(같은 내용의 unconfirmed 행이 있으면) 그 행을 확인 처리하고 건너뛴다.
+        """
+        imported = 0
+        with self._lock:
+            for row in rows:
+                if not any(str(value).strip() for value in row):
+                    continue
+                values = normalize_row(row)
+                row_fingerprint = fingerprint(values)
+                own = self._db.execute(
+                    "SELECT id FROM feedback WHERE fingerprint = ? AND unconfirmed = 1 ORDER BY id LIMIT 1",
+                    (row_fingerprint,)
+                ).fetchone()
+                if own is not None:
+                    self._db.execute("UPDATE feedback SET unconfirmed = 0 WHERE id = ?", own)
+                    continue
+                self._db.execute(
+                    f"INSERT INTO feedback ({', '.join(COLUMNS)}, synced, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?)",
+                    (*values, row_fingerprint)
+                )
+                imported += 1
+            self._db.commit()
+        return imported
+    
+    def unsynced(self, limit):
+        """시트에 아직 기록되지 않은 행 [(id, 시트 행)]"""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, {', '.join(COLUMNS)} FROM feedback WHERE synced = 0 ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row[0], list(row[1:])) for row in rows]
+    
+    def mark_synced(self, ids):
+        with self._lock:
+            self._db.executemany(
+                "UPDATE feedback SET synced = 1, unconfirmed = 1 WHERE id = ?", [(row_id,) for row_id in ids]
+            )
+            self._db.commit()
+    
+    def pending(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM feedback WHERE synced = 0").fetchone()[0]
+    
+    def negatives(self, after_id=0):
+        """after_id 이후에 저장된 부정 피드백 [(id, 레코드)]"""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, {', '.join(COLUMNS)} FROM feedback WHERE feedback = 0 AND id > ? ORDER BY id",
+                (after_id,)
+            ).fetchall()
+        return [(row[0], to_record(list(row[1:]))) for row in rows]
+    
+    def rollup(self, after_id=0):
+        """after_id 이후 행의 집계 - (마지막 id, [(모드, 피드백값, 사유, 날짜, 프롬프트 버전, 개수)])
+        
+        GROUP BY로 묶어서 돌려주므로 행이 많아도 결과는 조합 수만큼만 작다.
+        """
+        with self._lock:
+            last_id = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM feedback").fetchone()[0]
+            rows = self._db.execute(
+                "SELECT mode, feedback, reason, substr(created_at, 1, 10), prompt_version, COUNT(*) "
+                "FROM feedback WHERE id > ? AND id <= ? AND feedback IN (0, 1) "
+                "GROUP BY mode, feedback, reason, substr(created_at, 1, 10), prompt_version",
+                (after_id, last_id)
+            ).fetchall()
+        return max(last_id, after_id), rows
+    
+    def get_state(self, key, default=0):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+    
+    def set_state(self, key, value):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+            self._db.commit()
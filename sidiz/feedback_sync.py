@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+
+from sidiz.metrics import METRICS
+from sidiz.negative_feedback import FEEDBACK_HEADER, LAST_COLUMN
+
+SHEET_ROWS_KEY = "sheet_rows"  # 시트에서 지금까지 읽은 마지막 행 번호 (헤더 포함)
+
+
+class FeedbackSync:
+    """로컬 피드백 저장소와 시트를 백그라운드에서 양방향 동기화
+    
+    push: 시트에 아직 없는 로컬 행을 append_rows로 묶어서 기록한다.
+    pull: 마지막으로 읽은 행 이후 시트에 추가된 행(다른 인스턴스, 직접 입력)을 저장소로 가져온다.
+    앱은 저장소만 읽고 쓰므로 시트가 느리거나 끊겨도 영향을 받지 않는다.
+    실패하면 지수 백오프로 다시 시도한다.
+    """
+    
+    def __init__(self, store, open_sheet, batch_size=50, push_interval=2.0,
+                 pull_interval=5 * 60, max_backoff=5 * 60):
+        self._store = store
+        self._open_sheet = open_sheet  # 워크시트를 반환하는 함수 (연동 불가 시 None)
+        self.batch_size = batch_size
+        self.push_interval = push_interval
+        self.pull_interval = pull_interval
+        self.max_backoff = max_backoff
+        self._header_checked = False
+        self._failures = 0
+        self._pulled_at = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="feedback-sync", daemon=True)
+        self._worker.start()
+    
+    def notify(self):
+        """새 피드백이 저장되었음을 알림 (네트워크 I/O 없음)"""
+        self._wakeup.set()
+    
+    def pending(self):
+        return self._store.pending()
+    
+    def stop(self, timeout=5.0):
+        """백그라운드 동기화 중지 - 진행 중인 push/pull은 마치고 멈춤 (못 올린 행은 저장소에 남음)"""
+        self._stopped.set()
+        self._wakeup.set()
+        self._worker.join(timeout)
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=self.push_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                while self.push() == self.batch_size:
+                    pass
+                if self._pulled_at is None or time.monotonic() - self._pulled_at >= self.pull_interval:
+                    self.pull()
+                self._failures = 0
+            except Exception:
+                # 행은 저장소에 남아 있으므로 백오프 후 재시도
+                self._failures += 1
+                self._stopped.wait(self._backoff())
+    
+    def _backoff(self):
+        delay = min(self.max_backoff, self.push_interval * 2 ** self._failures)
+        return delay * random.uniform(0.5, 1.0)
+    
+    def _sheet(self):
+        sheet = self._open_sheet()
+        if sheet is None:
+            raise RuntimeError("Google Sheets 연동 안됨")
+        
+        # 헤더 확인은 프로세스당 한 번만
+        if not self._header_checked:
+            if sheet.row_count == 0 or sheet.cell(1, 1).value != FEEDBACK_HEADER[0]:
+                sheet.insert_row(FEEDBACK_HEADER, 1)
+            self._header_checked = True
+        return sheet
+    
+    def push(self):
+        """시트에 아직 없는 행을 최대 batch_size개 기록하고 기록한 개수 반환"""
+        batch = self._store.unsynced(self.batch_size)
+        if not batch:
+            return 0
+        
+        with METRICS.span("feedback_flush") as span:
+            span.set(rows=len(batch))
+            self._sheet().append_rows([row for _, row in batch])
+        self._store.mark_synced([row_id for row_id, _ in batch])
+        return len(batch)
+    
+    def pull(self):
+        """시트에 새로 추가된 행만 읽어 저장소에 반영 (이미 있는 행은 건너뜀)"""
+        sheet = self._sheet()
+        start = max(self._store.get_state(SHEET_ROWS_KEY, 1), 1) + 1
+        with METRICS.span("feedback_pull") as span:
+            rows = sheet.get_values(f"A{start}:{LAST_COLUMN}")
+            span.set(rows=len(rows), imported=self._store.import_rows(rows))
+        self._store.set_state(SHEET_ROWS_KEY, start - 1 + len(rows))
+        self._pulled_at = time.monotonic()
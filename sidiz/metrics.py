@@ -0,0 +1,208 @@
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def classify_error(exc):
+    """오류 분류 - 429(할당량) / 400(잘못된 요청) / 5xx(서버) / 그 외는 예외 클래스 이름"""
+    error_str = str(exc)
+    if "429" in error_str or "quota" in error_str.lower():
+        return "429"
+    if "400" in error_str or "invalid" in error_str.lower():
+        return "400"
+    if "500" in error_str or "503" in error_str:
+        return "5xx"
+    return type(exc).__name__
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Span:
+    """측정 중인 구간 - set()으로 토큰 수 등 숫자 속성을 남긴다"""
+    
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.attributes = {}
+        self.error = None
+    
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+    
+    def record_usage(self, usage_metadata):
+        """response.usage_metadata의 토큰 수 기록"""
+        if usage_metadata is None:
+            return
+        self.set(
+            prompt_tokens=getattr(usage_metadata, "prompt_token_count", 0) or 0,
+            output_tokens=getattr(usage_metadata, "candidates_token_count", 0) or 0
+        )
+
+
+class Metrics:
+    """프로세스 전체에서 공유하는 구간 지표
+    
+    구간별 소요 시간 히스토그램, 오류 분류별 횟수, 숫자 속성 합계(토큰 수 등),
+    카운터(캐시 적중 등)를 모으고 Prometheus 텍스트나 JSON Lines로 내보낸다.
+    """
+    
+    def __init__(self, recent=1000):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (구간, 라벨) -> [버킷별 횟수, 합계, 횟수]
+        self._errors = Counter()  # (구간, 라벨, 오류 분류) -> 횟수
+        self._attributes = Counter()  # (구간, 라벨, 속성) -> 합계
+        self._counters = Counter()  # (이름, 라벨) -> 값
+        self._recent = deque(maxlen=recent)  # 최근 구간 기록 (JSON Lines용)
+    
+    @contextmanager
+    def span(self, name, **labels):
+        span = Span(name, labels)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.error = classify_error(e)
+            raise
+        finally:
+            self.observe(span, time.perf_counter() - started)
+    
+    def observe(self, span, seconds):
+        key = (span.name, _label_key(span.labels))
+        with self._lock:
+            histogram = self._histograms.setdefault(key, [[0] * len(DURATION_BUCKETS), 0.0, 0])
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            if span.error is not None:
+                self._errors[key + (span.error,)] += 1
+            for attribute, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._attributes[key + (attribute,)] += value
+            self._recent.append({
+                "ts": time.time(),
+                "span": span.name,
+                **span.labels,
+                "seconds": round(seconds, 6),
+                "error": span.error,
+                **span.attributes,
+            })
+    
+    def increment(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += amount
+    
+    def snapshot(self):
+        """구간별 요약 (횟수, 평균/합계 시간, 오류, 속성 합계)"""
+        with self._lock:
+            summary = []
+            for (name, labels), (_, total, count) in sorted(self._histograms.items()):
+                summary.append({
+                    "span": name,
+                    "labels": dict(labels),
+                    "count": count,
+                    "total_seconds": round(total, 6),
+                    "mean_seconds": round(total / count, 6) if count else 0.0,
+                    "errors": {
+                        error: value for (span_name, span_labels, error), value in self._errors.items()
+                        if (span_name, span_labels) == (name, labels)
+                    },
+                    "attributes": {
+                        attribute: value for (span_name, span_labels, attribute), value in self._attributes.items()
+                        if (span_name, span_labels) == (name, labels)
+                    },
+                })
+            counters = [
+                {"counter": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return summary, counters
+    
+    def prometheus_text(self):
+        lines = ["# TYPE sidiz_span_seconds histogram"]
+        with self._lock:
+            for (name, labels), (buckets, total, count) in sorted(self._histograms.items()):
+                base = (("span", name),) + labels
+                for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f"sidiz_span_seconds_bucket{_format_labels(base + (('le', str(bound)),))} {bucket_count}")
+                lines.append(f"sidiz_span_seconds_bucket{_format_labels(base + (('le', '+Inf'),))} {count}")
+                lines.append(f"sidiz_span_seconds_sum{_format_labels(base)} {total}")
+                lines.append(f"sidiz_span_seconds_count{_format_labels(base)} {count}")
+            
+            lines.append("# TYPE sidiz_span_errors_total counter")
+            for (name, labels, error), value in sorted(self._errors.items()):
+                lines.append(f"sidiz_span_errors_total{_format_labels((('span', name),) + labels + (('error', error),))} {value}")
+            
+            lines.append("# TYPE sidiz_span_attribute_total counter")
+            for (name, labels, attribute), value in sorted(self._attributes.items()):
+                pairs = (("span", name),) + labels + (("attribute", attribute),)
+                lines.append(f"sidiz_span_attribute_total{_format_labels(pairs)} {value}")
+            
+            declared = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in declared:
+                    lines.append(f"# TYPE sidiz_{name}_total counter")
+                    declared.add(name)
+                lines.append(f"sidiz_{name}_total{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+    
+    def json_lines(self):
+        """요약 + 카운터 + 최근 구간 기록을 한 줄에 하나씩"""
+        summary, counters = self.snapshot()
+        with self._lock:
+            recent = list(self._recent)
+        records = [{"type": "summary", **row} for row in summary]
+        records += [{"type": "counter", **row} for row in counters]
+        records += [{"type": "span", **row} for row in recent]
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+METRICS = Metrics()
+
+
+def serve_metrics(port, metrics=METRICS, host="127.0.0.1"):
+    """/metrics(Prometheus 텍스트)와 /metrics.jsonl을 제공하는 HTTP 서버를 백그라운드로 시작
+    
+    기본은 127.0.0.1에서만 받는다. 다른 호스트의 Prometheus가 긁어가야 하면 host를 지정한다.
+    """
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = metrics.prometheus_text(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.jsonl":
+                body, content_type = metrics.json_lines(), "application/jsonl"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
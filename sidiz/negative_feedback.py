@@ -0,0 +1,114 @@
+import threading
+
+from sidiz.metrics import METRICS
+from sidiz.negative_index import NegativeExampleIndex
+
+FEEDBACK_HEADER = ["시간", "모드", "원본 문구", "변환된 문구", "피드백", "피드백값", "싫어요 사유", "코멘트"]
+LAST_COLUMN = "H"
+SHARED_LOG_KEY = "negative_feedback"  # 공유 상태에서 부정 피드백 목록 키
+SHARED_LOG_LIMIT = 1000  # 공유 목록에 남겨 둘 부정 피드백 수
+SHARED_PULL_INTERVAL = 2.0  # 공유 목록에서 다른 인스턴스의 부정 피드백을 가져오는 주기 (초)
+
+
+def render_negative_block(records):
+    """부정 피드백 레코드를 프롬프트용 블록으로 변환"""
+    if not records:
+        return ""
+    
+    negative_examples = ""
+    for row in records:
+        negative_examples += f"""
+원본: "{row.get('원본 문구', '')}"
+나쁜 변환: "{row.get('변환된 문구', '')}" 
+사유: {row.get('싫어요 사유', 'N/A')}
+코멘트: {row.get('코멘트', 'N/A')}
+← 이런 스타일 절대 피하기
+"""
+    
+    return f"""
+[사용자가 싫어한 변환 스타일 - 절대 사용 금지]
+{negative_examples}
+"""
+
+
+class NegativeFeedbackCache:
+    """모든 세션이 공유하는 부정 피드백 예시 캐시 (중복 제거된 예시 색인)
+    
+    로컬 피드백 저장소에서 마지막으로 읽은 id 이후의 부정 피드백만 가져와 색인에 더한다.
+    저장소 조회는 로컬 SQLite 쿼리라 select()마다 새 행을 확인해도 네트워크 I/O가 없다.
+    shared(공유 상태)가 있으면 다른 인스턴스가 publish()한 부정 피드백을 백그라운드 스레드가
+    shared_interval마다 가져와 색인에 더하므로, 페이지 로드와 select()는 공유 상태 서버를 기다리지 않는다
+    (같은 피드백이 저장소와 공유 목록에서 두 번 들어와도 색인이 중복을 걸러냄).
+    """
+    
+    def __init__(self, store, capacity=500, shared=None, shared_interval=SHARED_PULL_INTERVAL):
+        self._store = store
+        self._shared = shared
+        self.shared_interval = shared_interval
+        self._last_id = 0  # 지금까지 색인에 넣은 마지막 피드백 id
+        self._shared_sequence = 0  # 공유 목록에서 마지막으로 읽은 순번
+        self._shared_epoch = None  # 그 순번을 매긴 공유 상태 서버의 epoch
+        self._refresh_lock = threading.Lock()
+        self._pull_lock = threading.Lock()
+        self.index = NegativeExampleIndex(capacity=capacity)
+        self._stopped = threading.Event()
+        self._worker = None
+        if shared is not None:
+            self._worker = threading.Thread(target=self._run, name="negative-feedback-pull", daemon=True)
+            self._worker.start()
+    
+    def refresh(self):
+        """새로 저장된 부정 피드백만 읽어 색인 갱신 (로컬 저장소만 읽음)"""
+        with self._refresh_lock:
+            with METRICS.span("negative_feedback_refresh") as span:
+                rows = self._store.negatives(after_id=self._last_id)
+                span.set(rows=len(rows))
+            for row_id, record in rows:
+                self.index.add(record)
+                self._last_id = row_id
+    
+    def pull_shared(self):
+        """공유 목록에서 마지막으로 읽은 순번 이후의 부정 피드백을 가져와 색인에 더함"""
+        if self._shared is None:
+            return
+        with self._pull_lock:
+            try:
+                log = self._shared.read(SHARED_LOG_KEY, self._shared_sequence, self._shared_epoch)
+            except Exception:
+                METRICS.increment("shared_state_errors", op="read")
+                return
+            if log["epoch"] != self._shared_epoch:
+                # 서버가 다시 시작됨 - 순번이 처음부터 다시 매겨졌으므로 처음부터 읽은 결과를 받음
+                self._shared_epoch = log["epoch"]
+                self._shared_sequence = 0
+            for sequence, record in log["entries"]:
+                self.index.add(record)
+                self._shared_sequence = sequence
+    
+    def stop(self, timeout=5.0):
+        """공유 목록 가져오기 중지"""
+        self._stopped.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            self.pull_shared()
+            self._stopped.wait(self.shared_interval)
+    
+    def publish(self, record):
+        """새 부정 피드백을 다른 인스턴스에 알림 (공유 상태가 없으면 아무것도 안 함)"""
+        if self._shared is None:
+            return
+        try:
+            self._shared.append(SHARED_LOG_KEY, record, SHARED_LOG_LIMIT)
+        except Exception:
+            METRICS.increment("shared_state_errors", op="append")
+    
+    def select(self, modes, user_input, k=3):
+        """입력과 가장 비슷한 부정 피드백 레코드 k개 (프롬프트 블록은 PromptBuilder가 만든다)"""
+        self.refresh()
+        with METRICS.span("select_negative_examples") as span:
+            examples = self.index.select(modes, user_input, k)
+            span.set(indexed=len(self.index), selected=len(examples))
+        return examples
@@ -0,0 +1,187 @@
+import hashlib
+import math
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+
+NGRAM_SIZES = (2, 3)  # 글자 n-gram 크기
+SHINGLE_SIZE = 3  # 중복 판정용 shingle 크기
+
+
+def normalize_text(text):
+    """유니코드/대소문자/공백 정규화"""
+    return " ".join(unicodedata.normalize("NFC", str(text)).lower().split())
+
+
+def char_ngrams(text, sizes=NGRAM_SIZES):
+    """정규화된 문장의 글자 n-gram 빈도"""
+    grams = Counter()
+    for size in sizes:
+        for start in range(len(text) - size + 1):
+            grams[text[start:start + size]] += 1
+    return grams
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """중복 판정용 shingle 해시 집합 - 공백/문장부호는 무시 (짧은 문장은 문장 전체 하나)"""
+    text = "".join(ch for ch in text if ch.isalnum() or ch == "\x1f")
+    if len(text) < size:
+        return frozenset([hash(text)])
+    return frozenset(hash(text[start:start + size]) for start in range(len(text) - size + 1))
+
+
+def jaccard(left, right):
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class _Entry:
+    __slots__ = ("record", "mode", "reason", "group", "terms", "shingles", "text_key", "seq")
+
+
+class NegativeExampleIndex:
+    """부정 피드백 예시 색인 - 중복 제거 + 입력과의 유사도 순 선택
+    
+    예시는 (모드, 싫어요 사유) 그룹으로 묶는다. 같은 그룹 안에서 정규화한 문장이 같거나
+    shingle 유사도가 duplicate_threshold 이상이면 중복으로 보고 최신 예시로 교체한다.
+    유사도는 원본/변환 문구의 글자 n-gram TF-IDF 코사인 값이다. 문서 빈도와 역색인은
+    행이 들어올 때마다 갱신하므로 전체를 다시 만들 필요가 없다.
+    """
+    
+    def __init__(self, capacity=500, duplicate_threshold=0.8, other_mode_weight=0.5, per_reason=2):
+        self.capacity = capacity
+        self.duplicate_threshold = duplicate_threshold
+        self.other_mode_weight = other_mode_weight  # 다른 모드 예시의 점수 가중치
+        self.per_reason = per_reason  # 한 번에 고를 같은 사유 예시 수 상한
+        self._entries = OrderedDict()  # id -> _Entry (오래된 순)
+        self._groups = {}  # (모드, 사유) -> {id}
+        self._text_keys = {}  # 정규화 문장 해시 -> id
+        self._postings = {}  # n-gram -> {id}
+        self._document_frequency = Counter()
+        self._norms = {}  # id -> TF-IDF 벡터 크기 (예시가 추가/삭제되면 다시 계산)
+        self._next_id = 0
+        self._lock = threading.RLock()
+        self.duplicates = 0  # 중복으로 교체된 예시 수
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def records(self):
+        """오래된 순 전체 예시 레코드"""
+        with self._lock:
+            return tuple(entry.record for entry in self._entries.values())
+    
+    def add(self, record):
+        """예시 추가 - 중복이면 기존 예시를 교체하고 False 반환"""
+        original = normalize_text(record.get("원본 문구", ""))
+        converted = normalize_text(record.get("변환된 문구", ""))
+        entry = _Entry()
+        entry.record = record
+        entry.mode = str(record.get("모드", ""))
+        entry.reason = str(record.get("싫어요 사유", "")) or "N/A"
+        entry.group = (entry.mode, entry.reason)
+        entry.terms = char_ngrams(f"{original} {converted}")
+        entry.shingles = shingle_hashes(f"{original}\x1f{converted}")
+        entry.text_key = hashlib.sha1("\x1f".join([*entry.group, original, converted]).encode("utf-8")).hexdigest()
+        
+        with self._lock:
+            duplicate = self._find_duplicate(entry)
+            if duplicate is not None:
+                self._remove(duplicate)
+                self.duplicates += 1
+            
+            entry.seq = self._next_id
+            self._next_id += 1
+            self._entries[entry.seq] = entry
+            self._groups.setdefault(entry.group, set()).add(entry.seq)
+            self._text_keys[entry.text_key] = entry.seq
+            for term in entry.terms:
+                self._postings.setdefault(term, set()).add(entry.seq)
+                self._document_frequency[term] += 1
+            
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+            self._norms.clear()
+        return duplicate is None
+    
+    def _find_duplicate(self, entry):
+        if entry.text_key in self._text_keys:
+            return self._text_keys[entry.text_key]
+        for entry_id in self._groups.get(entry.group, ()):
+            if jaccard(entry.shingles, self._entries[entry_id].shingles) >= self.duplicate_threshold:
+                return entry_id
+        return None
+    
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        group = self._groups[entry.group]
+        group.discard(entry_id)
+        if not group:
+            del self._groups[entry.group]
+        if self._text_keys.get(entry.text_key) == entry_id:
+            del self._text_keys[entry.text_key]
+        for term in entry.terms:
+            postings = self._postings[term]
+            postings.discard(entry_id)
+            if not postings:
+                del self._postings[term]
+            self._document_frequency[term] -= 1
+            if self._document_frequency[term] <= 0:
+                del self._document_frequency[term]
+    
+    def _idf(self, term):
+        return math.log((1 + len(self._entries)) / (1 + self._document_frequency[term])) + 1
+    
+    def similarities(self, text):
+        """입력과 n-gram을 공유하는 예시별 TF-IDF 코사인 유사도"""
+        query = char_ngrams(normalize_text(text))
+        with self._lock:
+            weights = {term: count * self._idf(term) for term, count in query.items() if term in self._postings}
+            if not weights:
+                return {}
+            query_norm = math.sqrt(sum(count * count * self._idf(term) ** 2 for term, count in query.items()))
+            
+            scores = {}
+            for term, weight in weights.items():
+                for entry_id in self._postings[term]:
+                    scores[entry_id] = scores.get(entry_id, 0.0) + weight * self._entries[entry_id].terms[term] * self._idf(term)
+            
+            for entry_id in scores:
+                if entry_id not in self._norms:
+                    terms = self._entries[entry_id].terms
+                    self._norms[entry_id] = math.sqrt(sum((count * self._idf(term)) ** 2 for term, count in terms.items()))
+                scores[entry_id] /= query_norm * self._norms[entry_id]
+            return scores
+    
+    def select(self, modes, user_input, k=3):
+        """입력과 가장 비슷한 예시 k개 (덜 중요한 것부터 중요한 순서로)
+        
+        같은 모드 예시는 유사도가 0이어도 최신순으로 후보가 되고,
+        다른 모드 예시는 유사도가 있을 때만 가중치를 낮춰 후보가 된다.
+        """
+        if k <= 0:
+            return ()
+        modes = set(modes)
+        with self._lock:
+            similarities = self.similarities(user_input)
+            candidates = []
+            for entry_id, entry in self._entries.items():
+                score = similarities.get(entry_id, 0.0)
+                if entry.mode not in modes:
+                    if score <= 0:
+                        continue
+                    score *= self.other_mode_weight
+                candidates.append((score, entry_id, entry))
+            
+            candidates.sort(key=lambda candidate: (candidate[0], candidate[1]), reverse=True)
+            selected = []
+            per_reason = Counter()
+            for _, _, entry in candidates:
+                if per_reason[entry.reason] >= self.per_reason:
+                    continue
+                per_reason[entry.reason] += 1
+                selected.append(entry.record)
+                if len(selected) == k:
+                    break
+        return tuple(reversed(selected))
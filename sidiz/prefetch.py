@@ -0,0 +1,81 @@
+import threading
+
+from sidiz.metrics import METRICS
+
+
+class ExamplePrefetcher:
+    """예시 문구를 모든 모드로 미리 변환해 공유 응답 캐시에 채워 둠
+    
+    시작할 때, interval마다, 그리고 부정 피드백이 저장된 뒤(debounce 후) 캐시를 확인한다.
+    캐시 키에 부정 피드백 예시 해시가 들어가므로 예시가 바뀐 문구만 다시 변환되고,
+    모드별로 빠진 문구를 한 번의 요청으로 묶어 보낸다.
+    리미터에 여유가 reserve개보다 많을 때만 요청을 보내고, 아니면 사용자 요청에 양보했다가 다시 시도한다.
+    """
+    
+    def __init__(self, service, phrases, modes, interval=10 * 60, debounce=30.0, busy_delay=5.0, reserve=1):
+        self._service = service
+        self.phrases = list(phrases)
+        self.modes = list(modes)
+        self.interval = interval
+        self.debounce = debounce
+        self.busy_delay = busy_delay
+        self.reserve = reserve  # 사용자 요청 몫으로 남겨 둘 요청 수
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="example-prefetch", daemon=True)
+        self._worker.start()
+    
+    def notify(self):
+        """부정 피드백이 바뀌었음을 알림 - debounce 뒤에 다시 확인"""
+        self._wakeup.set()
+    
+    def stop(self, timeout=5.0):
+        """백그라운드 확인 중지 - 진행 중인 prefetch()는 마치고 멈춤"""
+        self._stopped.set()
+        self._wakeup.set()
+        self._worker.join(timeout)
+    
+    def _has_capacity(self):
+        return any(limiter.spare() > self.reserve for limiter in self._service.rate_limiters)
+    
+    def _run(self):
+        delay = 0.0
+        while True:
+            if self._wakeup.wait(timeout=delay):
+                # 피드백이 연달아 들어오면 마지막 알림 후 debounce만큼 모아서 한 번만 처리
+                self._wakeup.clear()
+                while not self._stopped.is_set() and self._wakeup.wait(timeout=self.debounce):
+                    self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                done = self.prefetch()
+            except Exception:
+                # 할당량 부족 등 - 다음 주기에 다시 시도 (사용자 요청은 그대로 처리됨)
+                METRICS.increment("prefetch_failures")
+                done = True
+            delay = self.interval if done else self.busy_delay
+    
+    def missing(self, mode):
+        """현재 부정 피드백 기준으로 캐시에 없는 예시 문구 (캐시 적중률 지표에는 넣지 않음)"""
+        return [
+            phrase for phrase in self.phrases
+            if self._service.cached(mode, phrase, self._service.select_examples([mode], phrase), record=False) is None
+        ]
+    
+    def prefetch(self):
+        """캐시에 없는 예시 문구만 변환 - 리미터 여유가 없어 중간에 멈췄으면 False"""
+        converted = 0
+        done = True
+        with METRICS.span("prefetch_examples") as span:
+            for mode in self.modes:
+                missing = self.missing(mode)
+                if not missing:
+                    continue
+                if not self._has_capacity():
+                    done = False
+                    break
+                outputs = self._service.convert_many(mode, missing, record=False)
+                converted += sum(1 for output in outputs if not isinstance(output, Exception))
+            span.set(phrases=len(self.phrases) * len(self.modes), converted=converted)
+        return done
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from sidiz.metrics import METRICS
+from sidiz.negative_feedback import render_negative_block
+
+BRAND_VOICE = """
+너는 시디즈의 전문 UX 라이터야. 사용자가 입력한 일반 문구를 시디즈만의 브랜드 보이스로 변환해줘.
+
+[시디즈 브랜드 보이스 핵심]
+- 전문적이면서도 따뜻한 조력자
+- 사용자 중심의 세심한 배려
+- 혁신과 지속가능성에 대한 진정성
+"""
+
+UX_INSTRUCTION = """
+[UX 모드 - 브랜드 감성 & 친절한 조력자]
+
+변환 시 다음에 집중하세요:
+1. 감성적 연결: 사용자의 감정과 니즈에 공감
+2. 친절한 안내: 따뜻하고 접근하기 쉬운 톤
+3. 경험 중심: 사용자가 느낄 경험 강조
+4. 신뢰감: 과장 없이 진솔한 표현
+
+예시:
+"편안한 의자" → "하루 종일 앉아 있어도 지치지 않도록, 당신의 몸을 세심하게 배려한 시팅 경험을 제공합니다"
+"""
+
+SEO_GEO_INSTRUCTION = """
+[SEO/GEO 모드 - 검색 최적화 + 증거 기반]
+
+포함 요소:
+1. 핵심 키워드: 허리 편한 의자, 인체공학 의자, 척추 건강, 요통 완화
+2. 데이터 근거: "시디즈 연구소 기반", "20년 노하우", "(kr.sidiz.com)"
+3. 명확한 문장: 주어+서술어, 핵심 정보 앞배치
+4. 브랜드 톤 유지
+
+예시:
+"편안한 의자" → "시디즈 인체공학 의자는 장시간 착석 시 허리 편안함을 제공하는 사무용 의자로, 척추 건강을 고려한 요추 지지 설계가 특징입니다. (kr.sidiz.com)"
+"""
+
+# 프롬프트는 [앞부분 + 부정 피드백 블록 + 모드 지침 + 입력부]로 조립한다.
+# 입력과 부정 피드백을 뺀 나머지는 import 시 한 번만 만들어 둔다.
+PREFIX = "\n" + BRAND_VOICE + "\n"
+
+SINGLE_TEMPLATE = """
+사용자 입력: "{user_input}"
+
+위 입력을 {mode} 모드에 맞춰 변환해줘. 오직 변환된 문구만 출력하고, 부가 설명은 하지 마.
+"""
+
+BATCH_TEMPLATE = """
+사용자 입력 목록 (JSON): {items}
+
+위 입력을 각각 {mode} 모드에 맞춰 변환해줘.
+아래 형식의 JSON 배열만 출력하고, 부가 설명은 하지 마. id는 입력의 id를 그대로 사용해.
+[{{"id": 0, "output": "변환된 문구"}}]
+"""
+
+COMPARE_TEMPLATE = """
+사용자 입력: "{user_input}"
+
+위 입력을 {modes} 모드 각각에 맞춰 변환해줘.
+아래 형식의 JSON 객체만 출력하고, 부가 설명은 하지 마.
+{output_format}
+"""
+
+NEGATIVE_FIELDS = ("원본 문구", "변환된 문구", "코멘트")  # 예산 초과 시 잘라낼 필드
+
+
+def mode_instruction(mode):
+    """모드별 변환 지침과 예시"""
+    if mode == "UX":
+        return UX_INSTRUCTION
+    return SEO_GEO_INSTRUCTION  # SEO/GEO 모드
+
+
+def mode_section(modes):
+    """부정 피드백 블록 뒤에 붙는 모드 지침 (모드 조합별로 한 번만 만든다)"""
+    return "\n\n\n" + "\n".join(mode_instruction(mode) for mode in modes) + "\n"
+
+
+SINGLE_SECTIONS = {mode: mode_section([mode]) for mode in ("UX", "SEO/GEO")}
+
+# 지침/템플릿이 바뀌면 달라지는 프롬프트 버전 (피드백 통계를 버전별로 나눌 때 사용)
+PROMPT_VERSION = hashlib.sha256(
+    "\x1f".join([PREFIX, UX_INSTRUCTION, SEO_GEO_INSTRUCTION, SINGLE_TEMPLATE, BATCH_TEMPLATE, COMPARE_TEMPLATE])
+    .encode("utf-8")
+).hexdigest()[:8]
+
+
+def estimate_tokens(text):
+    """로컬 토큰 수 추정 - 영문/숫자는 4글자당 1토큰, 한글 등은 글자당 1토큰 (보수적)"""
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return -(-ascii_chars // 4) + len(text) - ascii_chars
+
+
+def truncate_record(record, limit):
+    """부정 피드백 레코드의 긴 필드를 limit 글자로 자름"""
+    record = dict(record)
+    for field in NEGATIVE_FIELDS:
+        value = str(record.get(field, ""))
+        if len(value) > limit:
+            record[field] = value[:limit] + "…"
+    return record
+
+
+class TokenCounter:
+    """프롬프트 토큰 수 계산
+    
+    count_tokens(text)가 주어지면 그 값을 쓰고(모델의 count_tokens API 등),
+    없거나 실패하면 로컬 추정값을 쓴다. 같은 프롬프트는 다시 세지 않는다.
+    """
+    
+    def __init__(self, count_tokens=None, cache_size=256):
+        self._count_tokens = count_tokens
+        self._cache_size = cache_size
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def count(self, text):
+        if self._count_tokens is None:
+            return estimate_tokens(text)
+        
+        with self._lock:
+            if text in self._counts:
+                self._counts.move_to_end(text)
+                return self._counts[text]
+        try:
+            tokens = int(self._count_tokens(text))
+        except Exception:
+            return estimate_tokens(text)
+        with self._lock:
+            self._counts[text] = tokens
+            while len(self._counts) > self._cache_size:
+                self._counts.popitem(last=False)
+        return tokens
+
+
+class PromptBuilder:
+    """입력 토큰 예산을 지키는 프롬프트 조립기
+    
+    고정 부분(지침 + 입력)을 뺀 나머지 예산에 맞춰 부정 피드백 예시를 넣는다.
+    예산을 넘으면 예시의 긴 필드를 먼저 자르고, 그래도 넘으면 앞쪽(관련도가 낮은) 예시부터 뺀다.
+    token_budget이 None이면 예시를 그대로 넣는다.
+    """
+    
+    def __init__(self, token_budget=None, counter=None, field_limit=200):
+        self.token_budget = token_budget
+        self.counter = counter or TokenCounter()
+        self.field_limit = field_limit
+        self.version = PROMPT_VERSION
+    
+    def count_tokens(self, prompt):
+        return self.counter.count(prompt)
+    
+    def fit_negative_block(self, negative_feedback, prefix="", suffix=""):
+        """prefix + 블록 + suffix가 예산 안에 들어가는 부정 피드백 블록과 넣은 예시 수 반환
+        
+        토큰 수는 self.counter로 센다(count_tokens가 켜져 있으면 모델 API). 예시를 뺄 때는
+        몇 개를 남길지 이진 탐색으로 찾아 세는 횟수를 줄인다.
+        """
+        records = list(negative_feedback)
+        block = render_negative_block(records)
+        if self.token_budget is None or not records:
+            return block, len(records)
+        
+        def fits(block):
+            return self.count_tokens(prefix + block + suffix) <= self.token_budget
+        
+        if fits(block):
+            return block, len(records)
+        
+        records = [truncate_record(record, self.field_limit) for record in records]
+        # 관련도가 낮은 앞쪽 예시부터 뺀다 - records[start:]가 들어가는 가장 작은 start
+        low, high = 0, len(records)
+        while low < high:
+            middle = (low + high) // 2
+            if fits(render_negative_block(records[middle:])):
+                high = middle
+            else:
+                low = middle + 1
+        records = records[low:]
+        return render_negative_block(records), len(records)
+    
+    def _assemble(self, kind, section, tail, negative_feedback, **attributes):
+        with METRICS.span("generate_prompt", kind=kind) as span:
+            block, kept = self.fit_negative_block(negative_feedback, PREFIX, section + tail)
+            prompt = PREFIX + block + section + tail
+            span.set(
+                prompt_chars=len(prompt),
+                prompt_tokens=self.count_tokens(prompt),
+                negative_examples=kept,
+                negative_dropped=len(negative_feedback) - kept,
+                **attributes
+            )
+        return prompt
+    
+    def single(self, mode, user_input, negative_feedback):
+        """모드별 프롬프트 생성"""
+        section = SINGLE_SECTIONS.get(mode) or mode_section([mode])
+        tail = SINGLE_TEMPLATE.format(user_input=user_input, mode=mode)
+        return self._assemble("single", section, tail, negative_feedback)
+    
+    def batch(self, mode, user_inputs, negative_feedback):
+        """여러 문구를 한 번에 변환하는 프롬프트 (JSON 배열로 응답)"""
+        items = json.dumps(
+            [{"id": index, "input": user_input} for index, user_input in enumerate(user_inputs)],
+            ensure_ascii=False
+        )
+        section = SINGLE_SECTIONS.get(mode) or mode_section([mode])
+        tail = BATCH_TEMPLATE.format(items=items, mode=mode)
+        return self._assemble("batch", section, tail, negative_feedback, inputs=len(user_inputs))
+    
+    def compare(self, modes, user_input, negative_feedback):
+        """한 입력을 여러 모드로 동시에 변환하는 프롬프트 (JSON 객체로 응답)"""
+        output_format = json.dumps({mode: "변환된 문구" for mode in modes}, ensure_ascii=False)
+        tail = COMPARE_TEMPLATE.format(user_input=user_input, modes=", ".join(modes), output_format=output_format)
+        return self._assemble("compare", mode_section(modes), tail, negative_feedback)
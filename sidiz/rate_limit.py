@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+
+from sidiz.metrics import METRICS
+
+
+class TokenBucket:
+    """분당 한도를 지키는 토큰 버킷
+    
+    용량(burst)만큼 즉시 쓸 수 있고, 나머지는 (limit - burst)/60 속도로 채워진다.
+    그래서 어떤 60초 구간(양 끝 포함)에서도 limit을 넘지 않는다.
+    limit이 1 이하면 용량 1에 채울 몫이 없으므로, 다음 요청이 60초를 넘겨서 들어오도록
+    1초 여유를 두고 채운다.
+    """
+    
+    def __init__(self, limit_per_minute, burst=None, clock=time.monotonic):
+        if limit_per_minute <= 0:
+            raise ValueError("limit_per_minute는 0보다 커야 합니다")
+        if limit_per_minute > 1:
+            if burst is None:
+                burst = max(1, limit_per_minute // 5)
+            burst = max(1, min(burst, limit_per_minute - 1))
+            self.rate = (limit_per_minute - burst) / 60.0  # 초당 충전량
+        else:
+            burst = 1
+            self.rate = limit_per_minute / 61.0
+        self.capacity = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+    
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def available(self, now=None):
+        self._refill(self._clock() if now is None else now)
+        return self._tokens
+    
+    def wait_time(self, amount, now=None):
+        """amount만큼 쓸 수 있을 때까지 남은 시간 (초)"""
+        deficit = amount - self.available(now)
+        return 0.0 if deficit <= 0 else deficit / self.rate
+    
+    def consume(self, amount, now=None):
+        self._refill(self._clock() if now is None else now)
+        self._tokens -= amount
+
+
+class RateLimiter:
+    """요청 수(RPM)와 토큰 수(TPM) 버킷을 함께 쓰는 프로세스 공유 리미터
+    
+    대기 중인 요청은 FIFO 순서로 처리되어 세션 간에 공정하다.
+    버킷이 비어 있지 않고 앞선 대기자가 없으면 바로 통과한다.
+    
+    shared(공유 상태)가 있으면 대기열 선두 요청이 공유 버킷(이름: name)에서 원자적으로 차감해야
+    통과하므로, 여러 인스턴스가 하나의 할당량을 나눠 쓴다. 로컬 버킷은 대기 시간 추정용으로 남고,
+    공유 상태에 닿지 않으면 로컬 버킷만으로 동작한다.
+    """
+    
+    def __init__(self, rpm=15, tpm=1_000_000, burst=None, clock=time.monotonic, shared=None, name="gemini"):
+        self._clock = clock
+        self._requests = TokenBucket(rpm, burst=burst, clock=clock)
+        self._tokens = TokenBucket(tpm, burst=None if burst is None else tpm * burst // rpm, clock=clock)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._shared = shared
+        self.name = name
+        self._shared_wait = 0.0  # 공유 버킷이 마지막으로 알려준 대기 시간
+    
+    @property
+    def queue_length(self):
+        return len(self._queue)
+    
+    def spare(self):
+        """기다리는 요청이 없을 때 지금 바로 보낼 수 있는 요청 수 (백그라운드 작업용)"""
+        with self._cond:
+            if self._queue:
+                return 0
+            local = int(self._requests.available(self._clock()))
+        if self._shared is None:
+            return local
+        try:
+            return int(self._shared.available(
+                f"{self.name}:requests", self._requests.rate, self._requests.capacity
+            ))
+        except Exception:
+            METRICS.increment("shared_state_errors", op="available")
+            return local
+    
+    def _take_shared(self, tokens):
+        """공유 버킷에서 차감 시도 - 기다릴 시간 (초), 공유 상태 장애면 0 (로컬 판단 사용)"""
+        try:
+            return self._shared.consume([
+                (f"{self.name}:requests", 1, self._requests.rate, self._requests.capacity),
+                (f"{self.name}:tokens", tokens, self._tokens.rate, self._tokens.capacity),
+            ])
+        except Exception:
+            METRICS.increment("shared_state_errors", op="consume")
+            return 0.0
+    
+    def acquire(self, tokens=1, on_wait=None, poll_interval=1.0):
+        """호출 가능할 때까지 대기 후 버킷에서 차감
+        
+        on_wait(대기 순번, 예상 대기 초)는 기다리는 동안 주기적으로 호출된다.
+        반환값은 실제로 기다린 시간 (초).
+        """
+        tokens = min(max(tokens, 1), self._tokens.capacity)
+        ticket = object()
+        started = self._clock()
+        
+        with self._cond:
+            self._queue.append(ticket)
+        
+        try:
+            while True:
+                with self._cond:
+                    now = self._clock()
+                    position = self._queue.index(ticket)
+                    wait = self._estimate_wait(position, tokens, now)
+                    ready = position == 0 and wait == 0
+                    if ready and self._shared is None:
+                        return self._admit(tokens, now, started)
+                
+                if ready:
+                    # 선두 요청만 공유 버킷에 접근 (네트워크 호출은 락 밖에서)
+                    wait = self._shared_wait = self._take_shared(tokens)
+                    if wait == 0:
+                        with self._cond:
+                            return self._admit(tokens, self._clock(), started)
+                
+                if on_wait is not None:
+                    on_wait(position + 1, wait)
+                
+                with self._cond:
+                    self._cond.wait(timeout=min(max(wait, 0.05), poll_interval))
+        finally:
+            # 중단된 요청(세션 종료, rerun 등)은 대기열에서 제거
+            with self._cond:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    self._cond.notify_all()
+    
+    def _admit(self, tokens, now, started):
+        # 선두 요청 통과 - 로컬 버킷 차감 후 대기열에서 제거 (self._cond를 잡은 상태에서 호출)
+        self._requests.consume(1, now)
+        self._tokens.consume(tokens, now)
+        self._queue.popleft()
+        self._cond.notify_all()
+        return now - started
+    
+    def _estimate_wait(self, position, tokens, now):
+        # 앞선 대기자들이 요청 버킷을 하나씩 쓴다고 보고 계산
+        request_wait = self._requests.wait_time(position + 1, now)
+        if position == 0:
+            return max(request_wait, self._tokens.wait_time(tokens, now))
+        # 공유 버킷이 비어 있으면 다른 인스턴스 몫만큼 더 기다림
+        return request_wait + self._shared_wait
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from sidiz.metrics import METRICS
+
+
+def normalize_input(text):
+    """공백/유니코드 정규화 - 같은 문구는 같은 키가 되도록"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def feedback_version(negative_feedback):
+    """부정 피드백 예시의 해시 - 예시가 바뀌면 캐시 키도 바뀐다"""
+    raw = json.dumps(list(negative_feedback), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(mode, user_input, negative_feedback):
+    raw = "\x1f".join([mode, normalize_input(user_input), feedback_version(negative_feedback)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """변환 결과 캐시 (LRU + TTL, 선택적으로 SQLite에 영구 저장)
+    
+    키는 (모드, 정규화된 입력, 부정 피드백 예시 해시)로 만든다.
+    shared(공유 상태)가 있으면 로컬에 없는 키를 다른 인스턴스가 저장한 결과에서 찾고,
+    새 결과는 공유 상태에도 저장한다.
+    """
+    
+    def __init__(self, max_entries=500, ttl=24 * 60 * 60, path=None, shared=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._shared = shared
+        self._entries = OrderedDict()  # key -> (response, created_at)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, mode, user_input, negative_feedback, record=True):
+        """저장된 결과 (없으면 None) - record=False면 적중률 지표(cache_lookups)에 넣지 않음"""
+        key = cache_key(mode, user_input, negative_feedback)
+        response = self._get(key)
+        if response is None and self._shared is not None:
+            response = self._get_shared(key)
+        if record:
+            METRICS.increment("cache_lookups", cache="response", result="miss" if response is None else "hit")
+        return response
+    
+    def _get_shared(self, key):
+        try:
+            entry = self._shared.get(f"response:{key}")
+        except Exception:
+            # 공유 상태 서버 장애 - 캐시 미스로 처리
+            METRICS.increment("shared_state_errors", op="get")
+            return None
+        if entry is None:
+            return None
+        response, created_at = entry
+        with self._lock:
+            self._remember(key, (response, created_at))
+        return response
+    
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            
+            if entry is None:
+                return None
+            
+            response, created_at = entry
+            if not response or now - created_at >= self.ttl:
+                self._forget(key)
+                return None
+            
+            self._entries.move_to_end(key)
+            return response
+    
+    def put(self, mode, user_input, negative_feedback, response):
+        if not response:
+            # 빈 답변(차단된 응답 등)은 저장하지 않음 - 다음 요청에서 다시 생성
+            return
+        key = cache_key(mode, user_input, negative_feedback)
+        entry = (response, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, response, created_at) VALUES (?, ?, ?)",
+                    (key, entry[0], entry[1])
+                )
+                self._db.execute(
+                    "DELETE FROM response_cache WHERE created_at < ?", (entry[1] - self.ttl,)
+                )
+                self._db.commit()
+        
+        if self._shared is not None:
+            try:
+                self._shared.set(f"response:{key}", list(entry), ttl=self.ttl)
+            except Exception:
+                METRICS.increment("shared_state_errors", op="set")
+    
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _forget(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            self._db.commit()
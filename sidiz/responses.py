@@ -0,0 +1,72 @@
+from sidiz.metrics import METRICS
+
+SOURCE_SEPARATOR = "\n출처: "
+
+
+class EmptyResponseError(ValueError):
+    """텍스트가 하나도 없는 응답 (모든 조각이 안전 필터 등으로 차단됨)"""
+
+
+def iter_response_text(response):
+    """스트리밍 응답에서 텍스트 조각만 순서대로 꺼냄"""
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # 안전 필터 등으로 텍스트가 없는 조각은 건너뜀
+            continue
+        if text:
+            yield text
+
+
+def response_text(response):
+    """스트리밍이 아닌 응답의 텍스트 - 비어 있으면 EmptyResponseError"""
+    text = response.text.strip()
+    if not text:
+        raise EmptyResponseError("응답에 텍스트가 없습니다 (안전 필터로 차단되었을 수 있음)")
+    return text
+
+
+def iter_response_text_traced(response):
+    """iter_response_text + 스트림 전체 시간과 토큰 수를 지표로 기록"""
+    with METRICS.span("generate_content_stream") as span:
+        yield from iter_response_text(response)
+        span.record_usage(getattr(response, "usage_metadata", None))
+
+
+def collect_text(chunks):
+    """조각들을 이어 붙여 최종 답변 생성 (세션 기록/캐시에 저장할 값)"""
+    return "".join(chunks).strip()
+
+
+class StreamCollector:
+    """조각을 그대로 흘려보내면서 최종 답변을 모아둠
+    
+    끝까지 받았는데 텍스트가 비어 있으면 EmptyResponseError를 낸다 (빈 답변을 보여주거나 캐시하지 않도록).
+    """
+    
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.parts = []
+    
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.parts.append(chunk)
+            yield chunk
+        if not self.text:
+            raise EmptyResponseError("응답에 텍스트가 없습니다 (안전 필터로 차단되었을 수 있음)")
+    
+    @property
+    def text(self):
+        return collect_text(self.parts)
+
+
+def split_source(content):
+    """답변 본문과 출처 URL 분리"""
+    if SOURCE_SEPARATOR not in content:
+        return content, None
+    
+    parts = content.split(SOURCE_SEPARATOR)
+    main_text = parts[0]
+    source_url = parts[1].strip() if len(parts) > 1 else None
+    return main_text, source_url
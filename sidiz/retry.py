@@ -0,0 +1,239 @@
+import random
+import re
+import threading
+import time
+
+from sidiz.metrics import METRICS
+
+RETRY_AFTER_PATTERNS = (
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)"),
+    re.compile(r"retry-after:?\s*([\d.]+)", re.IGNORECASE),
+)
+
+
+def retryable_error(exc):
+    """다른 키/모델로 넘기거나 기다렸다 다시 보낼 오류면 분류("429"/"5xx"), 아니면 None
+    
+    메시지가 아니라 google.api_core 예외 타입으로 판단한다.
+    HTTP 응답에서 만든 예외(TooManyRequests, GatewayTimeout)도 같은 분류다.
+    """
+    from google.api_core import exceptions
+    
+    if isinstance(exc, (exceptions.ResourceExhausted, exceptions.TooManyRequests)):
+        return "429"
+    if isinstance(exc, (
+        exceptions.ServiceUnavailable, exceptions.InternalServerError,
+        exceptions.DeadlineExceeded, exceptions.GatewayTimeout,
+    )):
+        return "5xx"
+    return None
+
+
+def retry_after(exc):
+    """오류에 담긴 재시도 대기 시간 (초) - 없으면 None
+    
+    RetryInfo(details), HTTP Retry-After 헤더, 오류 메시지 순으로 찾는다.
+    """
+    for detail in getattr(exc, "details", None) or ():
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+    
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if headers is not None:
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    
+    for pattern in RETRY_AFTER_PATTERNS:
+        match = pattern.search(str(exc))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0, rng=random):
+    """지수 백오프 + full jitter (여러 세션이 같은 순간에 몰리지 않도록)"""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """키/모델 하나의 차단기
+    
+    연속 failure_threshold번 실패하면 reset_timeout 동안 열리고(호출 안 함),
+    서버가 재시도 시간을 알려주면 그 시간만큼 바로 열린다.
+    시간이 지나면 시험 호출 하나만 통과시키고(half-open), 성공하면 닫힌다.
+    """
+    
+    def __init__(self, failure_threshold=5, reset_timeout=10.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._open_until = None
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        with self._lock:
+            if self._open_until is None:
+                return "closed"
+            return "open" if self._clock() < self._open_until or self._probing else "half_open"
+    
+    def available_in(self):
+        """호출 가능해질 때까지 남은 시간 (초)"""
+        with self._lock:
+            if self._open_until is None:
+                return 0.0
+            if self._probing:
+                return self.reset_timeout
+            return max(0.0, self._open_until - self._clock())
+    
+    def try_acquire(self):
+        """지금 호출해도 되는지 - half-open이면 시험 호출 하나만 허용"""
+        with self._lock:
+            if self._open_until is None:
+                return True
+            if self._probing or self._clock() < self._open_until:
+                return False
+            self._probing = True
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._open_until = None
+            self._probing = False
+    
+    def release(self):
+        """결과를 모르는 채로 끝난 시험 호출 자리를 돌려줌 (실패로 세지 않음)"""
+        with self._lock:
+            self._probing = False
+    
+    def record_failure(self, cooldown=None):
+        """실패 기록 - 열렸으면 True"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if cooldown is not None or self._failures >= self.failure_threshold:
+                self._open_until = self._clock() + (self.reset_timeout if cooldown is None else cooldown)
+                return True
+            return False
+
+
+class RetryScheduler:
+    """429/5xx를 재시도하면서 후보(키 x 모델) 사이에서 장애 조치
+    
+    후보는 선호 순서대로 받는다. 실패한 후보는 이번 요청에서 뒤로 미루고 다음 후보로 바로 넘어가며,
+    쓸 수 있는 후보가 없을 때만 retry-after 또는 지터 백오프만큼 기다린다.
+    후보별 차단기는 프로세스 전체에서 공유한다.
+    """
+    
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=30.0, max_wait=60.0,
+                 failure_threshold=5, reset_timeout=10.0, clock=time.monotonic, sleep=time.sleep, seed=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait  # 요청 하나가 재시도로 기다릴 수 있는 최대 시간 (초)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        self._breakers = {}
+        self._lock = threading.Lock()
+    
+    def breaker(self, candidate):
+        with self._lock:
+            if candidate not in self._breakers:
+                self._breakers[candidate] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self._clock)
+            return self._breakers[candidate]
+    
+    def states(self):
+        """후보별 차단기 상태 {후보: closed/open/half_open}"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {candidate: breaker.state for candidate, breaker in breakers.items()}
+    
+    def _pick(self, candidates, failed):
+        # 이번 요청에서 실패하지 않은 후보 먼저(선호 순서), 그다음 실패한 지 오래된 후보
+        for candidate in sorted(candidates, key=lambda candidate: failed.get(candidate, -1)):
+            if self.breaker(candidate).try_acquire():
+                return candidate
+        return None
+    
+    def _ready(self, candidate, failed):
+        breaker = self.breaker(candidate)
+        if candidate in failed:
+            return breaker.state == "half_open"
+        return breaker.available_in() == 0
+    
+    def call(self, candidates, function, on_retry=None):
+        """function(후보)를 성공할 때까지 호출
+        
+        재시도할 수 없는 오류(400 등)는 바로 올리고, 시도 횟수나 대기 한도를 넘기면 마지막 오류를 올린다.
+        on_retry(시도 번호, 대기 초, 오류 분류)는 기다리기 직전에 호출된다.
+        """
+        deadline = self._clock() + self.max_wait
+        failed = {}  # 이번 요청에서 실패한 후보 -> 실패한 시도 번호
+        last_error = None
+        
+        for attempt in range(self.max_attempts):
+            candidate = self._pick(candidates, failed)
+            if candidate is None:
+                # 모든 후보가 차단됨 - 가장 먼저 풀리는 후보를 기다림
+                delay = min(self.breaker(candidate).available_in() for candidate in candidates)
+                if last_error is None:
+                    last_error = RuntimeError("429 모든 API 키/모델이 일시 차단됨 (circuit open)")
+                if self._clock() + delay > deadline:
+                    break
+                self._wait(attempt, delay, "circuit_open", on_retry)
+                continue
+            
+            try:
+                result = function(candidate)
+            except Exception as e:
+                error_class = retryable_error(e)
+                if error_class is None:
+                    # 후보 문제가 아님 (잘못된 요청 등) - 시험 호출이었다면 닫아 둠
+                    self.breaker(candidate).record_success()
+                    raise
+                
+                last_error = e
+                failed[candidate] = attempt
+                cooldown = retry_after(e)
+                if self.breaker(candidate).record_failure(cooldown):
+                    METRICS.increment("circuit_open", error=error_class)
+                METRICS.increment("gemini_retry", error=error_class)
+                
+                if attempt + 1 >= self.max_attempts:
+                    break
+                if any(self._ready(other, failed) for other in candidates if other != candidate):
+                    # 아직 시도하지 않았거나 차단 시간이 끝난 후보가 있으면 기다리지 않고 넘어감
+                    METRICS.increment("gemini_failover", error=error_class)
+                    continue
+                delay = cooldown if cooldown is not None else backoff_delay(
+                    attempt, self.base_delay, self.max_delay, self._random
+                )
+                if self._clock() + delay > deadline:
+                    break
+                self._wait(attempt, delay, error_class, on_retry)
+                continue
+            except BaseException:
+                # 취소됨 (Streamlit 재실행/중지, KeyboardInterrupt 등) - 시험 호출이었다면 자리를 돌려줌
+                self.breaker(candidate).release()
+                raise
+            
+            self.breaker(candidate).record_success()
+            return result
+        
+        METRICS.increment("gemini_retry_exhausted")
+        raise last_error
+    
+    def _wait(self, attempt, delay, error_class, on_retry):
+        if on_retry is not None:
+            on_retry(attempt + 1, delay, error_class)
+        self._sleep(delay)
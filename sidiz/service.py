@@ -0,0 +1,432 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from sidiz.batching import JSON_GENERATION_CONFIG, convert_batch, parse_compare_response
+from sidiz.feedback_analytics import FeedbackAnalytics
+from sidiz.feedback_store import FeedbackStore, normalize_row, to_record
+from sidiz.feedback_sync import FeedbackSync
+from sidiz.metrics import METRICS
+from sidiz.negative_feedback import NegativeFeedbackCache
+from sidiz.prefetch import ExamplePrefetcher
+from sidiz.prompts import PromptBuilder, TokenCounter
+from sidiz.rate_limit import RateLimiter
+from sidiz.response_cache import ResponseCache
+from sidiz.retry import RetryScheduler
+from sidiz.responses import iter_response_text_traced, response_text
+from sidiz.shared_state import build_shared_state
+from sidiz.sheets import SheetPool
+
+MODES = ("UX", "SEO/GEO")
+DEFAULT_MODEL_NAME = "models/gemini-1.5-flash"  # 모델 목록 조회 실패 시 사용
+MODEL_DISCOVERY_TTL = 60 * 60  # 모델 목록 캐시 유지 시간 (초)
+AUTO_FALLBACK_MODELS = 2  # 대체 모델 설정이 없을 때 목록에서 고를 flash 모델 수
+RESPONSE_CACHE_SIZE = 500  # 메모리에 보관할 변환 결과 수
+RESPONSE_CACHE_TTL = 24 * 60 * 60  # 변환 결과 캐시 유지 시간 (초)
+PROMPT_TOKEN_BUDGET = 3000  # 프롬프트 입력 토큰 상한 (초과 시 부정 피드백 예시를 줄임)
+MAX_ATTEMPTS = 5  # 요청 하나당 최대 호출 시도 수 (장애 조치 포함)
+MAX_RETRY_WAIT = 60  # 요청 하나가 재시도로 기다릴 수 있는 최대 시간 (초)
+NEGATIVE_EXAMPLES_PER_PROMPT = 3  # 프롬프트에 넣을 부정 피드백 예시 수
+FEEDBACK_DB_PATH = "feedback.sqlite3"  # 피드백 원본 저장소 (시트는 비동기 사본)
+EXAMPLE_PHRASES = ("편안한 의자", "허리가 아파요", "T50 의자", "가성비 좋은 의자")  # 첫 화면 예시 (미리 변환)
+PREFETCH_INTERVAL = 10 * 60  # 예시 문구 캐시를 확인하는 주기 (초)
+SHEET_PULL_INTERVAL = 5 * 60  # 시트에 새로 추가된 행을 가져오는 주기 (초)
+SHEET_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+
+def generate_content_traced(model, full_prompt, **kwargs):
+    """generate_content 호출을 지표로 기록 (스트리밍은 첫 응답까지의 시간)"""
+    stream = bool(kwargs.get("stream"))
+    with METRICS.span("generate_content", stream=stream) as span:
+        response = model.generate_content(full_prompt, **kwargs)
+        if not stream:
+            span.record_usage(getattr(response, "usage_metadata", None))
+    return response
+
+
+class GeminiModels:
+    """사용할 모델 이름 결정 + 모델 객체 재사용 (프로세스 전체 공유)
+    
+    secrets에 모델이 고정되어 있으면 목록 조회를 하지 않는다. 조회 결과는 discovery_ttl 동안
+    재사용하고, 조회에 실패하면 기본 모델을 쓰되 실패 결과는 캐시하지 않는다.
+    API 키가 여러 개면 (키 번호, 모델 이름) 후보마다 모델 객체를 따로 만든다.
+    """
+    
+    def __init__(self, api_keys, pinned=None, fallback_models=(), discovery_ttl=MODEL_DISCOVERY_TTL):
+        self._api_keys = [api_keys] if isinstance(api_keys, str) else list(api_keys)
+        self._pinned = pinned
+        self._fallback_models = list(fallback_models)
+        self.discovery_ttl = discovery_ttl
+        self._configured = False
+        self._discovered = None  # (모델 목록, 조회 시각)
+        self._models = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def key_count(self):
+        return len(self._api_keys)
+    
+    def _configure(self):
+        if not self._configured:
+            # 무거운 SDK는 처음 쓸 때 불러옴 (첫 화면 렌더링을 막지 않도록)
+            import google.generativeai as genai
+            
+            genai.configure(api_key=self._api_keys[0])
+            self._configured = True
+    
+    def warm_up(self):
+        """SDK 로딩, 모델 목록 조회, 주 모델 생성을 백그라운드 스레드에서 미리 실행"""
+        def warm():
+            try:
+                self.get()
+            except Exception:
+                # 실패해도 첫 변환 요청 때 다시 시도됨
+                pass
+        
+        thread = threading.Thread(target=warm, name="gemini-warm-up", daemon=True)
+        thread.start()
+        return thread
+    
+    def _discover(self):
+        import google.generativeai as genai
+        
+        with self._lock:
+            if self._discovered is not None and time.monotonic() - self._discovered[1] < self.discovery_ttl:
+                return self._discovered[0]
+            self._configure()
+            model_list = [m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
+            if not model_list:
+                raise RuntimeError("generateContent를 지원하는 모델이 없습니다")
+            self._discovered = (model_list, time.monotonic())
+            return model_list
+    
+    def resolve_name(self):
+        with METRICS.span("model_resolution"):
+            # 📌 secrets에 모델이 고정되어 있으면 목록 조회 생략
+            if self._pinned:
+                METRICS.increment("model_resolution", source="pinned")
+                return self._pinned
+            
+            try:
+                model_list = self._discover()
+                METRICS.increment("model_resolution", source="discovery")
+                return next((m for m in model_list if "1.5-flash" in m), model_list[0])
+            except Exception:
+                # 오프라인/조회 실패 시 기본 모델 사용 (실패 결과는 캐시하지 않음)
+                METRICS.increment("model_resolution", source="fallback")
+                return DEFAULT_MODEL_NAME
+    
+    def model_names(self):
+        """선호 순서대로 모델 이름 - 주 모델 다음에 대체 모델
+        
+        대체 모델이 설정되어 있지 않으면 목록 조회 결과 중 flash 모델을 최대 AUTO_FALLBACK_MODELS개 쓴다.
+        """
+        primary = self.resolve_name()
+        fallbacks = [m for m in self._fallback_models if m != primary]
+        if not self._fallback_models and not self._pinned and self._discovered is not None:
+            fallbacks = [m for m in self._discovered[0] if "flash" in m and m != primary][:AUTO_FALLBACK_MODELS]
+        return [primary] + fallbacks
+    
+    def candidates(self):
+        """장애 조치 후보 [(키 번호, 모델 이름)] - 모델 선호 순서가 먼저, 같은 모델 안에서는 키 순서"""
+        return [(key_index, model_name) for model_name in self.model_names() for key_index in range(self.key_count)]
+    
+    def _client(self, key_index):
+        # 추가 키는 전역 설정(genai.configure)을 바꾸지 않고 키별 클라이언트로 호출
+        if key_index not in self._clients:
+            from google.ai import generativelanguage as glm
+            
+            self._clients[key_index] = glm.GenerativeServiceClient(
+                client_options={"api_key": self._api_keys[key_index]}
+            )
+        return self._clients[key_index]
+    
+    def get(self, candidate=None):
+        import google.generativeai as genai
+        
+        key_index, model_name = candidate if candidate is not None else (0, self.resolve_name())
+        with self._lock:
+            if (key_index, model_name) not in self._models:
+                self._configure()
+                model = genai.GenerativeModel(model_name)
+                if key_index:
+                    model._client = self._client(key_index)
+                self._models[(key_index, model_name)] = model
+            return self._models[(key_index, model_name)]
+
+
+class ConversionService:
+    """Streamlit UI와 HTTP API가 함께 쓰는 변환 서비스 (프로세스당 하나)
+    
+    모델, 키별 공유 리미터, 재시도 스케줄러, 응답 캐시, 프롬프트 조립기, 부정 피드백 색인,
+    피드백 저장소를 묶는다. UI 전용 처리(대기열 표시, 재시도 안내, 호출 로그)는
+    on_wait/on_retry/on_call 콜백으로 넘겨받는다.
+    on_call(full_prompt, prompt_tokens)은 리미터를 통과한 뒤 모델 호출 직전에 불린다.
+    """
+    
+    def __init__(self, models, rate_limiters, retry_scheduler, response_cache, prompt_builder, feedback_store,
+                 feedback_sync=None, sheet_pool=None, stream=True,
+                 examples_per_prompt=NEGATIVE_EXAMPLES_PER_PROMPT, example_phrases=EXAMPLE_PHRASES,
+                 shared_state=None):
+        self.models = models
+        self.rate_limiters = rate_limiters  # API 키 순서대로 하나씩
+        self.retry_scheduler = retry_scheduler
+        self.response_cache = response_cache
+        self.prompt_builder = prompt_builder
+        self.feedback_store = feedback_store
+        self.feedback_sync = feedback_sync
+        self.sheet_pool = sheet_pool
+        self.stream = stream
+        self.examples_per_prompt = examples_per_prompt
+        self.shared_state = shared_state
+        self.negative_feedback_cache = NegativeFeedbackCache(feedback_store, shared=shared_state)
+        self.feedback_analytics = FeedbackAnalytics(feedback_store)
+        self.example_phrases = list(example_phrases)
+        self.prefetcher = None  # ExamplePrefetcher (build_service에서 시작)
+    
+    def select_examples(self, modes, user_input):
+        """입력과 비슷한 부정 피드백 예시 (로컬 색인, 네트워크 I/O 없음)"""
+        with METRICS.span("load_negative_feedback"):
+            return self.negative_feedback_cache.select(modes, user_input, k=self.examples_per_prompt)
+    
+    def candidates(self):
+        """이번 호출의 장애 조치 후보 - 모델 선호 순서, 같은 모델 안에서는 대기열이 짧은 키부터"""
+        candidates = self.models.candidates()
+        model_rank = {model_name: rank for rank, model_name in enumerate(dict.fromkeys(m for _, m in candidates))}
+        return sorted(
+            candidates,
+            key=lambda candidate: (model_rank[candidate[1]], self.rate_limiters[candidate[0]].queue_length)
+        )
+    
+    def generate(self, full_prompt, on_wait=None, on_call=None, on_retry=None, **kwargs):
+        """키별 공유 리미터를 거쳐 모델 호출
+        
+        429/5xx는 다른 키/모델로 바로 넘기고, 모두 막혀 있으면 retry-after 또는 백오프만큼 기다렸다 재시도한다.
+        재시도도 실제 호출이므로 매번 해당 키의 리미터를 다시 통과한다.
+        """
+        prompt_tokens = self.prompt_builder.count_tokens(full_prompt)
+        
+        def attempt(candidate):
+            self.rate_limiters[candidate[0]].acquire(tokens=prompt_tokens, on_wait=on_wait)
+            if on_call is not None:
+                on_call(full_prompt, prompt_tokens)
+            return generate_content_traced(self.models.get(candidate), full_prompt, **kwargs)
+        
+        return self.retry_scheduler.call(self.candidates(), attempt, on_retry)
+    
+    def cached(self, mode, user_input, examples, record=True):
+        # record=False: 내부 확인용 조회 (예시 미리 변환) - 사용자 요청의 캐시 적중률에 넣지 않음
+        return self.response_cache.get(mode, user_input, examples, record)
+    
+    def remember(self, mode, user_input, examples, output):
+        self.response_cache.put(mode, user_input, examples, output)
+    
+    def stream_conversion(self, mode, user_input, examples, on_wait=None, on_call=None, on_retry=None):
+        """문구 변환 - 답변 텍스트 조각을 순서대로 반환 (stream이 꺼져 있으면 한 조각)
+        
+        스트리밍 응답의 오류는 첫 조각을 받을 때(generate 안에서) 나므로 재시도 대상이 된다.
+        """
+        full_prompt = self.prompt_builder.single(mode, user_input, examples)
+        response = self.generate(full_prompt, on_wait, on_call, on_retry, stream=self.stream)
+        if self.stream:
+            return iter_response_text_traced(response)
+        return [response.text]
+    
+    def convert(self, mode, user_input, force_refresh=False, on_wait=None, on_call=None, on_retry=None):
+        """문구 하나 변환 - (변환 결과, 캐시 사용 여부)"""
+        examples = self.select_examples([mode], user_input)
+        output = None if force_refresh else self.cached(mode, user_input, examples)
+        if output is not None:
+            return output, True
+        
+        full_prompt = self.prompt_builder.single(mode, user_input, examples)
+        output = response_text(self.generate(full_prompt, on_wait, on_call, on_retry))
+        self.remember(mode, user_input, examples, output)
+        return output, False
+    
+    def compare(self, modes, user_input, force_refresh=False, on_wait=None, on_call=None, on_retry=None):
+        """여러 모드 변환 - ({모드: 변환 결과}, 모두 캐시에서 왔는지)
+        
+        캐시에 없는 모드만 한 번의 호출(JSON)로 받고, 응답에서 빠진 모드만 모드별로 다시 요청한다.
+        """
+        examples = self.select_examples(modes, user_input)
+        variants = {
+            mode: None if force_refresh else self.cached(mode, user_input, examples)
+            for mode in modes
+        }
+        missing = [mode for mode, text in variants.items() if text is None]
+        if not missing:
+            return variants, True
+        
+        fresh = {}
+        if len(missing) > 1:
+            full_prompt = self.prompt_builder.compare(missing, user_input, examples)
+            response = self.generate(full_prompt, on_wait, on_call, on_retry, generation_config=JSON_GENERATION_CONFIG)
+            try:
+                fresh = parse_compare_response(response.text, missing)
+            except ValueError:
+                fresh = {}
+        
+        for mode in missing:
+            if mode not in fresh:
+                full_prompt = self.prompt_builder.single(mode, user_input, examples)
+                fresh[mode] = response_text(self.generate(full_prompt, on_wait, on_call, on_retry))
+        
+        for mode, text in fresh.items():
+            self.remember(mode, user_input, examples, text)
+        variants.update(fresh)
+        return variants, False
+    
+    def convert_one(self, mode, phrase):
+        """일괄 변환용 - 변환 결과만 반환 (워커 스레드에서 호출)"""
+        return self.convert(mode, phrase)[0]
+    
+    def convert_many(self, mode, phrases, record=True):
+        """여러 문구를 한 번의 요청으로 변환 - phrases 순서대로 결과, 실패 항목은 예외 객체
+        
+        캐시에 없는 문구만 묶어서 요청하고, 예시는 문구별로 고른 것을 합쳐 사용한다.
+        record=False면 캐시 조회를 적중률 지표에 넣지 않는다.
+        """
+        examples = [self.select_examples([mode], phrase) for phrase in phrases]
+        results = [self.cached(mode, phrase, example, record) for phrase, example in zip(phrases, examples)]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            merged = {}
+            for index in missing:
+                for negative_record in examples[index]:
+                    merged[id(negative_record)] = negative_record
+            
+            def generate_json(full_prompt):
+                return self.generate(full_prompt, generation_config=JSON_GENERATION_CONFIG).text
+            
+            outputs = convert_batch(
+                mode,
+                [phrases[index] for index in missing],
+                tuple(merged.values()),
+                self.prompt_builder.batch,
+                generate_json,
+                self.convert_one
+            )
+            for index, output in zip(missing, outputs):
+                results[index] = output
+                if not isinstance(output, Exception):
+                    self.remember(mode, phrases[index], examples[index], output)
+        return results
+    
+    def save_feedback(self, original_text, converted_text, feedback, mode, reason="", comment=""):
+        """피드백을 로컬 저장소에 저장 (시트 동기화는 백그라운드에서 일괄 처리)"""
+        row = [
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            mode,
+            original_text,
+            converted_text,
+            "👍" if feedback == 1 else "👎",
+            feedback,
+            reason,
+            comment
+        ]
+        self.feedback_store.add(row, prompt_version=self.prompt_builder.version)
+        if feedback == 0:
+            self.negative_feedback_cache.publish(to_record(normalize_row(row)))
+        if self.feedback_sync is not None:
+            self.feedback_sync.notify()
+        if feedback == 0 and self.prefetcher is not None:
+            # 부정 피드백 예시가 바뀌면 예시 문구 변환도 다시 준비
+            self.prefetcher.notify()
+
+
+def build_service(secrets):
+    """secrets(st.secrets 또는 같은 구조의 dict)로 서비스 구성
+    
+    gemini.api_key가 없으면 KeyError, shared_state_url만 있고 shared_state_token이 없으면 ValueError를 낸다.
+    """
+    gemini_secrets = secrets["gemini"]
+    # 📌 [gemini].api_keys / fallback_models로 장애 조치 대상 키와 모델 추가
+    api_keys = [gemini_secrets["api_key"]] + list(gemini_secrets.get("api_keys", []))
+    models = GeminiModels(
+        api_keys,
+        pinned=gemini_secrets.get("model"),
+        fallback_models=gemini_secrets.get("fallback_models", [])
+    )
+    
+    def count_tokens(text):
+        return models.get().count_tokens(text).total_tokens
+    
+    sheet_url = secrets.get("feedback_sheet_url", "")
+    sheet_pool = None
+    if "gcp_service_account" in secrets and sheet_url:
+        def build_gsheet_client():
+            # 시트 연결은 동기화 스레드에서 처음 필요할 때 만들어짐
+            import gspread
+            from google.oauth2.service_account import Credentials
+            
+            credentials = Credentials.from_service_account_info(
+                dict(secrets["gcp_service_account"]), scopes=SHEET_SCOPES
+            )
+            return gspread.authorize(credentials)
+        
+        # 인증 세션과 워크시트 핸들을 프로세스 전체에서 재사용
+        sheet_pool = SheetPool(build_gsheet_client)
+    
+    def open_sheet():
+        # 연동 설정이 없으면 None
+        return None if sheet_pool is None else sheet_pool.handle(sheet_url)
+    
+    # 🌐 여러 인스턴스 배포 시 응답 캐시, 리미터 버킷, 부정 피드백 목록을 공유 상태 서버에 둠
+    shared_state = build_shared_state(secrets.get("shared_state_url"), secrets.get("shared_state_token"))
+    
+    # 🚀 SDK 로딩/모델 조회는 백그라운드에서 (첫 화면은 기다리지 않음)
+    models.warm_up()
+    
+    feedback_store = FeedbackStore(secrets.get("feedback_db_path", FEEDBACK_DB_PATH))
+    
+    service = ConversionService(
+        models=models,
+        # 📌 API 키별 실제 할당량 (무료 티어 기본값: 분당 15 요청)
+        # 🌐 shared_state_url이 있으면 모든 인스턴스가 키별 버킷 하나를 나눠 씀
+        rate_limiters=[
+            RateLimiter(
+                rpm=int(gemini_secrets.get("rpm", 15)),
+                tpm=int(gemini_secrets.get("tpm", 1_000_000)),
+                shared=shared_state,
+                name=f"gemini:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+            )
+            for api_key in api_keys
+        ],
+        # 🔁 429/5xx는 다른 키/모델로 넘기거나 retry-after/백오프 후 재시도
+        retry_scheduler=RetryScheduler(
+            max_attempts=int(gemini_secrets.get("max_attempts", MAX_ATTEMPTS)),
+            max_wait=float(gemini_secrets.get("max_retry_wait", MAX_RETRY_WAIT))
+        ),
+        # 📌 response_cache_path가 있으면 SQLite 파일에 영구 저장
+        response_cache=ResponseCache(
+            max_entries=RESPONSE_CACHE_SIZE,
+            ttl=RESPONSE_CACHE_TTL,
+            path=secrets.get("response_cache_path"),
+            shared=shared_state
+        ),
+        prompt_builder=PromptBuilder(
+            token_budget=int(gemini_secrets.get("prompt_token_budget", PROMPT_TOKEN_BUDGET)),
+            # 📌 [gemini].count_tokens = true면 모델 API로 토큰 계산
+            counter=TokenCounter(count_tokens if gemini_secrets.get("count_tokens", False) else None)
+        ),
+        feedback_store=feedback_store,
+        feedback_sync=FeedbackSync(feedback_store, open_sheet, pull_interval=SHEET_PULL_INTERVAL),
+        sheet_pool=sheet_pool,
+        # 📡 스트리밍 모드면 도착하는 조각을 바로 넘겨줌 ([gemini].stream으로 끌 수 있음)
+        stream=bool(gemini_secrets.get("stream", True)),
+        example_phrases=secrets.get("example_phrases", EXAMPLE_PHRASES),
+        shared_state=shared_state
+    )
+    
+    # ⚡ 예시 문구는 모든 모드로 미리 변환 (prefetch_examples = false로 끌 수 있음)
+    if secrets.get("prefetch_examples", True):
+        service.prefetcher = ExamplePrefetcher(
+            service, service.example_phrases, MODES, interval=PREFETCH_INTERVAL
+        )
+    return service
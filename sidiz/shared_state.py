@@ -0,0 +1,256 @@
+"""여러 앱 인스턴스가 함께 쓰는 공유 상태 (응답 캐시, 리미터 버킷, 부정 피드백 목록)
+
+    InProcessState  프로세스 안의 dict (단일 인스턴스, 공유 상태 서버 내부)
+    RemoteState     공유 상태 서버에 HTTP로 접속 (secrets의 shared_state_url, shared_state_token)
+
+공유 상태 서버: SHARED_STATE_TOKEN=... python -m sidiz.shared_state --port 8700
+모든 요청에 "Authorization: Bearer <token>" 헤더가 필요하고, 기본으로 127.0.0.1에서만 받는다
+(공유 캐시에 값을 넣을 수 있으면 모든 인스턴스가 그 답변을 내보내게 되므로).
+"""
+import argparse
+import hmac
+import http.client
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+OPERATIONS = ("get", "set", "consume", "available", "append", "read")
+
+
+class SharedStateError(RuntimeError):
+    pass
+
+
+class InProcessState:
+    """공유 상태의 기준 구현 - 모든 연산은 하나의 락 안에서 원자적으로 실행된다
+    
+    값은 JSON으로 보낼 수 있는 것만 저장한다 (RemoteState와 같은 동작을 보장하기 위해).
+    epoch는 인스턴스마다 새로 만들어지므로, 서버가 다시 시작되어 목록 순번이 처음부터
+    다시 매겨진 것을 읽는 쪽이 알아챌 수 있다.
+    """
+    
+    def __init__(self, clock=time.time):
+        self.epoch = uuid.uuid4().hex
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values = {}  # key -> (value, 만료 시각 또는 None)
+        self._buckets = {}  # name -> [남은 양, 마지막 충전 시각]
+        self._logs = {}  # key -> [(순번, 값)]
+        self._sequence = 0
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._values[key]
+                return None
+            return value
+    
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._values[key] = (value, None if ttl is None else self._clock() + ttl)
+            # 만료된 값 정리 (쓰기 때마다 오래된 쪽 일부만)
+            now = self._clock()
+            expired = [
+                k for k, (_, expires_at) in itertools.islice(self._values.items(), 64)
+                if expires_at is not None and now >= expires_at
+            ]
+            for k in expired:
+                del self._values[k]
+    
+    def _level(self, name, rate, capacity, now):
+        bucket = self._buckets.setdefault(name, [float(capacity), now])
+        bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        return bucket
+    
+    def consume(self, buckets):
+        """[(이름, 양, 초당 충전량, 용량)] 버킷에서 한꺼번에 차감
+        
+        모두 충분하면 차감하고 0, 하나라도 부족하면 아무것도 차감하지 않고 기다릴 시간(초)을 반환한다.
+        """
+        with self._lock:
+            now = self._clock()
+            levels = [(self._level(name, rate, capacity, now), min(amount, capacity), rate)
+                      for name, amount, rate, capacity in buckets]
+            wait = max(
+                (max(0.0, amount - bucket[0]) / rate for bucket, amount, rate in levels),
+                default=0.0
+            )
+            if wait > 0:
+                return wait
+            for bucket, amount, _ in levels:
+                bucket[0] -= amount
+            return 0.0
+    
+    def available(self, name, rate, capacity):
+        """버킷에 남은 양 (차감하지 않음)"""
+        with self._lock:
+            return self._level(name, rate, capacity, self._clock())[0]
+    
+    def append(self, key, value, limit=1000):
+        """목록 끝에 추가하고 순번 반환 (limit개를 넘으면 오래된 것부터 버림)"""
+        with self._lock:
+            self._sequence += 1
+            log = self._logs.setdefault(key, [])
+            log.append((self._sequence, value))
+            del log[:-limit]
+            return self._sequence
+    
+    def read(self, key, after=0, epoch=None):
+        """순번이 after보다 큰 항목 - {"epoch": 서버 epoch, "entries": [[순번, 값]]}
+        
+        epoch가 주어졌는데 지금 epoch와 다르면(서버 재시작) after를 무시하고 처음부터 돌려준다.
+        """
+        if epoch is not None and epoch != self.epoch:
+            after = 0
+        with self._lock:
+            entries = [[sequence, value] for sequence, value in self._logs.get(key, []) if sequence > after]
+        return {"epoch": self.epoch, "entries": entries}
+
+
+class RemoteState:
+    """공유 상태 서버 클라이언트 (스레드마다 keep-alive 연결 하나)
+    
+    서버에 닿지 않으면 SharedStateError를 낸다 - 호출하는 쪽이 로컬 동작으로 대체한다.
+    연결에 실패하면 cooldown 동안은 접속을 시도하지 않고 바로 SharedStateError를 낸다
+    (변환 한 번에 여러 번 호출하므로, 서버가 응답하지 않을 때 매번 timeout만큼 기다리지 않도록).
+    """
+    
+    def __init__(self, url, token, timeout=2.0, cooldown=5.0):
+        parts = urlsplit(url)
+        self._host = parts.hostname
+        self._port = parts.port or 80
+        self._headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self._unavailable_until = 0.0  # 이 시각(time.monotonic)까지 접속 시도 안 함
+        self._local = threading.local()
+    
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+    
+    def _call(self, op, *args):
+        if time.monotonic() < self._unavailable_until:
+            raise SharedStateError("공유 상태 서버 연결 실패 후 대기 중")
+        body = json.dumps({"op": op, "args": args}, ensure_ascii=False).encode("utf-8")
+        reused = getattr(self._local, "connection", None) is not None
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request("POST", "/", body, self._headers)
+                response = connection.getresponse()
+                payload = json.loads(response.read())
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                connection.close()
+                self._local.connection = None
+                if attempt or not reused or isinstance(e, TimeoutError):
+                    # 새 연결도 실패했거나 응답이 없음 - 서버 장애로 보고 cooldown 동안 호출하지 않음
+                    self._unavailable_until = time.monotonic() + self.cooldown
+                    raise SharedStateError(f"공유 상태 서버 연결 실패: {e}") from e
+                # 끊긴 keep-alive 연결(서버 재시작 등)이면 한 번 다시 연결
+                continue
+            if response.status != 200:
+                raise SharedStateError(payload.get("error", f"HTTP {response.status}"))
+            return payload["result"]
+    
+    def get(self, key):
+        return self._call("get", key)
+    
+    def set(self, key, value, ttl=None):
+        return self._call("set", key, value, ttl)
+    
+    def consume(self, buckets):
+        return self._call("consume", [list(bucket) for bucket in buckets])
+    
+    def available(self, name, rate, capacity):
+        return self._call("available", name, rate, capacity)
+    
+    def append(self, key, value, limit=1000):
+        return self._call("append", key, value, limit)
+    
+    def read(self, key, after=0, epoch=None):
+        return self._call("read", key, after, epoch)
+
+
+def build_shared_state(url, token=None):
+    """secrets의 shared_state_url로 백엔드 선택 - 없으면 None (인스턴스별 로컬 상태)
+    
+    url이 있는데 token이 없으면 ValueError를 낸다.
+    """
+    if not url:
+        return None
+    if not token:
+        raise ValueError("shared_state_url을 쓰려면 shared_state_token이 필요합니다")
+    return RemoteState(url, token)
+
+
+def serve_shared_state(port, token, state=None, host="127.0.0.1"):
+    """공유 상태 서버를 백그라운드 스레드로 시작 - (서버, 상태) 반환"""
+    if not token:
+        raise ValueError("공유 상태 서버에는 token이 필요합니다 (인증 없이 열지 않음)")
+    state = InProcessState() if state is None else state
+    authorization = f"Bearer {token}".encode("utf-8")
+    
+    class SharedStateHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                if not hmac.compare_digest(self.headers.get("Authorization", "").encode("latin-1"), authorization):
+                    status, payload = 401, {"error": "unauthorized"}
+                else:
+                    request = json.loads(body)
+                    if request.get("op") not in OPERATIONS:
+                        raise ValueError(f"알 수 없는 연산: {request.get('op')}")
+                    status, payload = 200, {"result": getattr(state, request["op"])(*request.get("args", []))}
+            except (ValueError, TypeError) as e:
+                status, payload = 400, {"error": str(e)}
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), SharedStateHandler)
+    threading.Thread(target=server.serve_forever, name="shared-state-server", daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시디즈 앱 공유 상태 서버")
+    parser.add_argument("--host", default="127.0.0.1", help="다른 호스트의 인스턴스가 접속하려면 0.0.0.0")
+    parser.add_argument("--port", type=int, default=8700)
+    args = parser.parse_args()
+    
+    # 토큰은 명령줄(ps에 보임) 대신 환경 변수로 받음
+    token = os.environ.get("SHARED_STATE_TOKEN")
+    if not token:
+        parser.error("SHARED_STATE_TOKEN 환경 변수가 필요합니다")
+    server, _ = serve_shared_state(args.port, token, host=args.host)
+    print(f"listening on http://{args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import threading
+from datetime import datetime
+
+from sidiz.metrics import METRICS
+
+STALE_HANDLE_STATUS = {401, 404}
+
+
+def is_stale_handle_error(exc):
+    """클라이언트/워크시트 핸들을 다시 만들면 해결될 수 있는 오류인지 확인"""
+    from google.auth.exceptions import RefreshError
+    
+    if isinstance(exc, RefreshError):
+        return True
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None) in STALE_HANDLE_STATUS
+
+
+class SheetPool:
+    """프로세스 전체에서 공유하는 gspread 클라이언트와 워크시트 핸들
+    
+    클라이언트(인증 세션)와 워크시트는 한 번 만들어 재사용하고,
+    인증/404 오류가 나면 다시 만든 뒤 한 번 재시도한다.
+    """
+    
+    def __init__(self, build_client):
+        self._build_client = build_client  # 새 gspread 클라이언트를 만드는 함수
+        self._lock = threading.Lock()
+        self._client = None
+        self._worksheets = {}  # 시트 URL -> 첫 번째 워크시트
+        self.last_success = None
+        self.last_error = None
+    
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._build_client()
+            return self._client
+    
+    def worksheet(self, url):
+        with self._lock:
+            worksheet = self._worksheets.get(url)
+        if worksheet is not None:
+            return worksheet
+        
+        worksheet = self.client().open_by_url(url).sheet1
+        with self._lock:
+            self._worksheets[url] = worksheet
+        return worksheet
+    
+    def handle(self, url):
+        """네트워크 I/O 없이 워크시트 핸들 반환 (실제 열기는 첫 호출 때)"""
+        return WorksheetHandle(self, url)
+    
+    def reset(self):
+        with self._lock:
+            self._client = None
+            self._worksheets.clear()
+    
+    def run(self, url, action, name="call"):
+        """action(worksheet) 실행 - 오래된 핸들이면 새로 만들어 한 번 재시도"""
+        with METRICS.span("sheets", method=name):
+            return self._run(url, action)
+    
+    def _run(self, url, action):
+        try:
+            result = action(self.worksheet(url))
+        except Exception as e:
+            if not is_stale_handle_error(e):
+                self._record_error(e)
+                raise
+            self.reset()
+            try:
+                result = action(self.worksheet(url))
+            except Exception as retry_error:
+                self._record_error(retry_error)
+                raise
+        self.last_success = datetime.now()
+        self.last_error = None
+        return result
+    
+    def _record_error(self, exc):
+        self.last_error = (datetime.now(), f"{type(exc).__name__}: {exc}")
+    
+    def check(self, url):
+        """헤더 셀 한 번 읽어 연결 상태 확인"""
+        try:
+            self.run(url, lambda worksheet: worksheet.cell(1, 1), name="check")
+            return True
+        except Exception:
+            return False
+    
+    def health(self):
+        """최근 호출 결과 기준 상태 (시트 읽기 없음)"""
+        if self.last_error is not None:
+            return "error"
+        if self.last_success is not None:
+            return "ok"
+        return "unknown"
+
+
+class WorksheetHandle:
+    """워크시트 메서드 호출을 SheetPool.run()으로 감싸는 핸들
+    
+    속성 읽기(row_count 등)도 워크시트를 여는 과정에서 인증/404 오류가 날 수 있으므로
+    같은 재시도/오류 기록을 거친다.
+    """
+    
+    def __init__(self, pool, url):
+        self._pool = pool
+        self._url = url
+    
+    def __getattr__(self, name):
+        # 속성 조회는 지표 span 없이 (메서드 호출은 아래 call에서 한 번만 기록)
+        attr = self._pool._run(self._url, lambda worksheet: getattr(worksheet, name))
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            return self._pool.run(self._url, lambda worksheet: getattr(worksheet, name)(*args, **kwargs), name=name)
+        
+        return call
@@ -1,10 +1,13 @@
 import streamlit as st
-import google.generativeai as genai
-from google.oauth2.service_account import Credentials
-import gspread
+from collections import deque
 from datetime import datetime
-import pandas as pd
-import time
+import hashlib
+
+from sidiz.api import start_api_server
+from sidiz.bulk import BulkJob, read_phrases
+from sidiz.metrics import METRICS, classify_error, serve_metrics
+from sidiz.service import build_service
+from sidiz.responses import StreamCollector, split_source
 
 st.set_page_config(
     page_title="시디즈 UX 라이팅 가이드",
@@ -13,85 +16,41 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-def get_gsheet_client():
-    try:
-        if "gcp_service_account" not in st.secrets:
-            return None
-            
-        credentials = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=[
-                "https://www.googleapis.com/auth/spreadsheets",
-                "https://www.googleapis.com/auth/drive"
-            ]
-        )
-        return gspread.authorize(credentials)
-    except Exception as e:
-        st.sidebar.warning("⚠️ Google Sheets 연동 안됨")
-        return None
+try:
+    st.secrets["gemini"]["api_key"]
+except KeyError as e:
+    st.error(f"❌ Secrets 설정 오류: {e}")
+    st.stop()
+
+@st.cache_resource
+def get_service():
+    # 모델, 캐시, 리미터, 피드백 저장소를 프로세스 전체(모든 세션 + HTTP API)에서 공유
+    return build_service(st.secrets)
+
+@st.cache_resource
+def start_metrics_server(port, host):
+    # 📈 /metrics (Prometheus), /metrics.jsonl - 프로세스당 한 번만 시작
+    return serve_metrics(port, host=host)
+
+if "metrics_port" in st.secrets:
+    start_metrics_server(int(st.secrets["metrics_port"]), st.secrets.get("metrics_host", "127.0.0.1"))
+
+@st.cache_resource
+def start_conversion_api(port, token, host):
+    # 🔌 변환 HTTP API (/convert, /convert/batch, /compare, /feedback) - 프로세스당 한 번만 시작
+    return start_api_server(get_service(), port, token, host)
+
+if "api_port" in st.secrets:
+    # 🔒 인증 없이는 열지 않음 (기본은 127.0.0.1에서만 받음)
+    if st.secrets.get("api_token"):
+        start_conversion_api(int(st.secrets["api_port"]), st.secrets["api_token"], st.secrets.get("api_host", "127.0.0.1"))
+    else:
+        st.error("❌ Secrets 설정 오류: api_port를 쓰려면 api_token이 필요합니다")
 
 def save_feedback_to_sheet(original_text, converted_text, feedback, mode, reason="", comment=""):
     try:
-        # 🔍 Step 1: Secrets 확인
-        if "gcp_service_account" not in st.secrets:
-            st.error("❌ Secrets에 [gcp_service_account] 섹션이 없습니다!")
-            st.info("Streamlit Cloud 설정 → Secrets에 [gcp_service_account] 추가 필요")
-            return False
-        
-        if "feedback_sheet_url" not in st.secrets:
-            st.error("❌ Secrets에 feedback_sheet_url이 없습니다!")
-            st.info("Streamlit Cloud 설정 → Secrets에 feedback_sheet_url 추가 필요")
-            return False
-        
-        # 🔍 Step 2: Google Sheets Client 생성
-        client = get_gsheet_client()
-        if client is None:
-            st.error("❌ Google Sheets 클라이언트 생성 실패!")
-            st.info("Service Account 인증 정보를 확인하세요")
-            return False
-        
-        # 🔍 Step 3: Sheet URL 가져오기
-        sheet_url = st.secrets.get("feedback_sheet_url", "")
-        if not sheet_url:
-            st.error("❌ feedback_sheet_url이 비어있습니다!")
-            return False
-        
-        st.info(f"📝 시트 열기 시도: {sheet_url[:50]}...")
-        
-        # 🔍 Step 4: Sheet 열기
-        try:
-            sheet = client.open_by_url(sheet_url).sheet1
-            st.success("✅ 시트 열기 성공!")
-        except Exception as sheet_error:
-            st.error(f"❌ 시트 열기 실패: {str(sheet_error)}")
-            st.warning("가능한 원인:")
-            st.markdown("""
-            1. Service Account에 시트 편집 권한이 없음
-            2. 시트 URL이 잘못됨
-            3. 시트가 삭제됨
-            """)
-            return False
-        
-        # 🔍 Step 5: 헤더 확인
-        if sheet.row_count == 0 or sheet.cell(1, 1).value != "시간":
-            st.info("📝 헤더 생성 중...")
-            sheet.insert_row(["시간", "모드", "원본 문구", "변환된 문구", "피드백", "피드백값", "싫어요 사유", "코멘트"], 1)
-        
-        # 🔍 Step 6: 데이터 저장
-        row = [
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            mode,
-            original_text,
-            converted_text,
-            "👍" if feedback == 1 else "👎",
-            feedback,
-            reason,
-            comment
-        ]
-        
-        st.info("💾 데이터 저장 중...")
-        sheet.append_row(row)
-        st.success("✅ 데이터 저장 완료!")
+        # 💾 로컬 저장소에 저장 (시트 동기화는 백그라운드에서 일괄 처리, 시트 연동이 없어도 저장됨)
+        get_service().save_feedback(original_text, converted_text, feedback, mode, reason, comment)
         
         return True
         
@@ -102,114 +61,93 @@ def save_feedback_to_sheet(original_text, converted_text, feedback, mode, reason
             st.code(traceback.format_exc())
         return False
 
-def load_negative_feedback():
-    try:
-        client = get_gsheet_client()
-        if client is None:
-            return ""
-        
-        sheet_url = st.secrets.get("feedback_sheet_url", "")
-        if not sheet_url:
-            return ""
-        
-        sheet = client.open_by_url(sheet_url).sheet1
-        records = sheet.get_all_records()
-        
-        if not records:
-            return ""
-        
-        df = pd.DataFrame(records)
-        negative_df = df[df['피드백값'] == 0]
-        
-        if negative_df.empty:
-            return ""
-        
-        negative_examples = ""
-        for _, row in negative_df.tail(10).iterrows():
-            negative_examples += f"""
-원본: "{row['원본 문구']}"
-나쁜 변환: "{row['변환된 문구']}" 
-사유: {row.get('싫어요 사유', 'N/A')}
-코멘트: {row.get('코멘트', 'N/A')}
-← 이런 스타일 절대 피하기
-"""
-        
-        return f"""
-[사용자가 싫어한 변환 스타일 - 절대 사용 금지]
-{negative_examples}
-"""
-        
-    except Exception as e:
-        return ""
-
-try:
-    GOOGLE_API_KEY = st.secrets["gemini"]["api_key"]
-    genai.configure(api_key=GOOGLE_API_KEY)
-    
-    model_list = [m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
-    target = next((m for m in model_list if "1.5-flash" in m), model_list[0])
-    
-except KeyError as e:
-    st.error(f"❌ Secrets 설정 오류: {e}")
-    st.stop()
+def log_api_call(full_prompt, prompt_tokens):
+    # 🔍 API 호출 로깅 (세션별)
+    st.session_state.api_call_count += 1
+    st.session_state.api_call_log.append({
+        "count": st.session_state.api_call_count,
+        "time": datetime.now().strftime("%H:%M:%S"),
+        "prompt_length": len(full_prompt),
+        "prompt_tokens": prompt_tokens
+    })
+
+def show_queue_position(queue_status):
+    # ⏱️ 공유 리미터 대기 중이면 대기열 위치 표시 (버킷이 비었을 때만 대기)
+    def on_wait(position, wait_time):
+        queue_status.info(f"⏳ 대기열 {position}번째 · 예상 대기 {wait_time:.0f}초")
+    return on_wait
+
+def show_retry(queue_status):
+    # 🔁 할당량 초과/서버 오류로 재시도를 기다리는 중이면 안내
+    def on_retry(attempt, delay, error_class):
+        queue_status.warning(f"🔁 일시적인 오류({error_class}) - {delay:.0f}초 후 다시 시도합니다 ({attempt}회차)")
+    return on_retry
+
+def request_conversion(mode, user_input, negative_feedback):
+    """Gemini API 호출로 문구 변환 - 답변 텍스트 조각을 순서대로 반환"""
+    queue_status = st.empty()
+    with st.spinner(f"시디즈 {mode} 톤으로 변환 중..."):
+        chunks = get_service().stream_conversion(
+            mode, user_input, negative_feedback,
+            on_wait=show_queue_position(queue_status), on_call=log_api_call, on_retry=show_retry(queue_status)
+        )
+    queue_status.empty()
+    return chunks
+
+def request_comparison(modes, user_input, force_refresh=False):
+    """여러 모드 변환을 한 번의 호출로 받아 ({모드: 변환 결과}, 캐시 사용 여부) 반환"""
+    queue_status = st.empty()
+    with st.spinner(f"시디즈 {' · '.join(modes)} 톤으로 동시 변환 중..."):
+        result = get_service().compare(
+            modes, user_input, force_refresh,
+            on_wait=show_queue_position(queue_status), on_call=log_api_call, on_retry=show_retry(queue_status)
+        )
+    queue_status.empty()
+    return result
 
-@st.cache_resource
-def get_gemini_model():
-    model_list = [m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
-    target = next((m for m in model_list if "1.5-flash" in m), model_list[0])
-    return genai.GenerativeModel(target)
+BULK_MAX_WORKERS = 4  # 일괄 변환 동시 실행 수 (속도는 공유 리미터가 조절)
+BULK_BATCH_SIZE = 10  # 한 번의 요청에 묶을 문구 수 (1이면 문구별 개별 호출)
 
-def generate_prompt(mode, user_input, negative_feedback):
-    """모드별 프롬프트 생성"""
-    
-    base_instruction = f"""
-너는 시디즈의 전문 UX 라이터야. 사용자가 입력한 일반 문구를 시디즈만의 브랜드 보이스로 변환해줘.
+TRANSCRIPT_WINDOW = 10  # 위젯과 함께 보여줄 최근 대화 수 (질문+답변 한 쌍 기준)
+ARCHIVE_LIMIT = 200  # 보관할 이전 메시지 수 (초과분은 삭제)
+ARCHIVE_PAGE_SIZE = 10  # 이전 대화 한 페이지에 보여줄 메시지 수
+API_CALL_LOG_LIMIT = 50  # 세션별 API 호출 로그 보관 수
 
-[시디즈 브랜드 보이스 핵심]
-- 전문적이면서도 따뜻한 조력자
-- 사용자 중심의 세심한 배려
-- 혁신과 지속가능성에 대한 진정성
+def new_message(role, content, **fields):
+    """메시지 생성 - 위젯 키로 쓸 고유 id 부여 (보관 후에도 키가 바뀌지 않음)"""
+    message_id = st.session_state.next_message_id
+    st.session_state.next_message_id += 1
+    return {"id": message_id, "role": role, "content": content, **fields}
 
-{negative_feedback}
-"""
+def load_bulk_job(uploaded_file, modes):
+    """업로드 파일의 일괄 변환 작업 - 같은 파일/모드면 기존 작업을 유지해 실패 후 이어서 변환
     
-    if mode == "UX":
-        mode_instruction = """
-[UX 모드 - 브랜드 감성 & 친절한 조력자]
-
-변환 시 다음에 집중하세요:
-1. 감성적 연결: 사용자의 감정과 니즈에 공감
-2. 친절한 안내: 따뜻하고 접근하기 쉬운 톤
-3. 경험 중심: 사용자가 느낄 경험 강조
-4. 신뢰감: 과장 없이 진솔한 표현
-
-예시:
-"편안한 의자" → "하루 종일 앉아 있어도 지치지 않도록, 당신의 몸을 세심하게 배려한 시팅 경험을 제공합니다"
-"""
-    
-    else:  # SEO/GEO 모드
-        mode_instruction = """
-[SEO/GEO 모드 - 검색 최적화 + 증거 기반]
-
-포함 요소:
-1. 핵심 키워드: 허리 편한 의자, 인체공학 의자, 척추 건강, 요통 완화
-2. 데이터 근거: "시디즈 연구소 기반", "20년 노하우", "(kr.sidiz.com)"
-3. 명확한 문장: 주어+서술어, 핵심 정보 앞배치
-4. 브랜드 톤 유지
-
-예시:
-"편안한 의자" → "시디즈 인체공학 의자는 장시간 착석 시 허리 편안함을 제공하는 사무용 의자로, 척추 건강을 고려한 요추 지지 설계가 특징입니다. (kr.sidiz.com)"
-"""
+    파일을 읽을 수 없으면 오류만 표시하고 None (대화 화면은 그대로 그려지도록 st.stop()하지 않음)
+    """
+    file_data = uploaded_file.getvalue()
+    job_key = (hashlib.sha256(file_data).hexdigest(), tuple(modes))
+    if st.session_state.get("bulk_job_key") != job_key:
+        try:
+            st.session_state.bulk_job = BulkJob(read_phrases(uploaded_file.name, file_data), modes)
+        except Exception as e:
+            st.error(f"❌ 파일을 읽을 수 없습니다: {e}")
+            return None
+        st.session_state.bulk_job_key = job_key
+    return st.session_state.bulk_job
+
+def archive_old_messages():
+    """최근 TRANSCRIPT_WINDOW 대화만 남기고 이전 메시지는 위젯 없는 보관함으로 이동"""
+    messages = st.session_state.messages
+    while len(messages) > TRANSCRIPT_WINDOW * 2 or (messages and messages[0]["role"] != "user"):
+        st.session_state.archived_messages.append(messages.pop(0))
     
-    return f"""
-{base_instruction}
-
-{mode_instruction}
-
-사용자 입력: "{user_input}"
-
-위 입력을 {mode} 모드에 맞춰 변환해줘. 오직 변환된 문구만 출력하고, 부가 설명은 하지 마.
-"""
+    live_ids = {str(message["id"]) for message in messages}
+    st.session_state.feedback_saved = {
+        key for key in st.session_state.feedback_saved if str(key).split("_")[0] in live_ids
+    }
+    st.session_state.open_dislike_forms = {
+        key for key in st.session_state.open_dislike_forms if str(key).split("_")[0] in live_ids
+    }
 
 if "mode_selected" not in st.session_state:
     st.session_state.mode_selected = None
@@ -217,26 +155,29 @@ if "mode_selected" not in st.session_state:
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-if "feedback_data" not in st.session_state:
-    st.session_state.feedback_data = {}
-
 if "feedback_saved" not in st.session_state:
     st.session_state.feedback_saved = set()
 
-if "negative_feedback" not in st.session_state:
-    st.session_state.negative_feedback = load_negative_feedback()
+# 서비스 준비 (시트 동기화 시작) + 부정 피드백 색인 예열 (로컬 저장소만 읽음)
+get_service().negative_feedback_cache.refresh()
 
-if "show_dislike_form" not in st.session_state:
-    st.session_state.show_dislike_form = None
+if "compare_modes" not in st.session_state:
+    st.session_state.compare_modes = False
+
+if "open_dislike_forms" not in st.session_state:
+    st.session_state.open_dislike_forms = set()  # 싫어요 상세 폼이 열린 피드백 키
 
 if "api_call_count" not in st.session_state:
     st.session_state.api_call_count = 0
 
 if "api_call_log" not in st.session_state:
-    st.session_state.api_call_log = []
+    st.session_state.api_call_log = deque(maxlen=API_CALL_LOG_LIMIT)
+
+if "archived_messages" not in st.session_state:
+    st.session_state.archived_messages = deque(maxlen=ARCHIVE_LIMIT)
 
-if "last_api_call_time" not in st.session_state:
-    st.session_state.last_api_call_time = None
+if "next_message_id" not in st.session_state:
+    st.session_state.next_message_id = 0
 
 if st.session_state.mode_selected is None:
     st.title("✏️ 시디즈 UX 라이팅 가이드")
@@ -296,15 +237,66 @@ with col1:
     if st.button("🔄 모드 변경"):
         st.session_state.mode_selected = None
         st.session_state.messages = []
+        st.session_state.archived_messages.clear()
         st.rerun()
 
 with col2:
     if st.button("🗑️ 대화 초기화"):
         st.session_state.messages = []
-        st.session_state.feedback_data = {}
+        st.session_state.archived_messages.clear()
         st.session_state.feedback_saved = set()
+        st.session_state.open_dislike_forms = set()
         st.rerun()
 
+with col3:
+    st.toggle("🆚 UX · SEO/GEO 동시 비교", key="compare_modes", help="한 번의 요청으로 두 모드 결과를 나란히 보여줍니다")
+
+with st.expander("📂 일괄 변환 (CSV/XLSX 업로드)"):
+    uploaded_file = st.file_uploader(
+        "변환할 문구 파일",
+        type=["csv", "xlsx"],
+        help="'원본 문구' 열(없으면 첫 번째 열)의 문구를 변환합니다"
+    )
+    bulk_modes = st.multiselect("변환 모드", ["UX", "SEO/GEO"], default=[st.session_state.mode_selected])
+    
+    bulk_job = load_bulk_job(uploaded_file, bulk_modes) if uploaded_file is not None and bulk_modes else None
+    
+    if bulk_job is not None:
+        st.caption(f"문구 {len(bulk_job.phrases)}개 × 모드 {len(bulk_job.modes)}개 = 총 {bulk_job.total}건")
+        
+        if bulk_job.pending():
+            button_label = "▶️ 일괄 변환 시작" if bulk_job.done == 0 else "⏯️ 남은 항목 이어서 변환"
+            if st.button(button_label, type="primary"):
+                progress_bar = st.progress(bulk_job.done / bulk_job.total)
+                
+                def show_bulk_progress(job):
+                    progress_bar.progress(job.done / job.total, text=f"{job.done}/{job.total}건 완료")
+                
+                service = get_service()
+                if BULK_BATCH_SIZE > 1:
+                    bulk_job.run_batched(
+                        service.convert_many,
+                        batch_size=BULK_BATCH_SIZE,
+                        max_workers=BULK_MAX_WORKERS,
+                        on_progress=show_bulk_progress
+                    )
+                else:
+                    bulk_job.run(service.convert_one, max_workers=BULK_MAX_WORKERS, on_progress=show_bulk_progress)
+        
+        if bulk_job.errors:
+            st.warning(f"⚠️ {len(bulk_job.errors)}건 실패 - 버튼을 다시 누르면 실패한 항목만 이어서 변환합니다")
+            with st.expander("실패 항목 보기"):
+                for (index, mode), error in bulk_job.errors.items():
+                    st.text(f"[{mode}] {bulk_job.phrases[index]} - {error}")
+        
+        if bulk_job.done:
+            st.download_button(
+                f"💾 결과 다운로드 ({bulk_job.done}/{bulk_job.total}건)",
+                bulk_job.to_csv(),
+                file_name="sidiz_bulk_conversion.csv",
+                mime="text/csv"
+            )
+
 st.markdown("---")
 
 if len(st.session_state.messages) == 0:
@@ -316,192 +308,252 @@ if len(st.session_state.messages) == 0:
     st.markdown("### 💬 변환할 문구를 입력하세요")
     st.markdown("**예시:**")
     
+    # ⚡ 예시 문구는 백그라운드에서 미리 변환되어 바로 응답
+    example_phrases = get_service().example_phrases
+    half = (len(example_phrases) + 1) // 2
     col1, col2 = st.columns(2)
     with col1:
-        st.code("편안한 의자", language=None)
-        st.code("허리가 아파요", language=None)
+        for phrase in example_phrases[:half]:
+            st.code(phrase, language=None)
     with col2:
-        st.code("T50 의자", language=None)
-        st.code("가성비 좋은 의자", language=None)
+        for phrase in example_phrases[half:]:
+            st.code(phrase, language=None)
+
+MODE_EMOJI = {"UX": "🎨", "SEO/GEO": "🔍"}
+COMPARE_MODES = ["UX", "SEO/GEO"]
+
+DISLIKE_REASONS = [
+    "선택하세요",
+    "브랜드 톤이 맞지 않음",
+    "너무 형식적임",
+    "너무 길어요",
+    "너무 짧아요",
+    "키워드가 부족함",
+    "과장된 표현",
+    "원문과 너무 달라짐",
+    "출처가 부적절함",
+    "기타"
+]
+
+def render_answer(content):
+    # 출처 분리
+    main_text, source_url = split_source(content)
+    
+    # 본문 출력
+    st.markdown(main_text)
+    
+    # 출처가 있으면 한 줄 띄우고 하이퍼링크로 출력
+    if source_url:
+        if not source_url.startswith("http"):
+            source_url = "https://" + source_url
+        st.markdown("")  # 한 줄 공백
+        st.markdown(f"📎 출처: [{source_url}]({source_url})")
+
+def render_stats_table(label, table, current=None):
+    # {키: {"like": n, "dislike": n}} -> 마크다운 표 (current 키에는 '현재' 표시)
+    rows = []
+    for key, counts in table.items():
+        total = counts["like"] + counts["dislike"]
+        name = (key or "(없음)") + (" (현재)" if current is not None and key == current else "")
+        rows.append(f"| {name} | {counts['like']} | {counts['dislike']} | {counts['like'] / total * 100:.0f}% |")
+    return f"| {label} | 👍 | 👎 | 만족도 |\n|---|---|---|---|\n" + "\n".join(rows)
+
+def regenerate_answer(index):
+    """index번 답변을 지우고 같은 입력으로 캐시 없이 다시 생성"""
+    st.session_state.regenerate_prompt = st.session_state.messages[index-1]["content"]
+    st.session_state.messages = st.session_state.messages[:index-1]
+    st.session_state.open_dislike_forms = set()
+    archive_old_messages()
+    st.rerun()
 
-for i, message in enumerate(st.session_state.messages):
-    with st.chat_message(message["role"]):
-        content = message["content"]
-        main_text = content
-        source_url = None
-        
-        # 출처 분리
-        if "\n출처: " in content:
-            parts = content.split("\n출처: ")
-            main_text = parts[0]
-            source_url = parts[1].strip() if len(parts) > 1 else None
-        
-        if message["role"] == "assistant":
-            # 본문 출력
-            st.markdown(main_text)
-            
-            # 출처가 있으면 한 줄 띄우고 하이퍼링크로 출력
-            if source_url:
-                if not source_url.startswith("http"):
-                    source_url = "https://" + source_url
-                st.markdown("")  # 한 줄 공백
-                st.markdown(f"📎 출처: [{source_url}]({source_url})")
-            
-            # 피드백 영역
-            st.markdown("")  # 한 줄 공백
-            st.caption("💡 더 나은 답변을 위해 피드백을 남겨주세요")
+@st.fragment
+def render_feedback(feedback_key, original, converted, mode, regenerate_index=None):
+    """👍/👎 버튼과 싫어요 상세 폼 (feedback_key: 메시지 id, 비교 답변은 "id_모드")
+    
+    fragment라서 버튼을 누르면 이 영역만 다시 실행된다 (대화 전체를 다시 그리지 않음).
+    """
+    st.markdown("")  # 한 줄 공백
+    st.caption("💡 더 나은 답변을 위해 피드백을 남겨주세요")
+    
+    col1, col2, col3, col_space = st.columns([0.8, 0.8, 0.8, 4.2])
+    
+    with col1:
+        if st.button("👍 좋아요", key=f"like_{feedback_key}"):
+            if feedback_key not in st.session_state.feedback_saved:
+                # 로컬 피드백 저장소(SQLite)에 저장 후 바로 반환 (시트 동기화는 백그라운드)
+                save_result = save_feedback_to_sheet(original, converted, 1, mode)
+                
+                if save_result:
+                    st.toast("✅ 피드백이 저장되었습니다!")
+                    st.session_state.feedback_saved.add(feedback_key)
+                else:
+                    st.error("❌ 피드백 저장 실패")
+                    st.warning("피드백 저장소(feedback_db_path) 파일에 쓸 수 있는지 확인해주세요.")
+    
+    with col2:
+        if st.button("👎 싫어요", key=f"dislike_{feedback_key}"):
+            st.session_state.open_dislike_forms.add(feedback_key)
+    
+    # 마지막 답변은 캐시를 건너뛰고 다시 생성 가능
+    if regenerate_index is not None:
+        with col3:
+            if st.button("🔁 다시 생성", key=f"regenerate_{feedback_key}"):
+                regenerate_answer(regenerate_index)
+    
+    # 싫어요 상세 폼 (제출하면 다시 실행하지 않고 폼 영역만 비움)
+    if feedback_key in st.session_state.open_dislike_forms and feedback_key not in st.session_state.feedback_saved:
+        form_area = st.empty()
+        with form_area.container():
+            st.markdown("---")
+            st.markdown("#### 📝 피드백을 자세히 알려주세요")
             
-            col1, col2, col_space = st.columns([0.8, 0.8, 5])
+            reason = st.selectbox("싫어요 사유", DISLIKE_REASONS, key=f"reason_{feedback_key}")
             
-            with col1:
-                if st.button("👍 좋아요", key=f"like_{i}"):
-                    if i not in st.session_state.feedback_saved:
-                        original = st.session_state.messages[i-1]["content"] if i > 0 else ""
-                        
-                        # 🔍 디버깅: 저장 시도 로깅
-                        with st.spinner("피드백 저장 중..."):
-                            save_result = save_feedback_to_sheet(
-                                original, 
-                                message["content"], 
-                                1, 
-                                st.session_state.mode_selected
-                            )
-                        
-                        if save_result:
-                            st.success("✅ 피드백이 저장되었습니다!")
-                            st.session_state.feedback_saved.add(i)
-                        else:
-                            st.error("❌ 피드백 저장 실패")
-                            st.warning("Google Sheets 연동을 확인해주세요.")
-                        
-                        time.sleep(1)  # 사용자가 메시지 볼 시간
-                        st.rerun()
+            comment = st.text_area(
+                "추가 코멘트 (선택사항)",
+                placeholder="구체적인 피드백을 주시면 더 나은 답변을 만드는 데 도움이 됩니다.",
+                key=f"comment_{feedback_key}",
+                height=100
+            )
             
-            with col2:
-                if st.button("👎 싫어요", key=f"dislike_{i}"):
-                    st.session_state.show_dislike_form = i
-                    st.rerun()
+            submitted = st.button("📤 제출", key=f"submit_{feedback_key}", type="primary")
+        
+        if submitted:
+            if reason != "선택하세요":
+                # 로컬 피드백 저장소(SQLite)에 저장 후 바로 반환 (시트 동기화는 백그라운드)
+                save_result = save_feedback_to_sheet(original, converted, 0, mode, reason, comment)
+                
+                if save_result:
+                    st.toast("✅ 상세한 피드백 감사합니다!")
+                    st.session_state.feedback_saved.add(feedback_key)
+                    st.session_state.open_dislike_forms.discard(feedback_key)
+                    form_area.empty()
+                else:
+                    st.error("❌ 피드백 저장 실패")
+                    st.warning("피드백 저장소(feedback_db_path) 파일에 쓸 수 있는지 확인해주세요.")
+            else:
+                st.warning("사유를 선택해주세요.")
+
+def render_variants(variants):
+    columns = st.columns(len(variants))
+    for column, (variant_mode, text) in zip(columns, variants.items()):
+        with column:
+            st.markdown(f"**{MODE_EMOJI[variant_mode]} {variant_mode}**")
+            render_answer(text)
+
+if st.session_state.archived_messages:
+    # 📜 이전 대화 - 위젯 없이 텍스트만, 페이지 단위로 출력
+    archived = list(st.session_state.archived_messages)
+    with st.expander(f"📜 이전 대화 보기 ({len(archived)}개 메시지)"):
+        page_count = (len(archived) + ARCHIVE_PAGE_SIZE - 1) // ARCHIVE_PAGE_SIZE
+        page = st.number_input("페이지 (1 = 가장 최근)", min_value=1, max_value=page_count, value=1, key="archive_page")
+        end = len(archived) - (page - 1) * ARCHIVE_PAGE_SIZE
+        for message in archived[max(0, end - ARCHIVE_PAGE_SIZE):end]:
+            speaker = "🙋 입력" if message["role"] == "user" else "✏️ 변환"
+            st.markdown(f"**{speaker}**")
+            st.text(message["content"])
+
+for i, message in enumerate(st.session_state.messages):
+    with st.chat_message(message["role"]):
+        if message["role"] == "assistant":
+            original = st.session_state.messages[i-1]["content"] if i > 0 else ""
+            is_last = i == len(st.session_state.messages) - 1 and i > 0
             
-            # 싫어요 상세 폼
-            if st.session_state.show_dislike_form == i and i not in st.session_state.feedback_saved:
-                st.markdown("---")
-                st.markdown("#### 📝 피드백을 자세히 알려주세요")
+            if message.get("variants"):
+                # 🆚 모드 비교 답변 - 모드별로 따로 피드백
+                columns = st.columns(len(message["variants"]))
+                for column, (variant_mode, text) in zip(columns, message["variants"].items()):
+                    with column:
+                        st.markdown(f"**{MODE_EMOJI[variant_mode]} {variant_mode}**")
+                        render_answer(text)
+                        render_feedback(f"{message['id']}_{variant_mode}", original, text, variant_mode)
                 
-                reason = st.selectbox(
-                    "싫어요 사유",
-                    [
-                        "선택하세요",
-                        "브랜드 톤이 맞지 않음",
-                        "너무 형식적임",
-                        "너무 길어요",
-                        "너무 짧아요",
-                        "키워드가 부족함",
-                        "과장된 표현",
-                        "원문과 너무 달라짐",
-                        "출처가 부적절함",
-                        "기타"
-                    ],
-                    key=f"reason_{i}"
-                )
+                if message.get("cached"):
+                    st.caption("⚡ 저장된 변환 결과")
                 
-                comment = st.text_area(
-                    "추가 코멘트 (선택사항)",
-                    placeholder="구체적인 피드백을 주시면 더 나은 답변을 만드는 데 도움이 됩니다.",
-                    key=f"comment_{i}",
-                    height=100
-                )
+                if is_last and st.button("🔁 다시 생성", key=f"regenerate_{message['id']}"):
+                    regenerate_answer(i)
+            else:
+                render_answer(message["content"])
+                
+                if message.get("cached"):
+                    st.caption("⚡ 저장된 변환 결과")
                 
-                if st.button("📤 제출", key=f"submit_{i}", type="primary"):
-                    if reason != "선택하세요":
-                        original = st.session_state.messages[i-1]["content"] if i > 0 else ""
-                        
-                        # 🔍 디버깅: 저장 시도 로깅
-                        with st.spinner("피드백 저장 중..."):
-                            save_result = save_feedback_to_sheet(
-                                original, 
-                                message["content"], 
-                                0, 
-                                st.session_state.mode_selected, 
-                                reason, 
-                                comment
-                            )
-                        
-                        if save_result:
-                            st.success("✅ 상세한 피드백 감사합니다!")
-                            st.session_state.feedback_saved.add(i)
-                            st.session_state.show_dislike_form = None
-                            st.session_state.negative_feedback = load_negative_feedback()
-                        else:
-                            st.error("❌ 피드백 저장 실패")
-                            st.warning("Google Sheets 연동을 확인해주세요.")
-                        
-                        time.sleep(1)  # 사용자가 메시지 볼 시간
-                        st.rerun()
-                    else:
-                        st.warning("사유를 선택해주세요.")
+                # 피드백 영역
+                render_feedback(
+                    message["id"],
+                    original,
+                    message["content"],
+                    st.session_state.mode_selected,
+                    regenerate_index=i if is_last else None
+                )
         else:
             # 사용자 메시지는 그대로 출력
-            st.markdown(main_text)
+            st.markdown(split_source(message["content"])[0])
 
 prompt = st.chat_input("변환할 문구를 입력하세요...")
+force_refresh = False
+
+if "regenerate_prompt" in st.session_state:
+    prompt = st.session_state.pop("regenerate_prompt")
+    force_refresh = True
 
 if prompt:
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.messages.append(new_message("user", prompt))
     
     with st.chat_message("user"):
         st.markdown(prompt)
     
     with st.chat_message("assistant"):
         try:
-            # ⏱️ Rate Limiting 체크
-            if st.session_state.last_api_call_time:
-                time_since_last_call = (datetime.now() - st.session_state.last_api_call_time).total_seconds()
-                min_interval = 10  # 최소 10초 간격 (더 안전하게)
-                
-                if time_since_last_call < min_interval:
-                    wait_time = min_interval - time_since_last_call
-                    st.info(f"⏳ API 호출 간격 유지 중... {wait_time:.1f}초 후 자동 실행됩니다")
-                    st.caption(f"(마지막 호출: {st.session_state.last_api_call_time.strftime('%H:%M:%S')})")
-                    time.sleep(wait_time)
-            
-            model = get_gemini_model()
-            
-            full_prompt = generate_prompt(
-                st.session_state.mode_selected,
-                prompt,
-                st.session_state.negative_feedback
-            )
-            
-            # 🔍 API 호출 로깅
-            call_time = datetime.now()
-            st.session_state.api_call_count += 1
-            st.session_state.api_call_log.append({
-                "count": st.session_state.api_call_count,
-                "time": call_time.strftime("%H:%M:%S"),
-                "prompt_length": len(full_prompt)
-            })
-            st.session_state.last_api_call_time = call_time
+            mode = st.session_state.mode_selected
+            service = get_service()
             
-            # ✅ 재시도 제거 - 429 에러는 재시도해도 소용없음!
-            with st.spinner(f"시디즈 {st.session_state.mode_selected} 톤으로 변환 중... (API 호출 #{st.session_state.api_call_count})"):
-                response = model.generate_content(full_prompt)
-                assistant_message = response.text.strip()
+            if st.session_state.compare_modes:
+                # 🆚 두 모드를 한 번의 호출로 받아 나란히 출력 (캐시에 있는 모드는 제외)
+                variants, cached = request_comparison(COMPARE_MODES, prompt, force_refresh)
                 
-                st.markdown(assistant_message)
-                st.session_state.messages.append({"role": "assistant", "content": assistant_message})
+                render_variants(variants)
+                if cached:
+                    st.caption("⚡ 저장된 변환 결과 (API 호출 없음)")
+                
+                assistant_message = "\n\n".join(f"[{variant_mode}]\n{text}" for variant_mode, text in variants.items())
+                st.session_state.messages.append(
+                    new_message("assistant", assistant_message, variants=variants, cached=cached)
+                )
+            else:
+                # ⚡ 같은 모드/문구/피드백 버전이면 캐시된 결과 사용
+                negative_feedback = service.select_examples([mode], prompt)
+                assistant_message = None if force_refresh else service.cached(mode, prompt, negative_feedback)
+                cached = assistant_message is not None
+                
+                if cached:
+                    st.markdown(assistant_message)
+                    st.caption("⚡ 저장된 변환 결과 (API 호출 없음)")
+                else:
+                    # 📡 도착하는 대로 출력하고, 완성된 답변은 따로 모아 저장
+                    stream = StreamCollector(request_conversion(mode, prompt, negative_feedback))
+                    st.write_stream(stream)
+                    assistant_message = stream.text
+                    service.remember(mode, prompt, negative_feedback, assistant_message)
+                
+                st.session_state.messages.append(new_message("assistant", assistant_message, cached=cached))
             
         except Exception as e:
             error_str = str(e)
+            error_class = classify_error(e)
             
             st.error(f"❌ 오류 발생")
             
-            if "429" in error_str or "quota" in error_str.lower():
+            if error_class == "429":
                 st.error("⏱️ **API 할당량 초과**")
                 
                 # 실제 호출 횟수 표시
                 st.warning(f"""
                 **현재 세션 API 호출: {st.session_state.api_call_count}회**
                 
+                🔁 자동 재시도(다른 API 키/모델 전환 포함) 후에도 할당량이 부족했습니다.
+                
                 무료 티어 제한: 분당 15 요청
                 
                 📌 **가능한 원인:**
@@ -516,16 +568,16 @@ if prompt:
                 """)
                 
                 with st.expander("🔍 API 호출 로그 확인"):
-                    for log in st.session_state.api_call_log[-15:]:
+                    for log in list(st.session_state.api_call_log)[-15:]:
                         st.text(f"#{log['count']} - {log['time']}")
                 
                 error_message = "API 할당량이 초과되었습니다. 1-2분 후 다시 시도해주세요."
-            elif "400" in error_str or "invalid" in error_str.lower():
+            elif error_class == "400":
                 st.error("⚠️ **잘못된 요청**")
                 with st.expander("상세 오류 내용"):
                     st.code(error_str)
                 error_message = "일시적으로 서비스를 사용할 수 없습니다."
-            elif "500" in error_str or "503" in error_str:
+            elif error_class == "5xx":
                 st.error("🔧 **서버 오류**")
                 st.warning("Gemini API 서버에 일시적인 문제가 있습니다.")
                 error_message = "일시적으로 서비스를 사용할 수 없습니다."
@@ -535,8 +587,9 @@ if prompt:
                     st.code(error_str)
                 error_message = "일시적으로 서비스를 사용할 수 없습니다."
             
-            st.session_state.messages.append({"role": "assistant", "content": error_message})
+            st.session_state.messages.append(new_message("assistant", error_message))
     
+    archive_old_messages()
     st.rerun()
 
 with st.sidebar:
@@ -553,27 +606,74 @@ with st.sidebar:
         
         if st.session_state.api_call_log:
             with st.expander("📋 호출 로그 보기"):
-                for log in st.session_state.api_call_log[-10:]:  # 최근 10개만
-                    st.text(f"#{log['count']} - {log['time']} ({log['prompt_length']} chars)")
+                for log in list(st.session_state.api_call_log)[-10:]:  # 최근 10개만
+                    st.text(f"#{log['count']} - {log['time']} ({log['prompt_length']} chars · {log['prompt_tokens']} tokens)")
         
         st.markdown("---")
     
-    if st.session_state.feedback_data:
+    # 📈 전체 피드백 통계 (모든 세션 공유 집계, 새 행만 로컬 저장소에서 읽음 - 시트 읽기 없음)
+    stats = get_service().feedback_analytics.snapshot()
+    if stats["likes"] + stats["dislikes"] > 0:
         st.markdown("### 📈 피드백 통계")
-        thumbs_up = sum(1 for f in st.session_state.feedback_data.values() if f["feedback"] == 1)
-        thumbs_down = sum(1 for f in st.session_state.feedback_data.values() if f["feedback"] == 0)
-        total = thumbs_up + thumbs_down
         
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("👍", thumbs_up)
+            st.metric("👍", stats["likes"])
         with col2:
-            st.metric("👎", thumbs_down)
+            st.metric("👎", stats["dislikes"])
         
-        if total > 0:
-            satisfaction = (thumbs_up / total) * 100
-            st.progress(satisfaction / 100)
-            st.caption(f"만족도: {satisfaction:.1f}%")
+        st.progress(stats["satisfaction"])
+        st.caption(f"만족도: {stats['satisfaction'] * 100:.1f}%")
+        
+        with st.expander("📊 상세 통계"):
+            st.markdown(render_stats_table("모드", stats["by_mode"]))
+            st.markdown(render_stats_table("최근 날짜", stats["by_day"]))
+            st.markdown(render_stats_table("프롬프트 버전", stats["by_prompt_version"], current=get_service().prompt_builder.version))
+            if stats["by_reason"]:
+                reason_rows = "\n".join(f"| {reason or '(없음)'} | {count} |" for reason, count in stats["by_reason"].items())
+                st.markdown(f"| 싫어요 사유 | 👎 |\n|---|---|\n{reason_rows}")
+    
+    st.markdown("---")
+    
+    # 🩺 Google Sheets 연결 상태 (최근 호출 결과 기준, 시트 읽기 없음)
+    st.markdown("### 🩺 Google Sheets 연결")
+    sheet_url = st.secrets.get("feedback_sheet_url", "")
+    if "gcp_service_account" not in st.secrets or not sheet_url:
+        st.caption("⚪ 연동 설정 없음")
+    else:
+        sheet_pool = get_service().sheet_pool
+        health = sheet_pool.health()
+        if health == "ok":
+            st.caption(f"🟢 정상 (마지막 성공: {sheet_pool.last_success.strftime('%H:%M:%S')})")
+        elif health == "error":
+            error_time, error_text = sheet_pool.last_error
+            st.caption(f"🔴 오류 ({error_time.strftime('%H:%M:%S')})")
+            with st.expander("상세 오류 내용"):
+                st.code(error_text)
+        else:
+            st.caption("⚪ 아직 호출 없음")
+        
+        pending = get_service().feedback_sync.pending()
+        if pending:
+            st.caption(f"📤 전송 대기 중인 피드백: {pending}건")
+        
+        if st.button("🔄 연결 확인"):
+            sheet_pool.check(sheet_url)
+            st.rerun()
+    
+    # 📈 프로세스 전체 지표 (모든 세션 합산)
+    with st.expander("📈 서버 지표"):
+        span_summary, _ = METRICS.snapshot()
+        for row in span_summary:
+            labels = ", ".join(f"{key}={value}" for key, value in row["labels"].items())
+            name = f"{row['span']} ({labels})" if labels else row["span"]
+            st.text(f"{name}: {row['count']}회, 평균 {row['mean_seconds'] * 1000:.1f}ms")
+        # 🚧 차단기가 열린 API 키/모델 (장애 조치 중)
+        for (key_index, model_name), state in get_service().retry_scheduler.states().items():
+            if state != "closed":
+                st.text(f"🚧 키 {key_index + 1} · {model_name}: {state}")
+        st.download_button("Prometheus 텍스트", METRICS.prometheus_text(), file_name="metrics.txt", mime="text/plain")
+        st.download_button("JSON Lines", METRICS.json_lines(), file_name="metrics.jsonl", mime="application/jsonl")
     
     st.markdown("---")
     st.caption("💡 부정 피드백은 자동으로 학습에 반영됩니다")
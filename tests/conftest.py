@@ -0,0 +1,37 @@
+import threading
+
+import pytest
+
+from sidiz.service import build_service
+
+
+@pytest.fixture
+def fake_service(tmp_path, monkeypatch):
+    """가짜 Gemini로 서비스를 만드는 함수
+    
+    가짜는 monkeypatch로 설치하므로 테스트가 끝나면 google.generativeai가 원래대로 돌아오고,
+    그 전에 서비스의 백그라운드 스레드를 멈춘다.
+    """
+    services = []
+    
+    def build(fake_gemini, **secrets):
+        fake_gemini.install(monkeypatch.setattr)
+        service = build_service({
+            **secrets,
+            "gemini": {"api_key": "fake", "rpm": 100_000, "tpm": 100_000_000, "stream": False, **secrets.get("gemini", {})},
+            "feedback_db_path": str(tmp_path / f"feedback{len(services)}.sqlite3"),
+            "prefetch_examples": secrets.get("prefetch_examples", False),
+        })
+        services.append(service)
+        return service
+    
+    yield build
+    for service in services:
+        service.feedback_sync.stop()
+        service.negative_feedback_cache.stop()
+        if service.prefetcher is not None:
+            service.prefetcher.stop()
+    # 모델 warm-up이 패치가 풀린 뒤 진짜 SDK를 부르지 않도록 끝날 때까지 기다림
+    for thread in threading.enumerate():
+        if thread.name == "gemini-warm-up":
+            thread.join()
@@ -0,0 +1,173 @@
+import asyncio
+import json
+
+import pytest
+
+from bench.api_load import API_TOKEN, request
+from bench.fakes import FakeGemini
+from sidiz.api import MAX_BATCH_SIZE, MAX_BODY_BYTES, ConversionAPI
+
+FAILING_PHRASE = "실패하는 문구"
+
+
+class PartialGemini(FakeGemini):
+    """일괄 응답에서 FAILING_PHRASE를 빼고, 그 문구의 개별 요청은 429로 실패시키는 가짜 Gemini"""
+    
+    def answer(self, prompt, generation_config=None):
+        text = super().answer(prompt, generation_config)
+        if "사용자 입력 목록 (JSON)" in prompt:
+            items = json.loads(text)
+            text = json.dumps([item for item in items if FAILING_PHRASE not in item["output"]], ensure_ascii=False)
+        return text
+    
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        if f'사용자 입력: "{FAILING_PHRASE}"' in prompt:
+            from google.api_core.exceptions import ResourceExhausted
+            
+            raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        return super().generate_content(prompt, stream, generation_config, **kwargs)
+
+
+@pytest.fixture
+def make_api(fake_service):
+    def make(gemini):
+        return ConversionAPI(fake_service(gemini, gemini={"max_attempts": 1}), API_TOKEN)
+    return make
+
+
+def call(api, *requests):
+    """서버를 빈 포트에 띄우고 keep-alive 연결 하나로 요청을 차례로 보냄 - [(상태 코드, 응답)]"""
+    async def scenario():
+        server = await api.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return [await request(reader, writer, *args, **kwargs) for args, kwargs in requests]
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+    
+    return asyncio.run(scenario())
+
+
+def req(method, path, body=None, **kwargs):
+    return (method, path, body), kwargs
+
+
+@pytest.fixture
+def gemini():
+    return FakeGemini(latency=0, first_token_latency=0)
+
+
+@pytest.fixture
+def api(make_api, gemini):
+    return make_api(gemini)
+
+
+def test_requires_token():
+    with pytest.raises(ValueError):
+        ConversionAPI(object(), "")
+
+
+def test_rejects_missing_or_wrong_token(api, gemini):
+    responses = call(
+        api,
+        req("POST", "/convert", {"mode": "UX", "text": "의자"}, token=None),
+        req("POST", "/feedback", {"mode": "UX", "original": "a", "converted": "b", "feedback": 0}, token="wrong"),
+        req("GET", "/nope", token=None),
+    )
+    assert [status for status, _ in responses] == [401, 401, 401]
+    assert gemini.calls["generate_content"] == 0
+    assert api.service.feedback_store.pending() == 0
+
+
+def test_convert_and_cache(api, gemini):
+    (status, first), (_, second) = call(
+        api,
+        req("POST", "/convert", {"mode": "UX", "text": "편안한 의자"}),
+        req("POST", "/convert", {"mode": "UX", "text": "편안한 의자"}),
+    )
+    assert status == 200
+    assert first["output"].startswith("하루 종일 편안한 편안한 의자")
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert gemini.calls["generate_content"] == 1
+
+
+def test_feedback_stats_and_health(api):
+    responses = call(
+        api,
+        req("POST", "/feedback", {"mode": "UX", "original": "의자", "converted": "변환", "feedback": 0, "reason": "기타"}),
+        req("GET", "/feedback/stats"),
+        req("GET", "/health"),
+    )
+    assert [status for status, _ in responses] == [200, 200, 200]
+    assert responses[1][1]["dislikes"] == 1
+    assert responses[2][1]["pending_feedback"] == 1
+
+
+@pytest.mark.parametrize("body", [
+    {"mode": "X", "text": "의자"},
+    {"mode": "UX"},
+    {"mode": "UX", "text": "   "},
+    ["not", "an", "object"],
+])
+def test_convert_bad_request(api, gemini, body):
+    [(status, payload)] = call(api, req("POST", "/convert", body))
+    assert status == 400
+    assert payload["error"] == "bad request"
+    assert gemini.calls["generate_content"] == 0
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/convert/batch", {"mode": "UX", "texts": []}),
+    ("/convert/batch", {"mode": "UX", "texts": ["의자"] * (MAX_BATCH_SIZE + 1)}),
+    ("/compare", {"modes": ["UX", "X"], "text": "의자"}),
+    ("/feedback", {"mode": "UX", "original": "a", "converted": "b", "feedback": True}),
+])
+def test_other_routes_bad_request(api, path, body):
+    [(status, _)] = call(api, req("POST", path, body))
+    assert status == 400
+
+
+def test_not_found_and_method_not_allowed(api):
+    responses = call(api, req("GET", "/nope"), req("GET", "/convert"), req("POST", "/health"))
+    assert [status for status, _ in responses] == [404, 405, 405]
+
+
+def test_payload_too_large(api):
+    async def scenario():
+        server = await api.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+        writer.write(
+            f"POST /convert HTTP/1.1\r\nAuthorization: Bearer {API_TOKEN}\r\n"
+            f"Content-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return int(status_line.split()[1])
+    
+    assert asyncio.run(scenario()) == 413
+
+
+def test_quota_error_returns_429(make_api):
+    api = make_api(FakeGemini(latency=0, error_rate=1.0))
+    [(status, payload)] = call(api, req("POST", "/convert", {"mode": "UX", "text": "의자"}))
+    assert status == 429
+    assert payload["error"] == "429"
+
+
+def test_batch_partial_failure(make_api):
+    api = make_api(PartialGemini(latency=0))
+    [(status, payload)] = call(
+        api, req("POST", "/convert/batch", {"mode": "UX", "texts": ["편안한 의자", FAILING_PHRASE, "T50 의자"]})
+    )
+    assert status == 200
+    results = payload["results"]
+    assert [result["text"] for result in results] == ["편안한 의자", FAILING_PHRASE, "T50 의자"]
+    assert results[0]["output"] == "시디즈가 제안하는 편안한 의자"
+    assert results[2]["output"] == "시디즈가 제안하는 T50 의자"
+    assert results[1]["error"] == "429" and "output" not in results[1]
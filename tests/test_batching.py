@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from sidiz.batching import convert_batch, parse_batch_response, parse_compare_response, strip_code_fence
+
+
+def test_parse_batch_response_keeps_valid_items():
+    text = json.dumps([{"id": 1, "output": " 둘 "}, {"id": 0, "output": "하나"}])
+    assert parse_batch_response(text, 2) == {0: "하나", 1: "둘"}
+
+
+@pytest.mark.parametrize("item", [
+    {"id": -1, "output": "범위 밖"},
+    {"id": 3, "output": "범위 밖"},
+    {"id": "0", "output": "문자열 id"},
+    {"id": 1.0, "output": "실수 id"},
+    {"id": True, "output": "bool id"},
+    {"id": False, "output": "bool id"},
+    {"id": 0, "output": "   "},
+    {"id": 0, "output": None},
+    {"id": 0},
+    "문자열 항목",
+    ["리스트 항목"],
+])
+def test_parse_batch_response_drops_bad_items(item):
+    assert parse_batch_response(json.dumps([item]), 3) == {}
+
+
+def test_parse_batch_response_keeps_first_duplicate():
+    text = json.dumps([{"id": 0, "output": "처음"}, {"id": 0, "output": "나중"}, {"id": 0, "output": ""}])
+    assert parse_batch_response(text, 1) == {0: "처음"}
+
+
+@pytest.mark.parametrize("fence", ["```json\n{}\n```", "```\n{}\n```", "  ```json\n{}```  "])
+def test_parse_batch_response_strips_code_fence(fence):
+    text = fence.format(json.dumps([{"id": 0, "output": "하나"}]))
+    assert parse_batch_response(text, 1) == {0: "하나"}
+
+
+def test_strip_code_fence_without_body():
+    assert strip_code_fence("``````") == ""
+
+
+@pytest.mark.parametrize("text", ['{"id": 0, "output": "하나"}', '"하나"', "null"])
+def test_parse_batch_response_rejects_non_list(text):
+    with pytest.raises(ValueError):
+        parse_batch_response(text, 1)
+
+
+def test_parse_batch_response_rejects_invalid_json():
+    with pytest.raises(json.JSONDecodeError):
+        parse_batch_response("[{", 1)
+
+
+def test_parse_compare_response():
+    text = "```json\n" + json.dumps({"UX": " 가 ", "SEO/GEO": "", "기타": "무시"}) + "\n```"
+    assert parse_compare_response(text, ["UX", "SEO/GEO"]) == {"UX": "가"}
+    with pytest.raises(ValueError):
+        parse_compare_response("[]", ["UX"])
+
+
+class Batch:
+    """convert_batch에 넘기는 가짜 모델 - generate_json 응답과 개별 변환 호출을 기록"""
+    
+    def __init__(self, response, fail=()):
+        self.response = response
+        self.fail = set(fail)
+        self.prompts = []
+        self.singles = []
+    
+    def build_prompt(self, mode, phrases, negative_feedback):
+        return (mode, tuple(phrases), tuple(negative_feedback))
+    
+    def generate_json(self, prompt):
+        self.prompts.append(prompt)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+    
+    def convert_one(self, mode, phrase):
+        self.singles.append(phrase)
+        if phrase in self.fail:
+            raise RuntimeError(f"{phrase} 실패")
+        return f"[{mode}] {phrase}"
+    
+    def run(self, phrases, negative_feedback=()):
+        return convert_batch(
+            "UX", phrases, list(negative_feedback),
+            self.build_prompt, self.generate_json, self.convert_one,
+        )
+
+
+def test_convert_batch_uses_one_request():
+    batch = Batch(json.dumps([{"id": 1, "output": "둘"}, {"id": 0, "output": "하나"}]))
+    assert batch.run(["a", "b"], ["피드백"]) == ["하나", "둘"]
+    assert batch.prompts == [("UX", ("a", "b"), ("피드백",))]
+    assert batch.singles == []
+
+
+def test_convert_batch_falls_back_per_missing_item():
+    batch = Batch(json.dumps([{"id": 1, "output": "둘"}, {"id": 7, "output": "범위 밖"}]), fail=["c"])
+    results = batch.run(["a", "b", "c"])
+    assert results[:2] == ["[UX] a", "둘"]
+    assert isinstance(results[2], RuntimeError)
+    assert batch.singles == ["a", "c"]
+
+
+@pytest.mark.parametrize("response", ["not json", '{"id": 0}', "```json\n```"])
+def test_convert_batch_falls_back_when_response_is_unparseable(response):
+    batch = Batch(response)
+    assert batch.run(["a", "b"]) == ["[UX] a", "[UX] b"]
+    assert batch.singles == ["a", "b"]
+
+
+def test_convert_batch_request_failure_is_not_retried_per_item():
+    error = RuntimeError("429 quota")
+    batch = Batch(error)
+    assert batch.run(["a", "b", "c"]) == [error, error, error]
+    assert batch.singles == []
@@ -0,0 +1,115 @@
+import io
+import threading
+
+import pytest
+
+from sidiz.bulk import BulkJob, read_phrases
+
+
+def xlsx(rows):
+    from openpyxl import Workbook
+    
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_read_csv_with_header_column():
+    data = "번호,원본 문구\n1,편안한 의자\n2, 허리가 아파요 \n3,\n".encode("utf-8-sig")
+    assert read_phrases("phrases.csv", data) == ["편안한 의자", "허리가 아파요"]
+
+
+def test_read_csv_without_header_uses_first_column():
+    data = "편안한 의자,메모\n\n허리가 아파요,\n".encode("utf-8")
+    assert read_phrases("phrases.CSV", data) == ["편안한 의자", "허리가 아파요"]
+
+
+def test_read_xlsx_with_header_column():
+    data = xlsx([["메모", "문구"], ["a", "편안한 의자"], [None, None], ["b", "T50 의자"]])
+    assert read_phrases("phrases.xlsx", data) == ["편안한 의자", "T50 의자"]
+
+
+def test_read_xlsx_without_header_uses_first_column():
+    data = xlsx([["편안한 의자", 1], [1234, None]])
+    assert read_phrases("phrases.xlsx", data) == ["편안한 의자", "1234"]
+
+
+def test_read_empty_file():
+    assert read_phrases("empty.csv", b"") == []
+
+
+def test_read_invalid_xlsx_raises():
+    with pytest.raises(Exception):
+        read_phrases("broken.xlsx", b"not a workbook")
+
+
+class FlakyConvert:
+    """처음 호출에서만 fail에 든 문구를 실패시키는 가짜 변환 함수"""
+    
+    def __init__(self, fail):
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+    
+    def __call__(self, mode, phrase):
+        with self._lock:
+            self.calls.append((mode, phrase))
+            if phrase in self.fail:
+                self.fail.discard(phrase)
+                raise RuntimeError("429 quota")
+        return f"[{mode}] {phrase}"
+    
+    def batch(self, mode, phrases):
+        return [self.convert_or_error(mode, phrase) for phrase in phrases]
+    
+    def convert_or_error(self, mode, phrase):
+        try:
+            return self(mode, phrase)
+        except RuntimeError as e:
+            return e
+
+
+def test_run_resumes_only_failed_items():
+    convert = FlakyConvert(fail=["b"])
+    job = BulkJob(["a", "b", "c"], ["UX", "SEO/GEO"])
+    progress = []
+    
+    job.run(convert, max_workers=2, on_progress=lambda job: progress.append(job.done))
+    assert job.done == 5
+    assert set(job.errors) == {(1, "UX")} or set(job.errors) == {(1, "SEO/GEO")}
+    assert len(progress) == 6
+    
+    failed = next(iter(job.errors))
+    convert.calls.clear()
+    job.run(convert)
+    assert convert.calls == [(failed[1], "b")]
+    assert job.done == job.total and not job.errors
+    assert list(job.iter_rows())[2] == ["b", "[UX] b", "[SEO/GEO] b"]
+
+
+def test_run_batched_resumes_partial_and_whole_batch_failures():
+    convert = FlakyConvert(fail=["b"])
+    outage = {"SEO/GEO": True}  # 첫 실행에서는 SEO/GEO 요청이 통째로 실패
+    
+    def convert_batch(mode, phrases):
+        if outage.get(mode):
+            raise RuntimeError("503 unavailable")
+        return convert.batch(mode, phrases)
+    
+    job = BulkJob(["a", "b", "c"], ["UX", "SEO/GEO"])
+    job.run_batched(convert_batch, batch_size=2)
+    assert set(job.errors) == {(1, "UX"), (0, "SEO/GEO"), (1, "SEO/GEO"), (2, "SEO/GEO")}
+    assert job.results == {(0, "UX"): "[UX] a", (2, "UX"): "[UX] c"}
+    
+    outage["SEO/GEO"] = False
+    convert.calls.clear()
+    job.run_batched(convert_batch, batch_size=2)
+    assert sorted(convert.calls) == sorted([("UX", "b"), ("SEO/GEO", "a"), ("SEO/GEO", "b"), ("SEO/GEO", "c")])
+    assert job.done == job.total and not job.errors
+    
+    csv_text = job.to_csv().decode("utf-8-sig").splitlines()
+    assert csv_text[0] == "원본 문구,UX 변환,SEO/GEO 변환"
+    assert csv_text[2] == "b,[UX] b,[SEO/GEO] b"
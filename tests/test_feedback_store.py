@@ -0,0 +1,90 @@
+import pytest
+
+from bench.fakes import FakeSheets
+from sidiz.feedback_analytics import FeedbackAnalytics
+from sidiz.feedback_store import FeedbackStore
+from sidiz.feedback_sync import SHEET_ROWS_KEY, FeedbackSync
+
+LIKE = ["2026-10-17 10:00:00", "UX", "편안한 의자", "하루 종일 편안한 의자", "👍", 1, "", ""]
+DISLIKE = ["2026-10-17 10:00:05", "UX", "편안한 의자", "하루 종일 편안한 의자", "👎", 0, "너무 길어요", ""]
+
+
+@pytest.fixture
+def sync():
+    # 백그라운드 스레드가 끼어들지 않도록 주기를 길게 잡고 push/pull을 직접 호출
+    syncs = []
+    
+    def make(store, sheets):
+        syncs.append(FeedbackSync(store, lambda: sheets.worksheet, push_interval=3600, pull_interval=3600))
+        return syncs[-1]
+    
+    yield make
+    for feedback_sync in syncs:
+        feedback_sync.stop()
+
+
+def count(store):
+    return sum(row[-1] for row in store.rollup()[1])
+
+
+def test_identical_rows_are_all_kept(tmp_path):
+    store = FeedbackStore(str(tmp_path / "feedback.sqlite3"))
+    store.add(LIKE)
+    store.add(LIKE)
+    assert store.pending() == 2
+    assert FeedbackAnalytics(store).snapshot()["likes"] == 2
+
+
+def test_pull_skips_own_rows_and_keeps_other_replicas_duplicates(tmp_path, sync):
+    sheets = FakeSheets()
+    first = FeedbackStore(str(tmp_path / "first.sqlite3"))
+    second = FeedbackStore(str(tmp_path / "second.sqlite3"))
+    first_sync, second_sync = sync(first, sheets), sync(second, sheets)
+    
+    first.add(LIKE)
+    first.add(DISLIKE)
+    second.add(LIKE)  # 다른 세션이 같은 캐시 결과에 같은 피드백
+    assert first_sync.push() == 2
+    assert second_sync.push() == 1
+    assert len(sheets.worksheet.rows) == 4
+    
+    for store, store_sync in ((first, first_sync), (second, second_sync)):
+        store_sync.pull()
+        store_sync.pull()
+        assert store.pending() == 0
+        stats = FeedbackAnalytics(store).snapshot()
+        assert (stats["likes"], stats["dislikes"]) == (2, 1)
+
+
+def test_pull_before_own_push_still_counts_every_row(tmp_path, sync):
+    sheets = FakeSheets()
+    first = FeedbackStore(str(tmp_path / "first.sqlite3"))
+    second = FeedbackStore(str(tmp_path / "second.sqlite3"))
+    first_sync, second_sync = sync(first, sheets), sync(second, sheets)
+    
+    first.add(LIKE)
+    second.add(LIKE)
+    second_sync.push()
+    first_sync.pull()  # 아직 올리지 않은 자기 행과 다른 인스턴스의 같은 행
+    first_sync.push()
+    first_sync.pull()
+    assert count(first) == 2
+
+
+def test_historic_duplicate_sheet_rows_are_imported(tmp_path, sync):
+    sheets = FakeSheets()
+    sheets.worksheet.rows += [[str(value) for value in LIKE]] * 3
+    store = FeedbackStore(str(tmp_path / "feedback.sqlite3"))
+    sync(store, sheets).pull()
+    assert count(store) == 3
+    assert store.get_state(SHEET_ROWS_KEY) == 4
+
+
+def test_stop_ends_background_sync(tmp_path):
+    store = FeedbackStore(str(tmp_path / "feedback.sqlite3"))
+    feedback_sync = FeedbackSync(store, lambda: None, push_interval=3600)
+    feedback_sync.stop()
+    assert not feedback_sync._worker.is_alive()
+    store.add(LIKE)
+    feedback_sync.notify()
+    assert store.pending() == 1
@@ -0,0 +1,22 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from sidiz.metrics import Metrics, serve_metrics
+
+
+def test_metrics_server_listens_on_localhost_by_default():
+    metrics = Metrics()
+    metrics.increment("requests", mode="UX")
+    server = serve_metrics(0, metrics)
+    try:
+        host, port = server.server_address[:2]
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert 'sidiz_requests_total{mode="UX"} 1' in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/unknown", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,126 @@
+from collections import Counter
+
+from sidiz.negative_index import NegativeExampleIndex
+
+
+def negative(original, converted, mode="UX", reason="너무 길어요"):
+    return {"모드": mode, "원본 문구": original, "변환된 문구": converted, "싫어요 사유": reason}
+
+
+def assert_index_consistent(index):
+    """역색인/문서 빈도가 남아 있는 예시로 새로 만든 값과 같은지 확인"""
+    postings = {}
+    frequency = Counter()
+    for entry_id, entry in index._entries.items():
+        for term in entry.terms:
+            postings.setdefault(term, set()).add(entry_id)
+            frequency[term] += 1
+    assert index._postings == postings
+    assert index._document_frequency == frequency
+    assert set(index._text_keys.values()) == set(index._entries)
+    assert {entry_id for ids in index._groups.values() for entry_id in ids} == set(index._entries)
+
+
+def test_exact_duplicate_replaces_older_example():
+    index = NegativeExampleIndex()
+    assert index.add(negative("편안한 의자", "편안함을 드립니다"))
+    newer = negative(" 편안한   의자", "편안함을 드립니다", reason="너무 길어요")
+    assert not index.add(newer)  # 공백만 다른 같은 문장
+    assert index.records() == (newer,)
+    assert index.duplicates == 1
+    assert_index_consistent(index)
+
+
+def test_near_duplicate_replaces_within_group_only():
+    first = negative("하루 종일 앉아도 편안한 의자", "하루 종일 앉아 있어도 지치지 않는 의자입니다")
+    near = negative("하루 종일 앉아도 편안한 의자!", "하루 종일 앉아 있어도 지치지 않는 의자입니다.")
+    index = NegativeExampleIndex()
+    index.add(first)
+    # 정규화 문장(키)은 다르지만 문장부호를 뺀 shingle은 같음
+    assert not index.add(near)
+    assert index.records() == (near,)
+    
+    # 사유나 모드가 다르면 다른 그룹 - 중복으로 보지 않음
+    assert index.add({**first, "싫어요 사유": "어색해요"})
+    assert index.add({**first, "모드": "SEO/GEO"})
+    assert len(index) == 3
+    assert_index_consistent(index)
+
+
+def test_different_examples_are_kept():
+    index = NegativeExampleIndex()
+    assert index.add(negative("편안한 의자", "편안함을 드립니다"))
+    assert index.add(negative("허리가 아파요", "요추를 받쳐 드립니다"))
+    assert index.add(negative("편안한 의자", "편안함을 드립니다. 하루 종일 앉아 있어도 괜찮아요"))
+    assert len(index) == 3
+    assert index.duplicates == 0
+
+
+def test_eviction_cleans_postings_and_document_frequency():
+    index = NegativeExampleIndex(capacity=2)
+    oldest = negative("편안한 의자", "편안함을 드립니다")
+    index.add(oldest)
+    index.add(negative("허리가 아파요", "요추를 받쳐 드립니다"))
+    index.add(negative("가성비 좋은 의자", "합리적인 가격의 시디즈"))
+    assert len(index) == 2
+    assert oldest not in index.records()
+    assert "편안" not in index._postings
+    assert "편안" not in index._document_frequency
+    assert_index_consistent(index)
+    
+    # 밀려난 예시와 같은 문장은 다시 새 예시로 들어감
+    assert index.add(oldest)
+    assert_index_consistent(index)
+
+
+def test_select_orders_by_similarity_least_relevant_first():
+    index = NegativeExampleIndex()
+    chair = negative("편안한 의자", "편안함을 드립니다", reason="a")
+    back = negative("허리가 아파요", "요추를 받쳐 드립니다", reason="b")
+    price = negative("가성비 좋은 의자", "합리적인 가격", reason="c")
+    for record in (chair, back, price):
+        index.add(record)
+    # 가장 비슷한 예시가 마지막, 유사도가 같으면(0) 최신 예시가 앞선다
+    assert index.select(["UX"], "허리가 아파요", k=2) == (price, back)
+    assert index.select(["UX"], "편안한 의자", k=3) == (back, price, chair)
+    assert index.select(["UX"], "허리가 아파요", k=0) == ()
+
+
+def test_select_caps_examples_per_reason():
+    index = NegativeExampleIndex(per_reason=2)
+    same_reason = [negative(f"의자 {name}", f"변환 {name}", reason="너무 길어요") for name in ("하나", "둘", "셋")]
+    other = negative("의자 넷", "변환 넷", reason="어색해요")
+    for record in [*same_reason, other]:
+        index.add(record)
+    
+    selected = index.select(["UX"], "의자", k=4)
+    assert len(selected) == 3
+    assert Counter(record["싫어요 사유"] for record in selected) == {"너무 길어요": 2, "어색해요": 1}
+
+
+def test_select_weights_other_modes():
+    index = NegativeExampleIndex(other_mode_weight=0.5)
+    same_mode = negative("편안한 의자", "편안함을 드립니다", reason="a")
+    other_mode = negative("편안한 의자 추천", "편안함을 드립니다", mode="SEO/GEO", reason="b")
+    unrelated = negative("가격 문의", "합리적인 가격", mode="SEO/GEO", reason="c")
+    for record in (same_mode, other_mode, unrelated):
+        index.add(record)
+    
+    scores = index.similarities("편안한 의자 추천")
+    assert scores[1] > scores[0]  # 다른 모드 예시가 입력과 더 비슷하지만
+    # 가중치를 받아 같은 모드 예시가 더 관련 있는 것으로 뒤에 온다
+    assert index.select(["UX"], "편안한 의자 추천", k=3) == (other_mode, same_mode)
+    # 유사도가 0인 다른 모드 예시는 후보가 아님
+    assert unrelated not in index.select(["UX"], "편안한 의자 추천", k=3)
+    # 두 모드를 모두 고르면 가중치 없이 비교
+    assert index.select(["UX", "SEO/GEO"], "편안한 의자 추천", k=2) == (same_mode, other_mode)
+
+
+def test_same_mode_examples_are_candidates_without_similarity():
+    index = NegativeExampleIndex()
+    older = negative("가격 문의", "합리적인 가격", reason="a")
+    newer = negative("배송 문의", "빠른 배송", reason="b")
+    index.add(older)
+    index.add(newer)
+    # 유사도가 모두 0이면 최신 예시가 가장 관련 있는 것으로 취급
+    assert index.select(["UX"], "전혀 다른 문장", k=2) == (older, newer)
@@ -0,0 +1,34 @@
+from bench.fakes import FakeGemini
+from sidiz.metrics import METRICS
+from sidiz.prefetch import ExamplePrefetcher
+from sidiz.service import MODES
+
+PHRASES = ["편안한 의자", "허리가 아파요"]
+
+
+def response_lookups():
+    return sum(
+        counter["value"] for counter in METRICS.snapshot()[1]
+        if counter["counter"] == "cache_lookups" and counter["labels"].get("cache") == "response"
+    )
+
+
+def test_prefetch_fills_cache_without_touching_hit_rate(fake_service):
+    gemini = FakeGemini(latency=0)
+    service = fake_service(gemini)
+    # 시작 직후 백그라운드에서 한 번 돌고 나면 interval 동안 쉼 - prefetch()는 여러 번 불러도 같은 결과
+    prefetcher = ExamplePrefetcher(service, PHRASES, MODES, interval=3600, reserve=0)
+    try:
+        before = response_lookups()
+        assert prefetcher.prefetch()
+        assert all(not prefetcher.missing(mode) for mode in MODES)
+        assert prefetcher.prefetch()
+        assert response_lookups() == before
+        
+        calls = gemini.calls["generate_content"]
+        assert service.convert("UX", PHRASES[0]) == (service.cached("UX", PHRASES[0], []), True)
+        assert gemini.calls["generate_content"] == calls
+        assert response_lookups() == before + 2
+    finally:
+        prefetcher.stop()
+    assert not prefetcher._worker.is_alive()
@@ -0,0 +1,81 @@
+from sidiz.negative_feedback import render_negative_block
+from sidiz.prompts import PromptBuilder, TokenCounter, estimate_tokens, truncate_record
+
+
+def record(index, length=10):
+    return {
+        "원본 문구": f"원본{index}" + "가" * length,
+        "변환된 문구": f"변환{index}" + "나" * length,
+        "싫어요 사유": "너무 길어요",
+        "코멘트": "",
+    }
+
+
+def budget_for(records, prefix="", suffix=""):
+    return estimate_tokens(prefix + render_negative_block(records) + suffix)
+
+
+def test_everything_fits_without_truncation():
+    records = [record(index, length=300) for index in range(3)]
+    builder = PromptBuilder(token_budget=budget_for(records), field_limit=20)
+    block, kept = builder.fit_negative_block(records)
+    assert (block, kept) == (render_negative_block(records), 3)
+
+
+def test_no_budget_keeps_everything():
+    records = [record(index, length=300) for index in range(3)]
+    assert PromptBuilder(token_budget=None).fit_negative_block(records) == (render_negative_block(records), 3)
+
+
+def test_truncates_long_fields_before_dropping():
+    records = [record(index, length=300) for index in range(3)]
+    truncated = [truncate_record(row, 20) for row in records]
+    builder = PromptBuilder(token_budget=budget_for(truncated), field_limit=20)
+    block, kept = builder.fit_negative_block(records)
+    assert kept == 3
+    assert block == render_negative_block(truncated)
+    assert "가" * 21 not in block
+
+
+def test_drops_least_relevant_examples_first():
+    # select()는 관련도 오름차순 - 마지막 예시가 가장 관련 있음
+    records = [record(index, length=300) for index in range(5)]
+    truncated = [truncate_record(row, 20) for row in records]
+    prefix, suffix = "앞부분\n", "\n사용자 입력"
+    builder = PromptBuilder(token_budget=budget_for(truncated[3:], prefix, suffix), field_limit=20)
+    block, kept = builder.fit_negative_block(records, prefix, suffix)
+    assert kept == 2
+    assert block == render_negative_block(truncated[3:])
+
+
+def test_drops_everything_when_fixed_part_exceeds_budget():
+    builder = PromptBuilder(token_budget=5)
+    assert builder.fit_negative_block([record(0)], suffix="가" * 10) == ("", 0)
+
+
+def test_fits_against_counter_not_local_estimate():
+    records = [record(index) for index in range(4)]
+    # 모델 토큰 수가 로컬 추정의 두 배라고 가정
+    calls = []
+    
+    def count_tokens(text):
+        calls.append(text)
+        return 2 * estimate_tokens(text)
+    
+    budget = budget_for(records)
+    builder = PromptBuilder(token_budget=budget, counter=TokenCounter(count_tokens))
+    block, kept = builder.fit_negative_block(records)
+    assert 0 < kept < 4
+    assert count_tokens(block) <= budget
+    assert len(calls) <= 5  # 전체 1번 + 이진 탐색
+
+
+def test_prompt_respects_budget_with_counter():
+    records = [record(index, length=100) for index in range(6)]
+    counter = TokenCounter(lambda text: len(text))
+    builder = PromptBuilder(token_budget=800, counter=counter, field_limit=50)
+    prompt = builder.single("UX", "편안한 의자", records)
+    assert len(prompt) <= 800
+    assert "편안한 의자" in prompt
+    assert "원본5" in prompt  # 가장 관련 있는 예시는 남음
+    assert "원본0" not in prompt
@@ -0,0 +1,160 @@
+import threading
+import time
+
+import pytest
+
+from sidiz.rate_limit import RateLimiter, TokenBucket
+from sidiz.shared_state import InProcessState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self._lock = threading.Lock()
+    
+    def __call__(self):
+        with self._lock:
+            return self.now
+    
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+def admitted_in_window(bucket, clock, seconds=60.0, step=0.5):
+    """버킷이 허용하는 대로 요청을 보냈을 때 [0, seconds] 구간(양 끝 포함)에 통과한 요청 수"""
+    admitted = 0
+    end = clock() + seconds
+    while clock() <= end:
+        if bucket.available() >= 1:
+            bucket.consume(1)
+            admitted += 1
+        else:
+            clock.advance(step)
+    return admitted
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 15, 60])
+def test_bucket_never_exceeds_limit_in_a_minute(limit):
+    clock = FakeClock()
+    admitted = admitted_in_window(TokenBucket(limit, clock=clock), clock)
+    assert limit - 1 <= admitted <= limit
+
+
+def test_single_request_per_minute_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(1, clock=clock)
+    bucket.consume(1)
+    clock.advance(60)
+    assert bucket.available() < 1  # 60초 째에 두 번째 요청이 들어가면 구간 안에 2건
+    clock.advance(1.5)
+    assert bucket.available() >= 1
+
+
+def test_bucket_rejects_non_positive_limit():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_bucket_wait_time():
+    clock = FakeClock()
+    bucket = TokenBucket(15, clock=clock)  # 용량 3, 초당 0.2
+    assert bucket.wait_time(3) == 0
+    bucket.consume(3)
+    assert bucket.wait_time(1) == pytest.approx(5.0)
+    clock.advance(5)
+    assert bucket.wait_time(1) == 0
+
+
+def start(limiter, results, name, **kwargs):
+    def run():
+        limiter.acquire(poll_interval=0.01, **kwargs)
+        results.append(name)
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "조건을 기다리다 시간 초과"
+        time.sleep(0.005)
+
+
+def test_no_wait_while_bucket_has_requests():
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=60, burst=5, clock=clock)
+    assert limiter.spare() == 5
+    assert [limiter.acquire() for _ in range(5)] == [0.0] * 5
+    assert limiter.spare() == 0
+    
+    results = []
+    thread = start(limiter, results, "sixth")
+    wait_until(lambda: limiter.queue_length == 1)
+    time.sleep(0.05)
+    assert results == []  # 버킷이 비었을 때만 기다림
+    clock.advance(60 / 55)
+    thread.join(timeout=2)
+    assert results == ["sixth"]
+
+
+def test_waiters_are_admitted_in_fifo_order():
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=2, clock=clock)  # 용량 1
+    limiter.acquire()
+    
+    results = []
+    threads = []
+    for name in ["first", "second", "third"]:
+        threads.append(start(limiter, results, name))
+        wait_until(lambda: limiter.queue_length == len(threads))
+    
+    for expected in (["first"], ["first", "second"], ["first", "second", "third"]):
+        clock.advance(60)
+        wait_until(lambda: len(results) == len(expected))
+        assert results == expected
+    for thread in threads:
+        thread.join(timeout=2)
+    assert limiter.queue_length == 0
+
+
+def test_token_request_larger_than_bucket_is_clamped():
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=10, tpm=1000, clock=clock)
+    # 한 번에 버킷 용량보다 큰 토큰을 요청해도 영원히 기다리지 않음
+    assert limiter.acquire(tokens=10 ** 9) == 0.0
+
+
+def test_replicas_share_one_bucket():
+    clock = FakeClock()
+    shared = InProcessState(clock=clock)
+    first = RateLimiter(rpm=10, burst=2, clock=clock, shared=shared, name="gemini:key")
+    second = RateLimiter(rpm=10, burst=2, clock=clock, shared=shared, name="gemini:key")
+    
+    first.acquire()
+    first.acquire()
+    assert second.spare() == 0  # 로컬 버킷은 가득 차 있지만 공유 버킷은 비어 있음
+    
+    results = []
+    thread = start(second, results, "second")
+    time.sleep(0.05)
+    assert results == []
+    clock.advance(60 / 8)
+    thread.join(timeout=2)
+    assert results == ["second"]
+
+
+def test_shared_state_failure_falls_back_to_local_bucket():
+    class Broken:
+        def consume(self, buckets):
+            raise ConnectionError("down")
+        
+        def available(self, name, rate, capacity):
+            raise ConnectionError("down")
+    
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=10, burst=2, clock=clock, shared=Broken())
+    assert limiter.spare() == 2
+    assert limiter.acquire() == 0.0
@@ -0,0 +1,88 @@
+import pytest
+
+from bench.fakes import FakeResponse
+from sidiz.response_cache import ResponseCache
+from sidiz.responses import (
+    EmptyResponseError,
+    StreamCollector,
+    iter_response_text,
+    response_text,
+    split_source,
+)
+
+ANSWER = "하루 종일 편안한 의자, 시디즈가 세심하게 설계했습니다.\n출처: kr.sidiz.com"
+
+
+class BlockedChunk:
+    """안전 필터로 막힌 조각 - .text가 ValueError를 냄"""
+    
+    @property
+    def text(self):
+        raise ValueError("response was blocked")
+
+
+class BlockedResponse:
+    def __init__(self, chunks):
+        self._chunks = chunks
+    
+    def __iter__(self):
+        return iter(self._chunks)
+
+
+def chunked(text, size):
+    return FakeResponse("prompt", text, [text[start:start + size] for start in range(0, len(text), size)], 0)
+
+
+def test_iter_response_text_yields_chunks_in_order():
+    assert "".join(iter_response_text(chunked(ANSWER, 7))) == ANSWER
+
+
+def test_iter_response_text_skips_blocked_and_empty_chunks():
+    response = BlockedResponse([BlockedChunk(), *FakeResponse("prompt", "", ["앞", "", "뒤"], 0)])
+    assert list(iter_response_text(response)) == ["앞", "뒤"]
+
+
+def test_stream_collector_passes_chunks_through_and_collects_text():
+    chunks = ["  하루 종일 ", "편안한 의자", "\n출처: ", "kr.sidiz.com\n"]
+    stream = StreamCollector(iter_response_text(FakeResponse("prompt", "".join(chunks), chunks, 0)))
+    assert list(stream) == chunks
+    assert stream.text == "하루 종일 편안한 의자\n출처: kr.sidiz.com"
+
+
+@pytest.mark.parametrize("size", [1, 3, 8, len(ANSWER)])
+def test_split_source_on_streamed_answer(size):
+    # 출처 구분자가 조각 경계에 걸쳐 나뉘어 와도 모은 텍스트에서 분리된다
+    stream = StreamCollector(iter_response_text(chunked(ANSWER, size)))
+    list(stream)
+    assert split_source(stream.text) == ("하루 종일 편안한 의자, 시디즈가 세심하게 설계했습니다.", "kr.sidiz.com")
+
+
+def test_split_source_without_source():
+    assert split_source("출처 없는 답변") == ("출처 없는 답변", None)
+
+
+def test_non_stream_path_is_single_chunk():
+    # stream이 꺼져 있으면 서비스가 [response.text] 한 조각을 돌려준다
+    response = FakeResponse("prompt", ANSWER, [ANSWER], 0)
+    stream = StreamCollector([response.text])
+    assert list(stream) == [ANSWER]
+    assert stream.text == ANSWER
+    assert response_text(response) == ANSWER
+
+
+def test_fully_blocked_stream_raises():
+    stream = StreamCollector(iter_response_text(BlockedResponse([BlockedChunk(), BlockedChunk()])))
+    with pytest.raises(EmptyResponseError):
+        list(stream)
+
+
+def test_empty_non_stream_response_raises():
+    with pytest.raises(EmptyResponseError):
+        response_text(FakeResponse("prompt", "  \n", ["  \n"], 0))
+
+
+def test_empty_output_is_not_cached():
+    cache = ResponseCache()
+    cache.put("UX", "의자", [], "")
+    assert cache.get("UX", "의자", []) is None
+    assert len(cache) == 0
@@ -0,0 +1,180 @@
+import pytest
+from google.api_core import exceptions
+
+from sidiz.retry import CircuitBreaker, RetryScheduler, retry_after, retryable_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Rerun(BaseException):
+    """Streamlit RerunException/StopException처럼 Exception이 아닌 취소 예외"""
+
+
+def scheduler(clock, **kwargs):
+    return RetryScheduler(clock=clock, sleep=clock.sleep, seed=0, **kwargs)
+
+
+class Backend:
+    """후보별로 정해 둔 오류를 차례로 내고, 다 쓰면 성공하는 가짜 호출"""
+    
+    def __init__(self, **errors):
+        self.errors = {candidate: list(values) for candidate, values in errors.items()}
+        self.calls = []
+    
+    def __call__(self, candidate):
+        self.calls.append(candidate)
+        if self.errors.get(candidate):
+            raise self.errors[candidate].pop(0)
+        return f"ok:{candidate}"
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (exceptions.ResourceExhausted("quota"), "429"),
+    (exceptions.TooManyRequests("quota"), "429"),
+    (exceptions.ServiceUnavailable("down"), "5xx"),
+    (exceptions.InternalServerError("boom"), "5xx"),
+    (exceptions.DeadlineExceeded("slow"), "5xx"),
+    (exceptions.GatewayTimeout("slow"), "5xx"),
+    (exceptions.InvalidArgument("400 bad"), None),
+    (exceptions.PermissionDenied("403"), None),
+    (RuntimeError("429 quota exceeded"), None),
+    (ValueError("503"), None),
+])
+def test_retryable_error_uses_exception_type(exc, expected):
+    assert retryable_error(exc) == expected
+
+
+def test_retry_after_from_message():
+    assert retry_after(exceptions.ResourceExhausted("429 quota. Please retry in 7.5s.")) == 7.5
+    assert retry_after(exceptions.ResourceExhausted("429 quota")) is None
+
+
+def test_fails_over_without_waiting():
+    clock = FakeClock()
+    backend = Backend(a=[exceptions.ResourceExhausted("429")])
+    retries = []
+    result = scheduler(clock).call(["a", "b"], backend, on_retry=lambda *args: retries.append(args))
+    assert result == "ok:b"
+    assert backend.calls == ["a", "b"]
+    assert clock.sleeps == [] and retries == []
+
+
+def test_waits_for_retry_after_when_no_other_candidate():
+    clock = FakeClock()
+    backend = Backend(a=[exceptions.ResourceExhausted("429 quota. Please retry in 7s.")])
+    retries = []
+    assert scheduler(clock).call(["a"], backend, on_retry=lambda *args: retries.append(args)) == "ok:a"
+    assert clock.sleeps == [7.0]
+    assert retries == [(1, 7.0, "429")]
+
+
+def test_retry_after_beyond_max_wait_gives_up():
+    clock = FakeClock()
+    error = exceptions.ResourceExhausted("429 quota. Please retry in 120s.")
+    backend = Backend(a=[error])
+    with pytest.raises(exceptions.ResourceExhausted):
+        scheduler(clock, max_wait=60).call(["a"], backend)
+    assert clock.sleeps == []
+
+
+def test_gives_up_after_max_attempts():
+    clock = FakeClock()
+    backend = Backend(a=[exceptions.ServiceUnavailable("503")] * 5)
+    with pytest.raises(exceptions.ServiceUnavailable):
+        scheduler(clock, max_attempts=3).call(["a"], backend)
+    assert len(backend.calls) == 3
+    assert len(clock.sleeps) == 2
+
+
+def test_non_retryable_error_is_raised_immediately():
+    clock = FakeClock()
+    backend = Backend(a=[RuntimeError("429 in the message only")])
+    with pytest.raises(RuntimeError):
+        scheduler(clock).call(["a", "b"], backend)
+    assert backend.calls == ["a"]
+
+
+def test_breaker_opens_then_allows_one_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.state == "open" and not breaker.try_acquire()
+    assert breaker.available_in() == 10
+    
+    clock.now += 10
+    assert breaker.state == "half_open"
+    assert breaker.try_acquire()
+    assert not breaker.try_acquire()  # 시험 호출은 하나만
+    assert breaker.state == "open"
+    
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.try_acquire()
+
+
+def test_failed_probe_reopens_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.try_acquire()
+    assert breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.available_in() == 10
+
+
+def test_retry_after_opens_breaker_immediately():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=5, clock=clock)
+    assert breaker.record_failure(cooldown=30)
+    assert breaker.available_in() == 30
+
+
+def test_cancelled_probe_is_released():
+    clock = FakeClock()
+    retry = scheduler(clock, failure_threshold=1, reset_timeout=10)
+    retry.breaker("a").record_failure()
+    clock.now += 10
+    
+    def cancelled(candidate):
+        raise Rerun()
+    
+    with pytest.raises(Rerun):
+        retry.call(["a"], cancelled)
+    # 시험 호출 자리가 남아 있지 않아 다음 요청이 다시 시험 호출을 할 수 있음
+    assert retry.states() == {"a": "half_open"}
+    assert retry.call(["a"], Backend()) == "ok:a"
+    assert retry.states() == {"a": "closed"}
+
+
+def test_cancelled_call_does_not_count_as_failure():
+    clock = FakeClock()
+    retry = scheduler(clock, failure_threshold=1)
+    
+    def cancelled(candidate):
+        raise Rerun()
+    
+    with pytest.raises(Rerun):
+        retry.call(["a"], cancelled)
+    assert retry.states() == {"a": "closed"}
+
+
+def test_waits_for_circuit_when_every_candidate_is_open():
+    clock = FakeClock()
+    retry = scheduler(clock, failure_threshold=1, reset_timeout=10)
+    retry.breaker("a").record_failure()
+    retries = []
+    assert retry.call(["a"], Backend(), on_retry=lambda *args: retries.append(args)) == "ok:a"
+    assert clock.sleeps == [10]
+    assert retries == [(1, 10, "circuit_open")]
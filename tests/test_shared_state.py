@@ -0,0 +1,218 @@
+import socket
+import time
+
+import pytest
+
+from sidiz.feedback_store import FeedbackStore, normalize_row, to_record
+from sidiz.negative_feedback import NegativeFeedbackCache
+from sidiz.shared_state import (
+    InProcessState,
+    RemoteState,
+    SharedStateError,
+    build_shared_state,
+    serve_shared_state,
+)
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def server():
+    server, state = serve_shared_state(0, TOKEN)
+    yield server, state
+    server.shutdown()
+    server.server_close()
+
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_binds_to_localhost_by_default(server):
+    assert server[0].server_address[0] == "127.0.0.1"
+
+
+def test_requires_token():
+    with pytest.raises(ValueError):
+        serve_shared_state(0, "")
+    with pytest.raises(ValueError):
+        build_shared_state("http://127.0.0.1:8700")
+    assert build_shared_state(None) is None
+
+
+def test_rejects_wrong_token(server):
+    remote = RemoteState(url(server[0]), "wrong")
+    with pytest.raises(SharedStateError):
+        remote.set("response:key", ["가짜 답변", 0])
+    assert server[1].get("response:key") is None
+
+
+def test_round_trip_with_token(server):
+    remote = RemoteState(url(server[0]), TOKEN)
+    remote.set("response:key", ["답변", 1.0], 60)
+    assert remote.get("response:key") == ["답변", 1.0]
+    assert remote.consume([["bucket", 1, 1.0, 2]]) == 0
+    assert remote.append("log", {"a": 1}) == 1
+
+
+def test_unresponsive_server_fails_fast_after_first_timeout():
+    # 연결은 받지만 응답하지 않는 서버
+    black_hole = socket.socket()
+    black_hole.bind(("127.0.0.1", 0))
+    black_hole.listen(16)
+    try:
+        remote = RemoteState(f"http://127.0.0.1:{black_hole.getsockname()[1]}", TOKEN, timeout=0.3, cooldown=60)
+        started = time.monotonic()
+        with pytest.raises(SharedStateError):
+            remote.get("response:key")
+        first = time.monotonic() - started
+        
+        started = time.monotonic()
+        for _ in range(5):
+            with pytest.raises(SharedStateError):
+                remote.get("response:key")
+        assert first < 1.0
+        assert time.monotonic() - started < 0.1
+    finally:
+        black_hole.close()
+
+
+
+def test_recovers_after_cooldown():
+    unused = socket.socket()
+    unused.bind(("127.0.0.1", 0))
+    port = unused.getsockname()[1]
+    unused.close()
+    
+    remote = RemoteState(f"http://127.0.0.1:{port}", TOKEN, cooldown=0.3)
+    with pytest.raises(SharedStateError):
+        remote.get("key")
+    server, state = serve_shared_state(port, TOKEN)
+    try:
+        state.set("key", 1)
+        with pytest.raises(SharedStateError):
+            remote.get("key")  # 서버가 돌아왔어도 cooldown 동안은 접속하지 않음
+        time.sleep(0.35)
+        assert remote.get("key") == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class RestartableState:
+    """restart()하면 새 서버처럼 빈 상태(새 epoch, 순번 0부터)로 바뀌는 공유 상태"""
+    
+    def __init__(self):
+        self.state = InProcessState()
+    
+    def restart(self):
+        self.state = InProcessState()
+    
+    def __getattr__(self, name):
+        return getattr(self.state, name)
+
+
+PHRASES = [
+    ("편안한 의자", "세상에서 가장 완벽한 궁극의 의자"),
+    ("허리가 아파요", "허리 통증이 즉시 완치됩니다"),
+    ("T50 의자", "모든 사무실의 필수품 T50"),
+    ("가성비 좋은 의자", "이 가격에 이런 품질은 기적"),
+    ("게이밍 의자", "프로게이머 백 퍼센트가 선택한 의자"),
+]
+
+
+def negative(index):
+    original, converted = PHRASES[index]
+    return to_record(normalize_row(["2026-10-17 10:00:00", "UX", original, converted, "👎", 0, "과장된 표현", ""]))
+
+
+@pytest.fixture
+def negative_cache(tmp_path):
+    """공유 상태를 쓰는 NegativeFeedbackCache를 만드는 함수 - 테스트가 끝나면 백그라운드 스레드를 멈춤"""
+    caches = []
+    
+    def make(shared, shared_interval=3600):
+        store = FeedbackStore(str(tmp_path / f"{len(caches)}.sqlite3"))
+        caches.append(NegativeFeedbackCache(store, shared=shared, shared_interval=shared_interval))
+        return caches[-1]
+    
+    yield make
+    for cache in caches:
+        cache.stop()
+
+
+def test_negative_feedback_keeps_propagating_after_server_restart(negative_cache):
+    shared = RestartableState()
+    publisher = negative_cache(shared)
+    reader = negative_cache(shared)
+    
+    for index in range(3):
+        publisher.publish(negative(index))
+    reader.pull_shared()
+    assert len(reader.index) == 3
+    
+    shared.restart()
+    publisher.publish(negative(3))
+    reader.pull_shared()
+    assert len(reader.index) == 4
+    
+    publisher.publish(negative(4))
+    reader.pull_shared()
+    assert len(reader.index) == 5
+
+
+class CountingState(InProcessState):
+    """read() 호출 수를 세고, blocked면 read()가 1초 걸리는 공유 상태"""
+    
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+        self.blocked = False
+    
+    def read(self, key, after=0, epoch=None):
+        self.reads += 1
+        if self.blocked:
+            time.sleep(1)
+        return super().read(key, after, epoch)
+
+
+def test_select_does_not_wait_for_shared_state(negative_cache):
+    shared = CountingState()
+    shared.append("negative_feedback", negative(0))
+    reader = negative_cache(shared)
+    deadline = time.monotonic() + 2
+    while len(reader.index) < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    
+    shared.blocked = True  # 공유 상태 서버가 느림
+    reads = shared.reads
+    started = time.monotonic()
+    reader.refresh()
+    assert reader.select(["UX"], PHRASES[0][0]) == (negative(0),)
+    assert time.monotonic() - started < 0.5
+    assert shared.reads == reads
+
+
+def test_background_pull_picks_up_other_replicas(negative_cache):
+    shared = InProcessState()
+    publisher = negative_cache(shared)
+    reader = negative_cache(shared, shared_interval=0.05)
+    publisher.publish(negative(1))
+    deadline = time.monotonic() + 2
+    while len(reader.index) < 1:
+        assert time.monotonic() < deadline, "공유 목록을 가져오지 않음"
+        time.sleep(0.01)
+    assert reader.index.records() == (negative(1),)
+    
+    reader.stop()
+    assert not reader._worker.is_alive()
+
+
+def test_read_reports_epoch_over_http(server):
+    remote = RemoteState(url(server[0]), TOKEN)
+    remote.append("log", "a")
+    remote.append("log", "b")
+    log = remote.read("log", 1)
+    assert log == {"epoch": server[1].epoch, "entries": [[2, "b"]]}
+    assert remote.read("log", 2, "old-epoch")["entries"] == [[1, "a"], [2, "b"]]
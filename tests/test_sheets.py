@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bench.fakes import FakeSheets
+from sidiz.sheets import SheetPool
+
+URL = "https://docs.google.com/spreadsheets/d/fake"
+
+
+class NotFound(Exception):
+    def __init__(self):
+        super().__init__("404 not found")
+        self.response = SimpleNamespace(status_code=404)
+
+
+def test_attribute_access_records_open_failure():
+    def build_client():
+        raise RuntimeError("credentials rejected")
+    
+    pool = SheetPool(build_client)
+    with pytest.raises(RuntimeError):
+        pool.handle(URL).row_count
+    assert pool.health() == "error"
+    assert "credentials rejected" in pool.last_error[1]
+
+
+def test_attribute_access_retries_stale_handle():
+    sheets = FakeSheets()
+    opened = []
+    
+    class Client:
+        def open_by_url(self, url):
+            opened.append(url)
+            if len(opened) == 1:
+                raise NotFound()
+            return sheets.open_by_url(url)
+    
+    pool = SheetPool(Client)
+    assert pool.handle(URL).row_count == 1
+    assert len(opened) == 2
+    assert pool.health() == "ok"
+
+
+def test_method_call_goes_through_pool():
+    sheets = FakeSheets()
+    pool = SheetPool(lambda: sheets)
+    handle = pool.handle(URL)
+    handle.append_rows([["a"], ["b"]])
+    assert handle.row_count == 3
+    assert sheets.worksheet.calls["append_rows"] == 1
+    assert pool.health() == "ok"